@@ -0,0 +1,76 @@
+"""
+This script generates the test cases for all of the suites in one
+process. The default data and the shared cases are loaded once and
+the suite scripts are then run in the order:
+
+    FormatTestCaseGenerator.py
+    UserAgentTestCaseGenerator.py
+    AuthoringToolTestCaseGenerator.py
+
+Cases from the shared cases that have already been built by one suite
+are reused by the following suites instead of being built again.
+
+The suites to generate can be given as arguments (format, useragent
+and authoringtool). With --concurrent each suite is generated in its
+own process after the shared data has been loaded. The processes
+inherit the shared data, but cases built by one suite are then not
+available to the others. -j is passed to the format suite and -c
+is passed to all suites.
+"""
+
+import sys
+import optparse
+import multiprocessing
+# load the shared data before the suites are run or
+# the processes for the concurrent suites are started
+from testCaseGeneratorLib import defaultData
+from testCaseGeneratorLib import sharedCases
+from testCaseGeneratorLib.buildManifest import addCaseSelectionOption
+from testCaseGeneratorLib.suiteRunner import suiteScripts, runSuite
+
+# ---------------------
+# Command Line Behavior
+# ---------------------
+
+parser = optparse.OptionParser(usage="%prog [options] [suite1 suite2]")
+parser.add_option("-j", dest="jobs", type="int", help="Number of processes used to build the format test cases. The default is one per CPU.")
+parser.add_option("--concurrent", dest="concurrent", action="store_true", help="Generate the suites in separate processes at the same time.")
+addCaseSelectionOption(parser)
+parser.set_defaults(concurrent=False)
+(options, args) = parser.parse_args()
+
+suiteNames = [name for name, script in suiteScripts]
+for name in args:
+    if name not in suiteNames:
+        parser.error("Unknown suite: %s. The suites are %s." % (name, ", ".join(suiteNames)))
+if not args:
+    args = suiteNames
+
+suites = []
+for name, script in suiteScripts:
+    if name not in args:
+        continue
+    arguments = []
+    if name == "format" and options.jobs is not None:
+        arguments = ["-j", str(options.jobs)]
+    for pattern in options.cases or []:
+        arguments += ["-c", pattern]
+    suites.append((name, script, arguments))
+
+if options.concurrent:
+    processes = []
+    for name, script, arguments in suites:
+        process = multiprocessing.Process(target=runSuite, args=(script, arguments), name=name)
+        process.start()
+        processes.append(process)
+    failed = []
+    for process in processes:
+        process.join()
+        if process.exitcode:
+            failed.append(process.name)
+    if failed:
+        print "Failed suites:", ", ".join(failed)
+        sys.exit(1)
+else:
+    for name, script, arguments in suites:
+        runSuite(script, arguments)
@@ -12,23 +12,43 @@ That directory will have the structure:
                 index.css - index CSS file
 
 Within this script, each test case is generated with a call to the
-writeTest function. In this, SFNT data must be passed along with
-details about the data. This function will generate the SFNT
-and register the case in the suite index.
+writeTest function. In this, a function that builds the SFNT data
+must be passed along with details about the data. This function will
+generate the SFNT and register the case in the suite index.
+
+A build manifest stored in the "cache" directory next to this script records the
+hashes of the SFNT files and of the inputs that produced them. Cases
+with unchanged inputs are not built again, files are only written
+when their contents change and the zip is only compiled when an SFNT
+was written or the set of cases changed. The zip is reproducible: the
+members are sorted and have a fixed timestamp.
+
+The -c option limits the build to the cases with identifiers that
+match a pattern, such as "tabledata-*". All cases are still registered
+so the index, the manifest and the zip list the complete suite.
 """
 
 import os
-import shutil
 import glob
+import optparse
 import struct
-import zipfile
 import sstruct
-from fontTools.ttLib.sfnt import sfntDirectorySize, sfntDirectoryEntrySize
 from testCaseGeneratorLib.defaultData import defaultSFNTTestData
 from testCaseGeneratorLib.sfnt import packSFNT
 from testCaseGeneratorLib.paths import resourcesDirectory, authoringToolDirectory, authoringToolTestDirectory, authoringToolResourcesDirectory
 from testCaseGeneratorLib.html import generateAuthoringToolIndexHTML
-from testCaseGeneratorLib.utilities import padData, calcPaddingLength, calcTableChecksum
+from testCaseGeneratorLib.zipArchive import writeZip
+from testCaseGeneratorLib.buildManifest import BuildManifest, writeFile, copyFile, addCaseSelectionOption, isCaseSelected
+from testCaseGeneratorLib.timing import setCurrentCase
+from testCaseGeneratorLib.utilities import padData, calcPaddingLength, calcTableChecksum, sfntDirectorySize, sfntDirectoryEntrySize
+
+# ---------------------
+# Command Line Behavior
+# ---------------------
+
+parser = optparse.OptionParser(usage="%prog [options]")
+addCaseSelectionOption(parser)
+(options, args) = parser.parse_args()
 
 # ------------------------
 # Specification URL
@@ -55,9 +75,7 @@ if not os.path.exists(authoringToolResourcesDirectory):
 
 # index css
 destPath = os.path.join(authoringToolResourcesDirectory, "index.css")
-if os.path.exists(destPath):
-    os.remove(destPath)
-shutil.copy(os.path.join(resourcesDirectory, "index.css"), destPath)
+copyFile(os.path.join(resourcesDirectory, "index.css"), destPath)
 
 # ---------------
 # Test Case Index
@@ -121,6 +139,9 @@ for group in groupDefinitions:
 registeredIdentifiers = set()
 registeredTitles = set()
 registeredDescriptions = set()
+registeredPaths = []
+
+buildManifest = BuildManifest(authoringToolDirectory)
 
 def writeTest(identifier, title, description, data, specLink=None, credits=[], shouldConvert=False, flavor="CFF"):
     """
@@ -137,7 +158,7 @@ def writeTest(identifier, title, description, data, specLink=None, credits=[], s
 
     description: A detailed statement about what the test case is proving.
 
-    data: The complete binary data for the SFNT.
+    data: A function that returns the complete binary data for the SFNT.
 
     specLink: The anchor in the WOFF spec that the test case is testing.
 
@@ -154,6 +175,7 @@ def writeTest(identifier, title, description, data, specLink=None, credits=[], s
     flavor: The flavor of the WOFF data. The options are CFF or TTF.
     """
     print "Compiling %s..." % identifier
+    setCurrentCase(identifier)
     assert identifier not in registeredIdentifiers, "Duplicate identifier! %s" % identifier
     assert title not in registeredTitles, "Duplicate title! %s" % title
     assert description not in registeredDescriptions, "Duplicate description! %s" % description
@@ -172,9 +194,11 @@ def writeTest(identifier, title, description, data, specLink=None, credits=[], s
         sfntPath += ".otf"
     else:
         sfntPath += ".ttf"
-    f = open(sfntPath, "wb")
-    f.write(data)
-    f.close()
+    registeredPaths.append(sfntPath)
+    if isCaseSelected(identifier, options.cases):
+        buildManifest.buildFile(sfntPath, data)
+    else:
+        buildManifest.keepFile(sfntPath)
 
     # register the test
     tag = identifier.split("-")[0]
@@ -206,7 +230,7 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-checksumvalidate",
-    data=makeValidSFNT1()
+    data=makeValidSFNT1
 )
 
 # TTF
@@ -223,7 +247,7 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-checksumvalidate",
-    data=makeValidSFNT2(),
+    data=makeValidSFNT2,
     flavor="TTF"
 )
 
@@ -248,7 +272,7 @@ writeTest(
     description="The checksum for the OS/2 table is set to 0.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-checksumvalidate",
-    data=makeInvalidChecksum1()
+    data=makeInvalidChecksum1
 )
 
 # invalid checksum adjustment in head table
@@ -276,7 +300,7 @@ writeTest(
     description="The head table checksum adjustment is set to 0.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-checksumvalidate",
-    data=makeInvalidChecksum2()
+    data=makeInvalidChecksum2
 )
 
 # padding that does not result in a four byte boundary
@@ -309,7 +333,7 @@ writeTest(
     description="There is no padding between two tables. The head check sum adjustment is also incorrect as a result.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidPadding1()
+    data=makeInvalidPadding1
 )
 
 # final table is not padded
@@ -346,7 +370,7 @@ writeTest(
     description="There is no padding after the final table.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidPadding2()
+    data=makeInvalidPadding2
 )
 
 # padding that exceeds three bytes
@@ -376,7 +400,7 @@ writeTest(
     description="There are four extra bytes after the head table. The head check sum adjustment is also incorrect as a result.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidPadding3()
+    data=makeInvalidPadding3
 )
 
 # unnecessary padding after final table
@@ -403,7 +427,7 @@ writeTest(
     description="There are four extra bytes after the final table. The head check sum adjustment is also incorrect as a result.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidPadding4()
+    data=makeInvalidPadding4
 )
 
 # padding that is not null
@@ -427,7 +451,7 @@ writeTest(
     description="There is padding after the head table that is not null.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidPadding5()
+    data=makeInvalidPadding5
 )
 
 # two table data blocks overlap
@@ -451,7 +475,7 @@ writeTest(
     description="Two table blocks overlap.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidBlocks1()
+    data=makeInvalidBlocks1
 )
 
 # offset to table is before start of the data block
@@ -471,7 +495,7 @@ writeTest(
     description="The first table has an offset that is before the end of the table directory.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidBlocks2()
+    data=makeInvalidBlocks2
 )
 
 # offset + length of table goes beyond the end of the file
@@ -492,7 +516,7 @@ writeTest(
     description="The final table has an offset + length that is four bytes past the end of the file.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidBlocks3()
+    data=makeInvalidBlocks3
 )
 
 # table directory not in ascending order
@@ -512,7 +536,7 @@ writeTest(
     description="The table directory is in descending order.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidDirectoryOrder1()
+    data=makeInvalidDirectoryOrder1
 )
 
 # incorrect searchRange
@@ -529,7 +553,7 @@ writeTest(
     description="The searchRange is set to 0.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidSearchRange1()
+    data=makeInvalidSearchRange1
 )
 
 # incorrect entrySelector
@@ -546,7 +570,7 @@ writeTest(
     description="The entrySelector is set to 0.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidEntrySelector1()
+    data=makeInvalidEntrySelector1
 )
 
 # incorrect rangeShift
@@ -563,7 +587,7 @@ writeTest(
     description="The rangeShift is set to 0.",
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-incorrect-reject",
-    data=makeInvalidRangeShift1()
+    data=makeInvalidRangeShift1
 )
 
 # -----------
@@ -605,7 +629,7 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-compressedlarger",
-    data=makeMustNotCompress1()
+    data=makeMustNotCompress1
 )
 
 # ----------------------------
@@ -700,7 +724,7 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-ascending",
-    data=makeTableDirectoryAscending1()
+    data=makeTableDirectoryAscending1
 )
 
 
@@ -717,7 +741,7 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-identical",
-    data=makeValidSFNT1()
+    data=makeValidSFNT1
 )
 
 # valid TTF
@@ -729,7 +753,7 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-identical",
-    data=makeValidSFNT2(),
+    data=makeValidSFNT2,
     flavor="TTF"
 )
 
@@ -770,7 +794,7 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-identical",
-    data=makeBitwiseIdenticalDSIG1()
+    data=makeBitwiseIdenticalDSIG1
 )
 
 # add non-standard table
@@ -810,7 +834,7 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-identical",
-    data=makeBitwiseIdenticalNonStandardTable1()
+    data=makeBitwiseIdenticalNonStandardTable1
 )
 
 # unusual order in CFF
@@ -845,7 +869,7 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-identical",
-    data=makeBitwiseIdenticalNotRecommendedTableOrder1()
+    data=makeBitwiseIdenticalNotRecommendedTableOrder1
 )
 
 # unusual order in TTF
@@ -880,10 +904,13 @@ writeTest(
     shouldConvert=True,
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     specLink="#conform-identical",
-    data=makeBitwiseIdenticalNotRecommendedTableOrder2(),
+    data=makeBitwiseIdenticalNotRecommendedTableOrder2,
     flavor="TTF"
 )
 
+setCurrentCase(None)
+buildManifest.save()
+
 # ------------------
 # Generate the Index
 # ------------------
@@ -902,21 +929,31 @@ generateAuthoringToolIndexHTML(directory=authoringToolTestDirectory, testCases=t
 # Generate the zip
 # ----------------
 
-print "Compiling zip file..."
-
 zipPath = os.path.join(authoringToolTestDirectory, "AuthoringToolTestFonts.zip")
-if os.path.exists(zipPath):
-    os.remove(zipPath)
-
-allBinariesZip = zipfile.ZipFile(zipPath, "w")
 
-pattern = os.path.join(authoringToolTestDirectory, "*.*tf")
-for path in glob.glob(pattern):
-    ext = os.path.splitext(path)[1]
-    assert ext in (".otf", ".ttf")
-    allBinariesZip.write(path, os.path.basename(path))
-
-allBinariesZip.close()
+# in a build limited with -c the set of files in the manifest can
+# change without any file changing, for example when there was no
+# manifest, so the zip is only compiled again when a file was written.
+if options.cases:
+    compileZip = buildManifest.written
+else:
+    compileZip = buildManifest.changed
+if compileZip or not os.path.exists(zipPath):
+    print "Compiling zip file..."
+
+    # the members are the files of all registered cases so that
+    # a build limited with -c still compiles the complete zip.
+    # the files that were not built in this run are read from disk.
+    members = []
+    missing = 0
+    for path in registeredPaths:
+        if not os.path.exists(path):
+            missing += 1
+            continue
+        members.append((os.path.basename(path), buildManifest.getOutputData(path)))
+    if missing:
+        print "%d test cases have not been built and are not in the zip." % missing
+    writeZip(zipPath, members)
 
 # ---------------------
 # Generate the Manifest
@@ -949,11 +986,7 @@ for tag, title, url, note in groupDefinitions:
         manifest.append(line)
 
 path = os.path.join(authoringToolDirectory, "manifest.txt")
-if os.path.exists(path):
-    os.remove(path)
-f = open(path, "wb")
-f.write("\n".join(manifest))
-f.close()
+writeFile(path, "\n".join(manifest))
 
 # -----------------------
 # Check for Unknown Files
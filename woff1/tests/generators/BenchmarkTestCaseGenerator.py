@@ -0,0 +1,174 @@
+"""
+This script generates the test suites in one process, like
+AllTestCaseGenerator.py, and records where the time is spent.
+The time is broken down into these categories:
+
+    extraction  - extracting the table data from the SFNT
+                  source fonts or loading it from the cache
+    copying     - copying the default data for each case
+    compression - zlib compression of tables, metadata and zips
+    checksum    - calculating the head checkSumAdjustment
+    html        - rendering the test pages and indexes
+    write       - comparing and writing files on disk
+
+for each suite and for each case. Time that does not fall in one
+of these categories is the difference between the total and the
+sum of the categories. The loading of the default data before the
+first suite is recorded in a suite named "setup".
+
+The results are written as JSON to benchmark.json next to this
+script unless another path is given with -o. That file is under
+version control, so changes to the generation speed show up in
+review. The totals are also printed. If a previous result is given
+with --compare, the totals of the suites and the categories are
+compared with it.
+
+By default the cases of the benchmarked suites are removed from the
+build manifests in the "cache" directory before the suites are
+generated so that every case is built. When the cases are limited
+with -c, only the entries of the selected cases are removed. Use
+--incremental to keep the manifests. The format suite is always
+generated with -j 1 so that the cases are built in this process.
+"""
+
+import os
+import sys
+import json
+import optparse
+import platform
+from timeit import default_timer
+from testCaseGeneratorLib.timing import timingCategories, enableTiming, disableTiming, setCurrentSuite, getTimings
+# the timing has to be enabled before the
+# default data is loaded so that the
+# extraction is recorded
+enableTiming()
+startTime = default_timer()
+from testCaseGeneratorLib import defaultData
+from testCaseGeneratorLib import sharedCases
+from testCaseGeneratorLib.buildManifest import addCaseSelectionOption, forgetCases
+from testCaseGeneratorLib.suiteRunner import suiteScripts, runSuite
+from testCaseGeneratorLib.paths import generatorsDirectory, formatDirectory, userAgentDirectory, authoringToolDirectory
+
+suiteDirectories = dict(
+    format=formatDirectory,
+    useragent=userAgentDirectory,
+    authoringtool=authoringToolDirectory
+)
+
+# -------
+# Reports
+# -------
+
+def formatTime(time):
+    return "%.3f" % time
+
+def printTimings(timings, suiteNames, previousTimings=None):
+    """
+    Print the totals and the categories of
+    *suiteNames*, compared with *previousTimings*
+    when they are given.
+    """
+    for suite in suiteNames:
+        if suite not in timings:
+            continue
+        suiteTimings = timings[suite]
+        previous = None
+        if previousTimings is not None:
+            previous = previousTimings.get(suite)
+        print
+        print "%s (%d cases)" % (suite, len(suiteTimings["cases"]))
+        previousTotal = None
+        if previous is not None:
+            previousTotal = previous["total"]
+        rows = [("total", suiteTimings["total"], previousTotal)]
+        for category in timingCategories:
+            time = suiteTimings["categories"].get(category, 0.0)
+            previousTime = None
+            if previous is not None:
+                previousTime = previous["categories"].get(category, 0.0)
+            rows.append((category, time, previousTime))
+        other = suiteTimings["total"] - sum(suiteTimings["categories"].values())
+        previousOther = None
+        if previous is not None:
+            previousOther = previous["total"] - sum(previous["categories"].values())
+        rows.append(("other", other, previousOther))
+        for name, time, previousTime in rows:
+            line = "  %-12s %10s" % (name, formatTime(time))
+            if previousTime is not None:
+                line += " %10s" % formatTime(previousTime)
+                if previousTime:
+                    line += " %+7.1f%%" % ((time - previousTime) / previousTime * 100)
+            print line
+
+# ---------------------
+# Command Line Behavior
+# ---------------------
+
+parser = optparse.OptionParser(usage="%prog [options] [suite1 suite2]")
+parser.add_option("-o", dest="outputPath", default=os.path.join(generatorsDirectory, "benchmark.json"), metavar="PATH", help="Path for the JSON results. The default is benchmark.json next to this script.")
+parser.add_option("--compare", dest="comparePath", metavar="PATH", help="JSON results of a previous run to compare with.")
+parser.add_option("--incremental", dest="incremental", action="store_true", help="Keep the build manifests so that only outdated cases are built. By default the benchmarked cases are removed from them.")
+addCaseSelectionOption(parser)
+parser.set_defaults(incremental=False)
+(options, args) = parser.parse_args()
+
+suiteNames = [name for name, script in suiteScripts]
+for name in args:
+    if name not in suiteNames:
+        parser.error("Unknown suite: %s. The suites are %s." % (name, ", ".join(suiteNames)))
+if not args:
+    args = suiteNames
+
+previousTimings = None
+if options.comparePath:
+    f = open(options.comparePath, "rb")
+    previousTimings = json.load(f)["suites"]
+    f.close()
+
+# -------------------
+# Generate the Suites
+# -------------------
+
+suites = []
+for name, script in suiteScripts:
+    if name not in args:
+        continue
+    arguments = []
+    if name == "format":
+        arguments = ["-j", "1"]
+    for pattern in options.cases or []:
+        arguments += ["-c", pattern]
+    suites.append((name, script, arguments))
+    if not options.incremental:
+        forgetCases(suiteDirectories[name], options.cases)
+
+for name, script, arguments in suites:
+    setCurrentSuite(name)
+    runSuite(script, arguments)
+disableTiming()
+totalTime = default_timer() - startTime
+
+# -----------------
+# Write the Results
+# -----------------
+
+timings = getTimings()
+outputDirectory = os.path.dirname(os.path.abspath(options.outputPath))
+if not os.path.exists(outputDirectory):
+    os.makedirs(outputDirectory)
+results = dict(
+    python=platform.python_version(),
+    platform=platform.platform(),
+    arguments=sys.argv[1:],
+    total=totalTime,
+    categories=timingCategories,
+    suites=timings
+)
+f = open(options.outputPath, "wb")
+json.dump(results, f, indent=1, sort_keys=True)
+f.close()
+
+printTimings(timings, ["setup"] + [name for name, script, arguments in suites], previousTimings)
+print
+print "total", formatTime(totalTime)
+print "Results written to %s" % options.outputPath
@@ -13,24 +13,59 @@ That directory will have the structure:
 
 Within this script, each test case is generated with a call to the
 writeTest function or the writeMetadataTest function. In these,
-WOFF data must be passed along with details about the data.
-This function will generate the WOFF and register the case in
-the suite index.
+a function that builds the WOFF data must be passed along with
+details about the data. This function will register the case in
+the suite index. The WOFF data for all cases is built in a pool of
+processes after all cases have been registered and the files are
+written in the order in which the cases were registered.
+
+A build manifest stored in the "cache" directory next to this script records the
+hashes of the WOFF files and of the inputs that produced them.
+Cases with unchanged inputs are not built again, files are only
+written when their contents change and the zip is only compiled
+when a WOFF was written or the set of cases changed. The zip is
+reproducible: the members are sorted and have a fixed timestamp.
+
+The number of processes can be set with the -j option. By default
+one process per CPU is used. -j 1 builds the cases serially.
+
+The -c option limits the build to the cases with identifiers that
+match a pattern, such as "metadata-schema-*". All cases are still
+registered so the index, the manifest and the zip list the complete
+suite.
+
+The WOFF files in resources/regressions are added to the suite as
+validator regression cases. They are written by the minimizer in
+the validator tools.
 """
 
 import os
-import shutil
 import glob
+import json
 import struct
-import zipfile
+import optparse
+import multiprocessing
 import sstruct
-from testCaseGeneratorLib.woff import packTestHeader, packTestDirectory, packTestTableData, packTestMetadata, packTestPrivateData
+from testCaseGeneratorLib.woff import packTestHeader, packTestDirectory, packTestTableData, packTestMetadata, packTestPrivateData, packTestWOFF
 from testCaseGeneratorLib.defaultData import defaultTestData, testDataWOFFMetadata, testDataWOFFPrivateData
-from testCaseGeneratorLib.paths import resourcesDirectory, formatDirectory, formatTestDirectory, formatResourcesDirectory
+from testCaseGeneratorLib.paths import resourcesDirectory, regressionsDirectory, formatDirectory, formatTestDirectory, formatResourcesDirectory
 from testCaseGeneratorLib.html import generateFormatIndexHTML
+from testCaseGeneratorLib.zipArchive import writeZip
+from testCaseGeneratorLib.timing import setCurrentCase
+from testCaseGeneratorLib.buildManifest import BuildManifest, getInputsHash, getFileHash, writeFile, copyFile,\
+    isSharedBuilder, getSharedData, storeSharedData, addCaseSelectionOption, isCaseSelected
 from testCaseGeneratorLib import sharedCases
 from testCaseGeneratorLib.sharedCases import *
 
+# ---------------------
+# Command Line Behavior
+# ---------------------
+
+parser = optparse.OptionParser(usage="%prog [options]")
+parser.add_option("-j", dest="jobs", type="int", help="Number of processes used to build the test cases. The default is one per CPU.")
+addCaseSelectionOption(parser)
+(options, args) = parser.parse_args()
+
 # ------------------------
 # Specification URL
 # This is used frequently.
@@ -56,9 +91,7 @@ if not os.path.exists(formatResourcesDirectory):
 
 # index css
 destPath = os.path.join(formatResourcesDirectory, "index.css")
-if os.path.exists(destPath):
-    os.remove(destPath)
-shutil.copy(os.path.join(resourcesDirectory, "index.css"), destPath)
+copyFile(os.path.join(resourcesDirectory, "index.css"), destPath)
 
 # ---------------
 # Test Case Index
@@ -76,7 +109,8 @@ groupDefinitions = [
     ("directory", "WOFF Table Directory Tests", specificationURL+"#TableDirectory"),
     ("tabledata", "WOFF Table Data Tests", specificationURL+"#DataTables"),
     ("metadata", "WOFF Metadata Tests", specificationURL+"#Metadata"),
-    ("privatedata", "WOFF Private Data Tests", specificationURL+"#Private")
+    ("privatedata", "WOFF Private Data Tests", specificationURL+"#Private"),
+    ("regression", "Validator Regression Tests", None)
 ]
 
 testRegistry = {}
@@ -92,6 +126,12 @@ registeredIdentifiers = set()
 registeredTitles = set()
 registeredDescriptions = set()
 
+# The data builders for the registered cases are
+# stored as (identifier, function, arguments) and
+# are run after all of the cases have been registered.
+
+pendingTests = []
+
 def writeTest(identifier, title, description, data, specLink=None, credits=[], valid=False):
     """
     This function generates all of the files needed by a test case and
@@ -107,7 +147,9 @@ def writeTest(identifier, title, description, data, specLink=None, credits=[], v
 
     description: A detailed statement about what the test case is proving.
 
-    data: The complete binary data for the WOFF.
+    data: A function that returns the complete binary data for the WOFF.
+    This must be defined at the top level of a module so that it can be
+    sent to the processes that build the data.
 
     specLink: The anchor in the WOFF spec that the test case is testing.
 
@@ -121,7 +163,7 @@ def writeTest(identifier, title, description, data, specLink=None, credits=[], v
     valid: A boolean indicating if the WOFF is valid.
     """
 
-    print "Compiling %s..." % identifier
+    print "Registering %s..." % identifier
     assert identifier not in registeredIdentifiers, "Duplicate identifier! %s" % identifier
     assert title not in registeredTitles, "Duplicate title! %s" % title
     assert description not in registeredDescriptions, "Duplicate description! %s" % description
@@ -134,11 +176,12 @@ def writeTest(identifier, title, description, data, specLink=None, credits=[], v
     else:
         specLink = specificationURL + specLink
 
-    # generate the WOFF
-    woffPath = os.path.join(formatTestDirectory, identifier) + ".woff"
-    f = open(woffPath, "wb")
-    f.write(data)
-    f.close()
+    # queue the WOFF
+    if isinstance(data, tuple):
+        function, arguments = data
+    else:
+        function, arguments = data, ()
+    pendingTests.append((identifier, function, arguments))
 
     # register the test
     tag = identifier.split("-")[0]
@@ -176,8 +219,8 @@ def writeMetadataTest(identifier, title=None, description=None, credits=[], spec
         metadata = getattr(sharedCases, importBase + "Metadata")
     assert metadata is not None
     assert valid is not None
-    # compile the WOFF
-    data, metadata = makeMetadataTest(metadata)
+    # the WOFF is compiled later
+    data = (makeMetadataTestData, (metadata,))
     # pass to the more verbose function
     if specLink is None:
         specLink = "#Metadata"
@@ -194,6 +237,81 @@ def writeMetadataTest(identifier, title=None, description=None, credits=[], spec
         **kwargs
     )
 
+def buildTest(test):
+    """
+    Build the WOFF data for a queued test case. This
+    returns the identifier and the data.
+    """
+    identifier, function, arguments = test
+    return identifier, function(*arguments)
+
+def getTestFilePath(identifier):
+    return os.path.join(formatTestDirectory, identifier) + ".woff"
+
+def writeTestFiles(tests, manifest, jobs=None, patterns=None):
+    """
+    Build the WOFF data for the queued test cases and write
+    the files. The data is built in a pool of *jobs* processes
+    unless *jobs* is 1. The results are collected in the order
+    of *tests* so the written files do not depend on the number
+    of processes. Cases that are current in *manifest* or that
+    do not match *patterns* are skipped.
+    """
+    inputsHashes = {}
+    outdatedTests = []
+    for test in tests:
+        identifier, function, arguments = test
+        woffPath = getTestFilePath(identifier)
+        if not isCaseSelected(identifier, patterns):
+            manifest.keepFile(woffPath)
+            continue
+        inputsHash = getInputsHash(function, arguments)
+        if manifest.isCurrent(woffPath, inputsHash):
+            continue
+        inputsHashes[identifier] = inputsHash
+        outdatedTests.append(test)
+    print "Building %d of %d test cases..." % (len(outdatedTests), len(tests))
+    tests = outdatedTests
+    if not tests:
+        return
+    # shared cases that have already been built by another
+    # suite in this process are not built again and shared
+    # cases that are used more than once are built once.
+    sharedKeys = set()
+    buildTests = []
+    for test in tests:
+        identifier, function, arguments = test
+        if isSharedBuilder(function):
+            if (function, arguments) in sharedKeys or getSharedData(function, arguments) is not None:
+                continue
+            sharedKeys.add((function, arguments))
+        buildTests.append(test)
+    if jobs == 1:
+        pool = None
+        results = (buildTest(test) for test in buildTests)
+    else:
+        # the pool is created after all of the builders
+        # have been defined so that the processes can
+        # find them in this module.
+        pool = multiprocessing.Pool(jobs)
+        results = pool.imap(buildTest, buildTests, chunksize=4)
+    try:
+        for identifier, function, arguments in tests:
+            setCurrentCase(identifier)
+            data = getSharedData(function, arguments)
+            if data is None:
+                builtIdentifier, data = next(results)
+                assert builtIdentifier == identifier
+                storeSharedData(function, arguments, data)
+            print "Compiling %s..." % identifier
+            woffPath = getTestFilePath(identifier)
+            manifest.writeFile(woffPath, data, inputsHashes[identifier])
+    finally:
+        setCurrentCase(None)
+        if pool is not None:
+            pool.close()
+            pool.join()
+
 # -----------
 # Valid Files
 # -----------
@@ -206,7 +324,7 @@ writeTest(
     description=makeValidWOFF1Description,
     credits=makeValidWOFF1Credits,
     valid=True,
-    data=makeValidWOFF1()
+    data=makeValidWOFF1
 )
 
 writeTest(
@@ -215,7 +333,7 @@ writeTest(
     description=makeValidWOFF2Description,
     credits=makeValidWOFF2Credits,
     valid=True,
-    data=makeValidWOFF2(),
+    data=makeValidWOFF2,
 )
 
 writeTest(
@@ -224,7 +342,7 @@ writeTest(
     description=makeValidWOFF3Description,
     credits=makeValidWOFF3Credits,
     valid=True,
-    data=makeValidWOFF3()
+    data=makeValidWOFF3
 )
 
 writeTest(
@@ -233,7 +351,7 @@ writeTest(
     description=makeValidWOFF4Description,
     credits=makeValidWOFF4Credits,
     valid=True,
-    data=makeValidWOFF4(),
+    data=makeValidWOFF4,
 )
 
 # TTF
@@ -244,7 +362,7 @@ writeTest(
     description=makeValidWOFF5Description,
     credits=makeValidWOFF5Credits,
     valid=True,
-    data=makeValidWOFF5()
+    data=makeValidWOFF5
 )
 
 writeTest(
@@ -253,7 +371,7 @@ writeTest(
     description=makeValidWOFF6Description,
     credits=makeValidWOFF6Credits,
     valid=True,
-    data=makeValidWOFF6(),
+    data=makeValidWOFF6,
 )
 
 writeTest(
@@ -262,7 +380,7 @@ writeTest(
     description=makeValidWOFF7Description,
     credits=makeValidWOFF7Credits,
     valid=True,
-    data=makeValidWOFF7()
+    data=makeValidWOFF7
 )
 
 writeTest(
@@ -271,7 +389,7 @@ writeTest(
     description=makeValidWOFF8Description,
     credits=makeValidWOFF8Credits,
     valid=True,
-    data=makeValidWOFF8(),
+    data=makeValidWOFF8,
 )
 
 # ---------------------------------
@@ -285,7 +403,7 @@ writeTest(
     credits=makeHeaderInvalidSignature1Credits,
     valid=False,
     specLink="#conform-magicnumber",
-    data=makeHeaderInvalidSignature1()
+    data=makeHeaderInvalidSignature1
 )
 
 # ------------------------------
@@ -297,7 +415,7 @@ writeTest(
 def makeHeaderInvalidFlavor1():
     header, directory, tableData = defaultTestData()
     header["flavor"] = "\000\001\000\000"
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeTest(
@@ -307,7 +425,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#WOFFHeader",
-    data=makeHeaderInvalidFlavor1()
+    data=makeHeaderInvalidFlavor1
 )
 
 # CFF flavor but TTF data
@@ -315,7 +433,7 @@ writeTest(
 def makeHeaderInvalidFlavor2():
     header, directory, tableData = defaultTestData(flavor="ttf")
     header["flavor"] = "OTTO"
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeTest(
@@ -325,7 +443,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#WOFFHeader",
-    data=makeHeaderInvalidFlavor2()
+    data=makeHeaderInvalidFlavor2
 )
 
 # ------------------------------
@@ -339,7 +457,7 @@ writeTest(
     credits=makeHeaderInvalidLength1Credits,
     valid=False,
     specLink="#WOFFHeader",
-    data=makeHeaderInvalidLength1()
+    data=makeHeaderInvalidLength1
 )
 
 writeTest(
@@ -349,7 +467,7 @@ writeTest(
     credits=makeHeaderInvalidLength2Credits,
     valid=False,
     specLink="#WOFFHeader",
-    data=makeHeaderInvalidLength2()
+    data=makeHeaderInvalidLength2
 )
 
 # ---------------------------------
@@ -363,7 +481,7 @@ writeTest(
     credits=makeHeaderInvalidNumTables1Credits,
     valid=False,
     specLink="#WOFFHeader",
-    data=makeHeaderInvalidNumTables1()
+    data=makeHeaderInvalidNumTables1
 )
 
 # -------------------------------------
@@ -377,7 +495,7 @@ writeTest(
     credits=makeHeaderInvalidTotalSfntSize1Credits,
     valid=False,
     specLink="#conform-totalsize-longword",
-    data=makeHeaderInvalidTotalSfntSize1()
+    data=makeHeaderInvalidTotalSfntSize1
 )
 
 writeTest(
@@ -387,7 +505,7 @@ writeTest(
     credits=makeHeaderInvalidTotalSfntSize2Credits,
     valid=False,
     specLink="#conform-totalsize-longword",
-    data=makeHeaderInvalidTotalSfntSize2()
+    data=makeHeaderInvalidTotalSfntSize2
 )
 
 writeTest(
@@ -397,7 +515,7 @@ writeTest(
     credits=makeHeaderInvalidTotalSfntSize3Credits,
     valid=False,
     specLink="#conform-totalsize-longword",
-    data=makeHeaderInvalidTotalSfntSize3()
+    data=makeHeaderInvalidTotalSfntSize3
 )
 
 # --------------------------------
@@ -411,7 +529,7 @@ writeTest(
     credits=makeHeaderInvalidReserved1Credits,
     valid=False,
     specLink="#conform-reserved",
-    data=makeHeaderInvalidReserved1()
+    data=makeHeaderInvalidReserved1
 )
 
 # --------------------------------------------
@@ -427,7 +545,7 @@ writeTest(
     credits=makeExtraneousData1Credits,
     valid=False,
     specLink="#conform-noextraneous",
-    data=makeExtraneousData1()
+    data=makeExtraneousData1
 )
 
 # after table data with no metadata or private data
@@ -439,7 +557,7 @@ writeTest(
     credits=makeExtraneousData2Credits,
     valid=False,
     specLink="#conform-noextraneous",
-    data=makeExtraneousData2()
+    data=makeExtraneousData2
 )
 
 # between tabledata and metadata
@@ -451,7 +569,7 @@ writeTest(
     credits=makeExtraneousData3Credits,
     valid=False,
     specLink="#conform-noextraneous",
-    data=makeExtraneousData3()
+    data=makeExtraneousData3
 )
 
 # between tabledata and private data
@@ -463,7 +581,7 @@ writeTest(
     credits=makeExtraneousData4Credits,
     valid=False,
     specLink="#conform-noextraneous",
-    data=makeExtraneousData4()
+    data=makeExtraneousData4
 )
 
 # between metadata and private data
@@ -475,7 +593,7 @@ writeTest(
     credits=makeExtraneousData5Credits,
     valid=False,
     specLink="#conform-noextraneous",
-    data=makeExtraneousData5()
+    data=makeExtraneousData5
 )
 
 # after metadata with no private data
@@ -487,7 +605,7 @@ writeTest(
     credits=makeExtraneousData6Credits,
     valid=False,
     specLink="#conform-noextraneous",
-    data=makeExtraneousData6()
+    data=makeExtraneousData6
 )
 
 # after private data
@@ -499,7 +617,7 @@ writeTest(
     credits=makeExtraneousData7Credits,
     valid=False,
     specLink="#conform-noextraneous",
-    data=makeExtraneousData7()
+    data=makeExtraneousData7
 )
 
 # -------------------------------------
@@ -515,7 +633,7 @@ writeTest(
     credits=makeOverlappingData1Credits,
     valid=False,
     specLink="#conform-overlap-reject",
-    data=makeOverlappingData1()
+    data=makeOverlappingData1
 )
 
 # private data overlaps the table data
@@ -527,7 +645,7 @@ writeTest(
     credits=makeOverlappingData2Credits,
     valid=False,
     specLink="#conform-overlap-reject",
-    data=makeOverlappingData2()
+    data=makeOverlappingData2
 )
 
 # private data overlaps the metadata
@@ -539,7 +657,7 @@ writeTest(
     credits=makeOverlappingData3Credits,
     valid=False,
     specLink="#conform-overlap-reject",
-    data=makeOverlappingData3()
+    data=makeOverlappingData3
 )
 
 # -------------------------------------------------
@@ -552,7 +670,7 @@ def makeMetadataZeroData1():
     header, directory, tableData = defaultTestData()
     header["metaOffset"] = 0
     header["metaLength"] = 1
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeTest(
@@ -562,7 +680,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-zerometaprivate",
-    data=makeMetadataZeroData1()
+    data=makeMetadataZeroData1
 )
 
 # metadata length = zero but the offset > zero
@@ -571,7 +689,7 @@ def makeMetadataZeroData2():
     header, directory, tableData = defaultTestData()
     header["metaLength"] = 0
     header["metaOffset"] = header["length"]
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeTest(
@@ -581,7 +699,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-zerometaprivate",
-    data=makeMetadataZeroData2()
+    data=makeMetadataZeroData2
 )
 
 # -----------------------------------------------------
@@ -594,7 +712,7 @@ def makePrivateDataZeroData1():
     header, directory, tableData = defaultTestData()
     header["privOffset"] = 0
     header["privLength"] = 1
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeTest(
@@ -604,7 +722,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-zerometaprivate",
-    data=makePrivateDataZeroData1()
+    data=makePrivateDataZeroData1
 )
 
 # private data length = 0 but the offset > 0
@@ -613,7 +731,7 @@ def makePrivateDataZeroData2():
     header, directory, tableData = defaultTestData()
     header["privLength"] = 0
     header["privOffset"] = header["length"]
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeTest(
@@ -623,7 +741,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-zerometaprivate",
-    data=makePrivateDataZeroData2()
+    data=makePrivateDataZeroData2
 )
 
 # ---------------------------------------------
@@ -649,7 +767,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-metadata-noprivatepad",
-    data=makeMetadataPadding()
+    data=makeMetadataPadding
 )
 
 # -------------------------------------
@@ -686,7 +804,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-afterdirectory",
-    data=makeDataBlockOrdering1()
+    data=makeDataBlockOrdering1
 )
 
 # font data after private
@@ -715,7 +833,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-afterdirectory",
-    data=makeDataBlockOrdering2()
+    data=makeDataBlockOrdering2
 )
 
 # metadata after private
@@ -741,7 +859,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#metadata-afterfonttable",
-    data=makeDataBlockOrdering3()
+    data=makeDataBlockOrdering3
 )
 
 writeTest(
@@ -751,7 +869,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#private-last",
-    data=makeDataBlockOrdering3()
+    data=makeDataBlockOrdering3
 )
 
 # -----------------------------------------
@@ -766,7 +884,7 @@ def makeDataBlockPrivateData1():
     assert paddingLength > 0
     header["length"] -= paddingLength
     header["privOffset"] -= paddingLength
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata)
     data += packTestPrivateData(privateData)
     return data
 
@@ -777,7 +895,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-private-padalign",
-    data=makeDataBlockPrivateData1()
+    data=makeDataBlockPrivateData1
 )
 
 # ------------------------------------------------
@@ -791,7 +909,7 @@ writeTest(
     credits=makeTableData4Byte1Credits,
     valid=False,
     specLink="#conform-tablesize-longword",
-    data=makeTableData4Byte1()
+    data=makeTableData4Byte1
 )
 
 # final table is not padded
@@ -803,7 +921,7 @@ writeTest(
     credits=makeTableData4Byte2Credits,
     valid=False,
     specLink="#conform-tablesize-longword",
-    data=makeTableData4Byte2()
+    data=makeTableData4Byte2
 )
 
 # table is padded with something other than null bytes
@@ -818,7 +936,7 @@ def makeTableData4Byte3():
         compData += "\x01" * paddingLength
         tableData[tag] = (origData, compData)
     assert paddedAtLeastOne
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeTest(
@@ -828,7 +946,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-tablesize-longword",
-    data=makeTableData4Byte3()
+    data=makeTableData4Byte3
 )
 
 # -----------------------------------------
@@ -844,7 +962,7 @@ writeTest(
     credits=makeTableDataByteRange1Credits,
     valid=False,
     specLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange1()
+    data=makeTableDataByteRange1
 )
 
 # offset + length goes past the end of the file
@@ -856,7 +974,7 @@ writeTest(
     credits=makeTableDataByteRange2Credits,
     valid=False,
     specLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange2()
+    data=makeTableDataByteRange2
 )
 
 # overlaps metadata
@@ -868,7 +986,7 @@ writeTest(
     credits=makeTableDataByteRange3Credits,
     valid=False,
     specLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange3()
+    data=makeTableDataByteRange3
 )
 
 # overlaps private data
@@ -880,7 +998,7 @@ writeTest(
     credits=makeTableDataByteRange4Credits,
     valid=False,
     specLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange4()
+    data=makeTableDataByteRange4
 )
 
 # two tables overlap
@@ -892,7 +1010,7 @@ writeTest(
     credits=makeTableDataByteRange5Credits,
     valid=False,
     specLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange5()
+    data=makeTableDataByteRange5
 )
 
 # ------------------------------------------------
@@ -908,7 +1026,7 @@ writeTest(
     credits=makeTableDataExtraneousData1Credits,
     valid=False,
     specLink="#conform-noextraneous",
-    data=makeTableDataExtraneousData1()
+    data=makeTableDataExtraneousData1
 )
 
 # -------------------------------------------
@@ -924,7 +1042,7 @@ writeTest(
     credits=makeTableDataCompressionLength1Credits,
     valid=False,
     specLink="#conform-compressedlarger",
-    data=makeTableDataCompressionLength1()
+    data=makeTableDataCompressionLength1
 )
 
 # -------------------------------------------
@@ -940,7 +1058,7 @@ writeTest(
     credits=makeTableDataOriginalLength1Credits,
     valid=False,
     specLink="#conform-origLength",
-    data=makeTableDataOriginalLength1()
+    data=makeTableDataOriginalLength1
 )
 
 # one table has an origLength that is greater than the decompressed length
@@ -952,7 +1070,7 @@ writeTest(
     credits=makeTableDataOriginalLength2Credits,
     valid=False,
     specLink="#conform-origLength",
-    data=makeTableDataOriginalLength2()
+    data=makeTableDataOriginalLength2
 )
 
 # ---------------------------------------------
@@ -971,7 +1089,7 @@ def makeTableDirectoryCheckSum1():
         entry["origChecksum"] = 0
         modifiedTable = True
         break
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeTest(
@@ -981,7 +1099,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-checksumvalidate",
-    data=makeTableDirectoryCheckSum1()
+    data=makeTableDirectoryCheckSum1
 )
 
 # bad head checksum
@@ -1005,7 +1123,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-checksumvalidate",
-    data=makeTableDirectoryCheckSum2()
+    data=makeTableDirectoryCheckSum2
 )
 
 # ------------------------------------------------
@@ -1029,7 +1147,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-ascending",
-    data=makeTableDirectoryAscending1()
+    data=makeTableDirectoryAscending1
 )
 
 
@@ -1046,7 +1164,7 @@ writeTest(
     credits=makeTableCompressionTest1Credits,
     valid=True,
     specLink="#conform-mustuncompress",
-    data=makeTableCompressionTest1()
+    data=makeTableCompressionTest1
 )
 
 # all possible tables are compressed
@@ -1058,7 +1176,7 @@ writeTest(
     credits=makeTableCompressionTest2Credits,
     valid=True,
     specLink="#conform-mustuncompress",
-    data=makeTableCompressionTest2()
+    data=makeTableCompressionTest2
 )
 
 # not all possible tables are compressed
@@ -1070,7 +1188,7 @@ writeTest(
     credits=makeTableCompressionTest3Credits,
     valid=True,
     specLink="#conform-mustuncompress",
-    data=makeTableCompressionTest3()
+    data=makeTableCompressionTest3
 )
 
 # varying compression levels
@@ -1082,7 +1200,7 @@ writeTest(
     credits=makeTableCompressionTest4Credits,
     valid=True,
     specLink="#conform-mustuncompress",
-    data=makeTableCompressionTest4()
+    data=makeTableCompressionTest4
 )
 
 # ----------------------------------------------
@@ -1098,7 +1216,7 @@ writeTest(
     credits=makeTableZlibCompressionTest1Credits,
     valid=False,
     specLink="#conform-mustzlib",
-    data=makeTableZlibCompressionTest1()
+    data=makeTableZlibCompressionTest1
 )
 
 # -----------------
@@ -1124,7 +1242,7 @@ writeTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     valid=False,
     specLink="#conform-private-padalign",
-    data=makeMetadataPadding1()
+    data=makeMetadataPadding1
 )
 
 # -----------------------------
@@ -1137,7 +1255,7 @@ writeTest(
     description=makeMetadataCompression1Description,
     credits=makeMetadataCompression1Credits,
     valid=False,
-    data=makeMetadataCompression1(),
+    data=makeMetadataCompression1,
     specLink="#conform-metadata-alwayscompress"
 )
 
@@ -1154,7 +1272,7 @@ writeTest(
     credits=makeMetaOrigLengthTest1Credits,
     valid=False,
     specLink="#conform-metaOrigLength",
-    data=makeMetaOrigLengthTest1()
+    data=makeMetaOrigLengthTest1
 )
 
 # >
@@ -1166,7 +1284,7 @@ writeTest(
     credits=makeMetaOrigLengthTest2Credits,
     valid=False,
     specLink="#conform-metaOrigLength",
-    data=makeMetaOrigLengthTest2()
+    data=makeMetaOrigLengthTest2
 )
 
 # -----------------------------
@@ -3003,6 +3121,47 @@ writeMetadataTest(
     valid=False,
 )
 
+# ----------------
+# Regression Files
+# ----------------
+
+# The WOFF files in the regressions resources directory are
+# inputs that made the validator fail. They are written by
+# the minimizer in the validator tools with a JSON file
+# holding the title, the description and the validity.
+
+def makeRegressionTestData(fileName, fileHash):
+    # the hash is only an argument so that the
+    # case is built again when the file changes
+    path = os.path.join(regressionsDirectory, fileName)
+    f = open(path, "rb")
+    data = f.read()
+    f.close()
+    return data
+
+for path in sorted(glob.glob(os.path.join(regressionsDirectory, "*.woff"))):
+    fileName = os.path.basename(path)
+    identifier = os.path.splitext(fileName)[0]
+    f = open(os.path.splitext(path)[0] + ".json", "rb")
+    info = json.load(f)
+    f.close()
+    writeTest(
+        identifier=identifier,
+        title=info["title"].encode("utf-8"),
+        description=info["description"].encode("utf-8"),
+        specLink=info.get("specLink"),
+        valid=info.get("valid", False),
+        data=(makeRegressionTestData, (fileName, getFileHash(path)))
+    )
+
+# ---------------------
+# Generate the Binaries
+# ---------------------
+
+buildManifest = BuildManifest(formatDirectory)
+writeTestFiles(pendingTests, buildManifest, jobs=options.jobs, patterns=options.cases)
+buildManifest.save()
+
 # ------------------
 # Generate the Index
 # ------------------
@@ -3012,6 +3171,10 @@ print "Compiling index..."
 testGroups = []
 
 for tag, title, url in groupDefinitions:
+    # the regression group is empty until
+    # regression files have been stored
+    if tag == "regression" and not testRegistry[tag]:
+        continue
     group = dict(title=title, url=url, testCases=testRegistry[tag])
     testGroups.append(group)
 
@@ -3021,20 +3184,32 @@ generateFormatIndexHTML(directory=formatTestDirectory, testCases=testGroups)
 # Generate the zip
 # ----------------
 
-print "Compiling zip file..."
-
 zipPath = os.path.join(formatTestDirectory, "FormatTestFonts.zip")
-if os.path.exists(zipPath):
-    os.remove(zipPath)
-
-allBinariesZip = zipfile.ZipFile(zipPath, "w")
 
-pattern = os.path.join(formatTestDirectory, "*.woff")
-for path in glob.glob(pattern):
-    ext = os.path.splitext(path)[1]
-    allBinariesZip.write(path, os.path.basename(path))
-
-allBinariesZip.close()
+# in a build limited with -c the set of files in the manifest can
+# change without any file changing, for example when there was no
+# manifest, so the zip is only compiled again when a file was written.
+if options.cases:
+    compileZip = buildManifest.written
+else:
+    compileZip = buildManifest.changed
+if compileZip or not os.path.exists(zipPath):
+    print "Compiling zip file..."
+
+    # the members are the files of all registered cases so that
+    # a build limited with -c still compiles the complete zip.
+    # the files that were not built in this run are read from disk.
+    members = []
+    missing = 0
+    for identifier, function, arguments in pendingTests:
+        path = getTestFilePath(identifier)
+        if not os.path.exists(path):
+            missing += 1
+            continue
+        members.append((os.path.basename(path), buildManifest.getOutputData(path)))
+    if missing:
+        print "%d test cases have not been built and are not in the zip." % missing
+    writeZip(zipPath, members, jobs=options.jobs)
 
 # ---------------------
 # Generate the Manifest
@@ -3067,11 +3242,7 @@ for tag, title, url in groupDefinitions:
         manifest.append(line)
 
 path = os.path.join(formatDirectory, "manifest.txt")
-if os.path.exists(path):
-    os.remove(path)
-f = open(path, "wb")
-f.write("\n".join(manifest))
-f.close()
+writeFile(path, "\n".join(manifest))
 
 # -----------------------
 # Check for Unknown Files
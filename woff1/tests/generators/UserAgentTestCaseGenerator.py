@@ -20,21 +20,40 @@ The individual test cases follow the CSS Test Format
 
 Within this script, each test case is generated with a call to the
 writeFileStructureTest function or the writeMetadataSchemaValidityTest
-function. In these, WOFF data must be passed along with details about
-the data. This function will generate the WOFF and HTML files and
-it will register the case in the suite index.
+function. In these, a function that builds the WOFF data must be passed
+along with details about the data. This function will generate the WOFF
+and HTML files and it will register the case in the suite index.
+
+A build manifest stored in the "cache" directory next to this script records the
+hashes of the WOFF files and of the inputs that produced them.
+Cases with unchanged inputs are not built again and files are
+only written when their contents change.
+
+The -c option limits the build to the cases with identifiers that
+match a pattern, such as "metadatadisplay-*". All cases are still
+registered so the index and the manifest list the complete suite.
 """
 
 import os
-import shutil
 import glob
-from testCaseGeneratorLib.woff import packTestHeader, packTestDirectory, packTestTableData, packTestMetadata, packTestPrivateData
+import optparse
+from testCaseGeneratorLib.woff import packTestHeader, packTestDirectory, packTestTableData, packTestMetadata, packTestPrivateData, packTestWOFF
 from testCaseGeneratorLib.defaultData import defaultTestData, testDataWOFFMetadata, testDataWOFFPrivateData
 from testCaseGeneratorLib.html import generateSFNTDisplayTestHTML, generateSFNTDisplayRefHTML, generateSFNTDisplayIndexHTML
+from testCaseGeneratorLib.buildManifest import BuildManifest, writeFile, copyFile, addCaseSelectionOption, isCaseSelected
+from testCaseGeneratorLib.timing import setCurrentCase
 from testCaseGeneratorLib.paths import resourcesDirectory, userAgentDirectory, userAgentTestDirectory, userAgentTestResourcesDirectory, userAgentFontsToInstallDirectory
 from testCaseGeneratorLib import sharedCases
 from testCaseGeneratorLib.sharedCases import *
 
+# ---------------------
+# Command Line Behavior
+# ---------------------
+
+parser = optparse.OptionParser(usage="%prog [options]")
+addCaseSelectionOption(parser)
+(options, args) = parser.parse_args()
+
 # ------------------------
 # Specification URL
 # This is used frequently.
@@ -65,24 +84,16 @@ if not os.path.exists(userAgentFontsToInstallDirectory):
 
 # CFF Reference
 destPath = os.path.join(userAgentFontsToInstallDirectory, "SFNT-CFF-Reference.otf")
-if os.path.exists(destPath):
-    os.remove(destPath)
-shutil.copy(os.path.join(resourcesDirectory, "SFNT-CFF-Reference.otf"), os.path.join(destPath))
+copyFile(os.path.join(resourcesDirectory, "SFNT-CFF-Reference.otf"), destPath)
 # CFF Fallback
 destPath = os.path.join(userAgentFontsToInstallDirectory, "SFNT-CFF-Fallback.otf")
-if os.path.exists(destPath):
-    os.remove(destPath)
-shutil.copy(os.path.join(resourcesDirectory, "SFNT-CFF-Fallback.otf"), os.path.join(destPath))
+copyFile(os.path.join(resourcesDirectory, "SFNT-CFF-Fallback.otf"), destPath)
 # TTF Reference
 destPath = os.path.join(userAgentFontsToInstallDirectory, "SFNT-TTF-Reference.ttf")
-if os.path.exists(destPath):
-    os.remove(destPath)
-shutil.copy(os.path.join(resourcesDirectory, "SFNT-TTF-Reference.ttf"), os.path.join(destPath))
+copyFile(os.path.join(resourcesDirectory, "SFNT-TTF-Reference.ttf"), destPath)
 # TTF Fallback
 destPath = os.path.join(userAgentFontsToInstallDirectory, "SFNT-TTF-Fallback.ttf")
-if os.path.exists(destPath):
-    os.remove(destPath)
-shutil.copy(os.path.join(resourcesDirectory, "SFNT-TTF-Fallback.ttf"), os.path.join(destPath))
+copyFile(os.path.join(resourcesDirectory, "SFNT-TTF-Fallback.ttf"), destPath)
 
 # -------------------
 # Move HTML Resources
@@ -90,9 +101,7 @@ shutil.copy(os.path.join(resourcesDirectory, "SFNT-TTF-Fallback.ttf"), os.path.j
 
 # index css
 destPath = os.path.join(userAgentTestResourcesDirectory, "index.css")
-if os.path.exists(destPath):
-    os.remove(destPath)
-shutil.copy(os.path.join(resourcesDirectory, "index.css"), destPath)
+copyFile(os.path.join(resourcesDirectory, "index.css"), destPath)
 
 # ---------------
 # Test Case Index
@@ -132,6 +141,8 @@ registeredIdentifiers = set()
 registeredTitles = set()
 registeredAssertions = set()
 
+buildManifest = BuildManifest(userAgentDirectory)
+
 def writeFileStructureTest(identifier, flavor="CFF",
         title=None, assertion=None,
         sfntDisplaySpecLink=None, metadataDisplaySpecLink=None,
@@ -177,7 +188,8 @@ def writeFileStructureTest(identifier, flavor="CFF",
 
     metadataIsValid: A boolean indicating if the metadata is valid.
 
-    data: The complete binary data for the WOFF.
+    data: A function that returns the complete binary data for the WOFF
+    or a tuple of a function and the arguments to call it with.
 
     metadataToDisplay: A string of metadata to display in the HTML. This should
     be set when the metadata is valid.
@@ -189,6 +201,7 @@ def writeFileStructureTest(identifier, flavor="CFF",
     displayed in the HTML.
     """
     print "Compiling %s..." % identifier
+    setCurrentCase(identifier)
     assert identifier not in registeredIdentifiers, "Duplicate identifier! %s" % identifier
     assert title not in registeredTitles, "Duplicate title! %s" % title
     assert assertion not in registeredAssertions, "Duplicate assertion! %s" % assertion
@@ -208,9 +221,15 @@ def writeFileStructureTest(identifier, flavor="CFF",
 
     # generate the WOFF
     woffPath = os.path.join(userAgentTestResourcesDirectory, identifier) + ".woff"
-    f = open(woffPath, "wb")
-    f.write(data)
-    f.close()
+    if isinstance(data, tuple):
+        function, arguments = data
+    else:
+        function, arguments = data, ()
+    selected = isCaseSelected(identifier, options.cases)
+    if selected:
+        buildManifest.buildFile(woffPath, function, arguments)
+    else:
+        buildManifest.keepFile(woffPath)
 
     # generate the test and ref html
     kwargs = dict(
@@ -230,8 +249,9 @@ def writeFileStructureTest(identifier, flavor="CFF",
         extraMetadataNotes=extraMetadataNotes,
         chapterURL=groupChapterURLs[tag]
     )
-    generateSFNTDisplayTestHTML(**kwargs)
-    generateSFNTDisplayRefHTML(**kwargs)
+    if selected:
+        generateSFNTDisplayTestHTML(**kwargs)
+        generateSFNTDisplayRefHTML(**kwargs)
 
     # register the test
     testRegistry[tag].append(
@@ -280,8 +300,9 @@ def writeMetadataSchemaValidityTest(identifier,
         metadata = getattr(sharedCases, importBase + "Metadata")
     assert metadata is not None
     assert metadataIsValid is not None
-    # compile the WOFF
-    data, metadata = makeMetadataTest(metadata)
+    # the WOFF is compiled if needed
+    data = (makeMetadataTestData, (metadata,))
+    metadata = prepareMetadataTestText(metadata)
     # pass to the more verbose function
     if metadataDisplaySpecLink is None:
         if not metadataIsValid:
@@ -320,7 +341,7 @@ writeFileStructureTest(
     credits=makeValidWOFF1Credits,
     shouldDisplaySFNT=True,
     sfntDisplaySpecLink="#conform-metadata-noeffect #conform-private-noeffect",
-    data=makeValidWOFF1()
+    data=makeValidWOFF1
 )
 
 writeFileStructureTest(
@@ -331,7 +352,7 @@ writeFileStructureTest(
     shouldDisplaySFNT=True,
     metadataIsValid=True,
     sfntDisplaySpecLink="#conform-metadata-noeffect #conform-private-noeffect",
-    data=makeValidWOFF2(),
+    data=makeValidWOFF2,
     metadataToDisplay=testDataWOFFMetadata,
     metadataDisplaySpecLink="#conform-metadata-maydisplay"
 )
@@ -343,7 +364,7 @@ writeFileStructureTest(
     credits=makeValidWOFF3Credits,
     sfntDisplaySpecLink="#conform-metadata-noeffect #conform-private-noeffect",
     shouldDisplaySFNT=True,
-    data=makeValidWOFF3()
+    data=makeValidWOFF3
 )
 
 writeFileStructureTest(
@@ -354,7 +375,7 @@ writeFileStructureTest(
     shouldDisplaySFNT=True,
     metadataIsValid=True,
     sfntDisplaySpecLink="#conform-metadata-noeffect #conform-private-noeffect",
-    data=makeValidWOFF4(),
+    data=makeValidWOFF4,
     metadataToDisplay=testDataWOFFMetadata,
     metadataDisplaySpecLink="#conform-metadata-maydisplay"
 )
@@ -369,7 +390,7 @@ writeFileStructureTest(
     credits=makeValidWOFF5Credits,
     sfntDisplaySpecLink="#conform-metadata-noeffect #conform-private-noeffect",
     shouldDisplaySFNT=True,
-    data=makeValidWOFF5()
+    data=makeValidWOFF5
 )
 
 writeFileStructureTest(
@@ -381,7 +402,7 @@ writeFileStructureTest(
     shouldDisplaySFNT=True,
     metadataIsValid=True,
     sfntDisplaySpecLink="#conform-metadata-noeffect #conform-private-noeffect",
-    data=makeValidWOFF6(),
+    data=makeValidWOFF6,
     metadataToDisplay=testDataWOFFMetadata,
     metadataDisplaySpecLink="#conform-metadata-maydisplay"
 )
@@ -394,7 +415,7 @@ writeFileStructureTest(
     credits=makeValidWOFF7Credits,
     shouldDisplaySFNT=True,
     sfntDisplaySpecLink="#conform-metadata-noeffect #conform-private-noeffect",
-    data=makeValidWOFF7()
+    data=makeValidWOFF7
 )
 
 writeFileStructureTest(
@@ -406,7 +427,7 @@ writeFileStructureTest(
     shouldDisplaySFNT=True,
     metadataIsValid=True,
     sfntDisplaySpecLink="#conform-metadata-noeffect #conform-private-noeffect",
-    data=makeValidWOFF8(),
+    data=makeValidWOFF8,
     metadataToDisplay=testDataWOFFMetadata,
     metadataDisplaySpecLink="#conform-metadata-maydisplay"
 )
@@ -422,7 +443,7 @@ writeFileStructureTest(
     credits=makeHeaderInvalidSignature1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-nomagicnumber-reject",
-    data=makeHeaderInvalidSignature1()
+    data=makeHeaderInvalidSignature1
 )
 
 # ------------------------------
@@ -436,7 +457,7 @@ writeFileStructureTest(
     credits=makeHeaderInvalidLength1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#WOFFHeader",
-    data=makeHeaderInvalidLength1()
+    data=makeHeaderInvalidLength1
 )
 
 writeFileStructureTest(
@@ -446,7 +467,7 @@ writeFileStructureTest(
     credits=makeHeaderInvalidLength2Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#WOFFHeader",
-    data=makeHeaderInvalidLength2()
+    data=makeHeaderInvalidLength2
 )
 
 # ---------------------------------
@@ -460,7 +481,7 @@ writeFileStructureTest(
     credits=makeHeaderInvalidNumTables1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#WOFFHeader",
-    data=makeHeaderInvalidNumTables1()
+    data=makeHeaderInvalidNumTables1
 )
 
 # -------------------------------------
@@ -474,7 +495,7 @@ writeFileStructureTest(
     credits=makeHeaderInvalidTotalSfntSize1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-totalsize-longword-reject",
-    data=makeHeaderInvalidTotalSfntSize1()
+    data=makeHeaderInvalidTotalSfntSize1
 )
 
 writeFileStructureTest(
@@ -484,7 +505,7 @@ writeFileStructureTest(
     credits=makeHeaderInvalidTotalSfntSize2Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-totalsize-longword-reject",
-    data=makeHeaderInvalidTotalSfntSize2()
+    data=makeHeaderInvalidTotalSfntSize2
 )
 
 writeFileStructureTest(
@@ -494,7 +515,7 @@ writeFileStructureTest(
     credits=makeHeaderInvalidTotalSfntSize3Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-totalsize-longword-reject",
-    data=makeHeaderInvalidTotalSfntSize3()
+    data=makeHeaderInvalidTotalSfntSize3
 )
 
 # --------------------------------
@@ -508,7 +529,7 @@ writeFileStructureTest(
     credits=makeHeaderInvalidReserved1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-reserved-reject",
-    data=makeHeaderInvalidReserved1()
+    data=makeHeaderInvalidReserved1
 )
 
 # --------------------------------------------
@@ -524,7 +545,7 @@ writeFileStructureTest(
     credits=makeExtraneousData1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-extraneous-reject",
-    data=makeExtraneousData1()
+    data=makeExtraneousData1
 )
 
 # after table data with no metadata or private data
@@ -536,7 +557,7 @@ writeFileStructureTest(
     credits=makeExtraneousData2Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-extraneous-reject",
-    data=makeExtraneousData2()
+    data=makeExtraneousData2
 )
 
 # between tabledata and metadata
@@ -548,7 +569,7 @@ writeFileStructureTest(
     credits=makeExtraneousData3Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-extraneous-reject",
-    data=makeExtraneousData3()
+    data=makeExtraneousData3
 )
 
 # between tabledata and private data
@@ -560,7 +581,7 @@ writeFileStructureTest(
     credits=makeExtraneousData4Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-extraneous-reject",
-    data=makeExtraneousData4()
+    data=makeExtraneousData4
 )
 
 # between metadata and private data
@@ -572,7 +593,7 @@ writeFileStructureTest(
     credits=makeExtraneousData5Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-extraneous-reject",
-    data=makeExtraneousData5()
+    data=makeExtraneousData5
 )
 
 # after metadata with no private data
@@ -584,7 +605,7 @@ writeFileStructureTest(
     credits=makeExtraneousData6Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-extraneous-reject",
-    data=makeExtraneousData6()
+    data=makeExtraneousData6
 )
 
 # after private data
@@ -596,7 +617,7 @@ writeFileStructureTest(
     credits=makeExtraneousData7Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-extraneous-reject",
-    data=makeExtraneousData7()
+    data=makeExtraneousData7
 )
 
 # -------------------------------------
@@ -612,7 +633,7 @@ writeFileStructureTest(
     credits=makeOverlappingData1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-overlap-reject",
-    data=makeOverlappingData1()
+    data=makeOverlappingData1
 )
 
 # private data overlaps the table data
@@ -624,7 +645,7 @@ writeFileStructureTest(
     credits=makeOverlappingData2Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-overlap-reject",
-    data=makeOverlappingData2()
+    data=makeOverlappingData2
 )
 
 # private data overlaps the metadata
@@ -636,7 +657,7 @@ writeFileStructureTest(
     credits=makeOverlappingData3Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-overlap-reject",
-    data=makeOverlappingData3()
+    data=makeOverlappingData3
 )
 
 # ------------------------------------------------
@@ -650,7 +671,7 @@ writeFileStructureTest(
     credits=makeTableData4Byte1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-tablesize-longword",
-    data=makeTableData4Byte1()
+    data=makeTableData4Byte1
 )
 
 # final table is not padded
@@ -662,7 +683,7 @@ writeFileStructureTest(
     credits=makeTableData4Byte2Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-tablesize-longword",
-    data=makeTableData4Byte2()
+    data=makeTableData4Byte2
 )
 
 # -----------------------------------------
@@ -678,7 +699,7 @@ writeFileStructureTest(
     credits=makeTableDataByteRange1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange1()
+    data=makeTableDataByteRange1
 )
 
 # offset + length goes past the end of the file
@@ -690,7 +711,7 @@ writeFileStructureTest(
     credits=makeTableDataByteRange2Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange2()
+    data=makeTableDataByteRange2
 )
 
 # overlaps metadata
@@ -702,7 +723,7 @@ writeFileStructureTest(
     credits=makeTableDataByteRange3Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange3()
+    data=makeTableDataByteRange3
 )
 
 # overlaps private data
@@ -714,7 +735,7 @@ writeFileStructureTest(
     credits=makeTableDataByteRange4Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange4()
+    data=makeTableDataByteRange4
 )
 
 # two tables overlap
@@ -726,7 +747,7 @@ writeFileStructureTest(
     credits=makeTableDataByteRange5Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-diroverlap-reject",
-    data=makeTableDataByteRange5()
+    data=makeTableDataByteRange5
 )
 
 # ------------------------------------------------
@@ -742,7 +763,7 @@ writeFileStructureTest(
     credits=makeTableDataExtraneousData1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-extraneous-reject",
-    data=makeTableDataExtraneousData1()
+    data=makeTableDataExtraneousData1
 )
 
 # -------------------------------------------
@@ -758,7 +779,7 @@ writeFileStructureTest(
     credits=makeTableDataCompressionLength1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-compressedlarger",
-    data=makeTableDataCompressionLength1()
+    data=makeTableDataCompressionLength1
 )
 
 # -------------------------------------------
@@ -774,7 +795,7 @@ writeFileStructureTest(
     credits=makeTableDataOriginalLength1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-origLength",
-    data=makeTableDataOriginalLength1()
+    data=makeTableDataOriginalLength1
 )
 
 # one table has an origLength that is greater than the decompressed length
@@ -786,7 +807,7 @@ writeFileStructureTest(
     credits=makeTableDataOriginalLength2Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-origLength",
-    data=makeTableDataOriginalLength2()
+    data=makeTableDataOriginalLength2
 )
 
 # ---------------------------------------
@@ -802,7 +823,7 @@ writeFileStructureTest(
     credits=makeTableCompressionTest1Credits,
     shouldDisplaySFNT=True,
     sfntDisplaySpecLink="#conform-mustuncompress",
-    data=makeTableCompressionTest1()
+    data=makeTableCompressionTest1
 )
 
 # all possible tables are compressed
@@ -814,7 +835,7 @@ writeFileStructureTest(
     credits=makeTableCompressionTest2Credits,
     shouldDisplaySFNT=True,
     sfntDisplaySpecLink="#conform-mustuncompress",
-    data=makeTableCompressionTest2()
+    data=makeTableCompressionTest2
 )
 
 # not all possible tables are compressed
@@ -826,7 +847,7 @@ writeFileStructureTest(
     credits=makeTableCompressionTest3Credits,
     shouldDisplaySFNT=True,
     sfntDisplaySpecLink="#conform-mustuncompress",
-    data=makeTableCompressionTest3()
+    data=makeTableCompressionTest3
 )
 
 # varying compression levels
@@ -838,7 +859,7 @@ writeFileStructureTest(
     credits=makeTableCompressionTest4Credits,
     shouldDisplaySFNT=True,
     sfntDisplaySpecLink="#conform-mustuncompress",
-    data=makeTableCompressionTest4()
+    data=makeTableCompressionTest4
 )
 
 # ----------------------------------------------
@@ -854,7 +875,7 @@ writeFileStructureTest(
     credits=makeTableZlibCompressionTest1Credits,
     shouldDisplaySFNT=False,
     sfntDisplaySpecLink="#conform-decompressfailure",
-    data=makeTableZlibCompressionTest1()
+    data=makeTableZlibCompressionTest1
 )
 
 # -----------------------------------
@@ -865,7 +886,7 @@ writeFileStructureTest(
 
 def makeMetadataNoEffect1():
     header, directory, tableData = defaultTestData()
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeFileStructureTest(
@@ -875,14 +896,14 @@ writeFileStructureTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     shouldDisplaySFNT=True,
     sfntDisplaySpecLink="#conform-metadata-noeffect",
-    data=makeMetadataNoEffect1()
+    data=makeMetadataNoEffect1
 )
 
 # have metadata
 
 def makeMetadataNoEffect2():
     header, directory, tableData, metadata = defaultTestData(metadata=testDataWOFFMetadata)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata)
     return data
 
 writeFileStructureTest(
@@ -894,7 +915,7 @@ writeFileStructureTest(
     sfntDisplaySpecLink="#conform-metadata-noeffect",
     metadataIsValid=True,
     metadataDisplaySpecLink="#conform-metadata-maydisplay",
-    data=makeMetadataNoEffect2()
+    data=makeMetadataNoEffect2
 )
 
 # ---------------------------------------
@@ -905,7 +926,7 @@ writeFileStructureTest(
 
 def makePrivateDataNoEffect1():
     header, directory, tableData = defaultTestData()
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 writeFileStructureTest(
@@ -915,14 +936,14 @@ writeFileStructureTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     shouldDisplaySFNT=True,
     sfntDisplaySpecLink="#conform-private-noeffect",
-    data=makePrivateDataNoEffect1()
+    data=makePrivateDataNoEffect1
 )
 
 # have private data
 
 def makePrivateDataNoEffect2():
     header, directory, tableData, privateData = defaultTestData(privateData=testDataWOFFPrivateData)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestPrivateData(privateData)
+    data = packTestWOFF(header, directory, tableData, privateData=privateData)
     return data
 
 writeFileStructureTest(
@@ -932,7 +953,7 @@ writeFileStructureTest(
     credits=[dict(title="Tal Leming", role="author", link="http://typesupply.com")],
     shouldDisplaySFNT=True,
     sfntDisplaySpecLink="#conform-private-noeffect",
-    data=makePrivateDataNoEffect2()
+    data=makePrivateDataNoEffect2
 )
 
 # -------------------------------
@@ -1023,7 +1044,7 @@ def makeMetadataAuthoritativeTest1():
     assert tableOrder == sfntCFFTableOrder
     # compile the WOFF
     header, directory, tableData, metadata = defaultTestData(tableData=tableData, metadata=metadataAuthoritativeXML)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata)
     return data
 
 writeFileStructureTest(
@@ -1035,7 +1056,7 @@ writeFileStructureTest(
     metadataIsValid=True,
     metadataToDisplay=metadataAuthoritativeXML,
     metadataDisplaySpecLink="#conform-metadata-authoritative",
-    data=makeMetadataAuthoritativeTest1(),
+    data=makeMetadataAuthoritativeTest1,
     extraMetadataNotes=["The Extended Metadata Block test fails if the word FAIL appears in the metadata display."]
 )
 
@@ -1051,7 +1072,7 @@ writeFileStructureTest(
     shouldDisplaySFNT=True,
     metadataIsValid=False,
     metadataDisplaySpecLink="#conform-metadata-alwayscompress",
-    data=makeMetadataCompression1(),
+    data=makeMetadataCompression1,
 )
 
 # --------------------------------
@@ -1068,7 +1089,7 @@ writeFileStructureTest(
     shouldDisplaySFNT=True,
     metadataIsValid=False,
     sfntDisplaySpecLink="#conform-metaOrigLength",
-    data=makeMetaOrigLengthTest1()
+    data=makeMetaOrigLengthTest1
 )
 
 # >
@@ -1081,7 +1102,7 @@ writeFileStructureTest(
     shouldDisplaySFNT=True,
     metadataIsValid=False,
     sfntDisplaySpecLink="#conform-metaOrigLength",
-    data=makeMetaOrigLengthTest2()
+    data=makeMetaOrigLengthTest2
 )
 
 # -----------------------------
@@ -2817,9 +2838,7 @@ available1 = """
 </html>
 """.strip()
 p = os.path.join(userAgentTestDirectory, "available-001.xht")
-f = open(p, "wb")
-f.write(available1)
-f.close()
+writeFile(p, available1)
 
 available2 = """
 <!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
@@ -2857,9 +2876,7 @@ available2 = """
 </html>
 """.strip()
 p = os.path.join(userAgentTestDirectory, "available-001a.xht")
-f = open(p, "wb")
-f.write(available2)
-f.close()
+writeFile(p, available2)
 
 available3 = """
 <!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
@@ -2893,9 +2910,7 @@ available3 = """
 </html>
 """.strip()
 p = os.path.join(userAgentTestDirectory, "available-001b.xht")
-f = open(p, "wb")
-f.write(available3)
-f.close()
+writeFile(p, available3)
 
 identifier = "available-001"
 title = "Font access"
@@ -2919,6 +2934,9 @@ registeredIdentifiers.add(identifier)
 registeredTitles.add(title)
 registeredAssertions.add(assertion)
 
+setCurrentCase(None)
+buildManifest.save()
+
 # ------------------
 # Generate the Index
 # ------------------
@@ -2977,11 +2995,7 @@ for tag, title, url in groupDefinitions:
         manifest.append(line)
 
 path = os.path.join(userAgentDirectory, "manifest.txt")
-if os.path.exists(path):
-    os.remove(path)
-f = open(path, "wb")
-f.write("\n".join(manifest))
-f.close()
+writeFile(path, "\n".join(manifest))
 
 # -----------------------
 # Check for Unknown Files
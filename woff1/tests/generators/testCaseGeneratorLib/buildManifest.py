@@ -0,0 +1,424 @@
+"""
+Build manifest for incremental regeneration.
+
+The manifest stores the hash of each output file written by a
+generator and the hash of the inputs that produced it. The inputs
+are the source of the function that builds the data, the arguments
+given to that function and the default data resources (the SFNT
+source fonts and the modules in this package). When the inputs of
+a test case have not changed since the last run and the file on
+disk still has the recorded hash, the data is not built again.
+Files are only written when their contents change so the
+modification times of unchanged files are kept.
+
+Changes to helper functions defined in a generator script are not
+tracked. Delete the manifest to force a full regeneration.
+
+The manifests are stored in the cache directory of the generators,
+one for each suite, so that they are not published with the suites.
+"""
+
+import os
+import json
+import fnmatch
+import hashlib
+import inspect
+from paths import sfntCFFSourcePath, sfntTTFSourcePath, cacheDirectory
+from timing import timed
+
+libraryDirectory = os.path.dirname(os.path.abspath(__file__))
+
+# modules that only affect the html, the running and
+# timing of the suites and the manifest itself are
+# not part of the inputs
+ignoredLibraryModules = ["__init__.py", "buildManifest.py", "html.py", "suiteRunner.py", "timing.py"]
+
+# -------
+# Hashing
+# -------
+
+fileHashBlockSize = 1 << 16
+
+def getDataHash(data):
+    return hashlib.sha1(data).hexdigest()
+
+def getFileHash(path):
+    """
+    Get the hash of the file at *path* or None
+    if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha1()
+    f = open(path, "rb")
+    while True:
+        data = f.read(fileHashBlockSize)
+        if not data:
+            break
+        h.update(data)
+    f.close()
+    return h.hexdigest()
+
+_defaultDataHash = None
+
+def getDefaultDataHash():
+    """
+    Get a hash of the SFNT source fonts and
+    the modules in this package.
+    """
+    global _defaultDataHash
+    if _defaultDataHash is None:
+        paths = [sfntCFFSourcePath, sfntTTFSourcePath]
+        for fileName in sorted(os.listdir(libraryDirectory)):
+            if fileName.endswith(".py") and fileName not in ignoredLibraryModules:
+                paths.append(os.path.join(libraryDirectory, fileName))
+        h = hashlib.sha1()
+        for path in paths:
+            h.update(os.path.basename(path))
+            h.update(getFileHash(path))
+        _defaultDataHash = h.hexdigest()
+    return _defaultDataHash
+
+def getInputsHash(function, arguments=()):
+    """
+    Get the hash of the inputs for data built
+    by calling *function* with *arguments*.
+    """
+    h = hashlib.sha1()
+    h.update(getDefaultDataHash())
+    h.update(function.__module__ + "." + function.__name__)
+    h.update(inspect.getsource(function))
+    h.update(repr(arguments))
+    return h.hexdigest()
+
+# --------------
+# Case Selection
+# --------------
+
+def addCaseSelectionOption(parser):
+    """
+    Add the option for selecting the cases to
+    build to an optparse *parser*.
+    """
+    parser.add_option("-c", "--case", dest="cases", action="append", metavar="PATTERN",
+        help="Only build the cases with an identifier matching PATTERN. Shell style wildcards can be used. This can be given more than once.")
+
+def isCaseSelected(identifier, patterns):
+    """
+    Return a boolean indicating if *identifier* matches any
+    of *patterns*. All cases are selected if *patterns*
+    is None or empty.
+    """
+    if not patterns:
+        return True
+    for pattern in patterns:
+        if fnmatch.fnmatchcase(identifier, pattern):
+            return True
+    return False
+
+# --------
+# Building
+# --------
+
+# Data built by the functions in this package, such as the
+# shared cases, is kept for the lifetime of the process so
+# that suites generated in the same process build each
+# shared case once. Functions defined in the generator
+# scripts are specific to one suite and are not cached.
+
+_sharedData = {}
+
+def isSharedBuilder(function):
+    return function.__module__ != "__main__"
+
+def getSharedData(function, arguments=()):
+    """
+    Get the data built by *function* with *arguments*
+    or None if it has not been built in this process.
+    """
+    if not isSharedBuilder(function):
+        return None
+    return _sharedData.get((function, arguments))
+
+def storeSharedData(function, arguments, data):
+    if isSharedBuilder(function):
+        _sharedData[(function, arguments)] = data
+
+def buildData(function, arguments=()):
+    """
+    Call *function* with *arguments* unless
+    the data has already been built.
+    """
+    data = getSharedData(function, arguments)
+    if data is None:
+        data = function(*arguments)
+        storeSharedData(function, arguments, data)
+    return data
+
+# -------
+# Writing
+# -------
+
+@timed("write")
+def writeFile(path, data):
+    """
+    Write *data* to *path* unless the file already
+    has the same contents. This returns a boolean
+    indicating if the file was written.
+    """
+    if getFileHash(path) == getDataHash(data):
+        return False
+    f = open(path, "wb")
+    f.write(data)
+    f.close()
+    return True
+
+class FileWriter(object):
+
+    """
+    A stream for writing a file at *path* piece by piece.
+    The data is written to a temporary file next to *path*
+    and hashed as it is written. When the writer is closed
+    the temporary file replaces *path* unless the file
+    already has the same contents.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._tempPath = "%s.%d.tmp" % (path, os.getpid())
+        self._file = open(self._tempPath, "wb")
+        self._hash = hashlib.sha1()
+
+    @timed("write")
+    def write(self, data):
+        self._hash.update(data)
+        self._file.write(data)
+
+    @timed("write")
+    def close(self):
+        """
+        Finish the file. This returns a boolean
+        indicating if the file was written.
+        """
+        self._file.close()
+        if getFileHash(self.path) == self._hash.hexdigest():
+            os.remove(self._tempPath)
+            return False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(self._tempPath, self.path)
+        return True
+
+@timed("write")
+def copyFile(sourcePath, destPath):
+    """
+    Copy *sourcePath* to *destPath* unless the
+    destination already has the same contents.
+    """
+    f = open(sourcePath, "rb")
+    data = f.read()
+    f.close()
+    return writeFile(destPath, data)
+
+# --------
+# Manifest
+# --------
+
+def getBuildManifestPath(directory):
+    """
+    Get the path of the manifest for the files in *directory*.
+    """
+    fileName = "buildmanifest-%s.json" % os.path.basename(os.path.normpath(directory))
+    return os.path.join(cacheDirectory, fileName)
+
+def forgetCases(directory, patterns=None):
+    """
+    Remove the entries for the cases with identifiers matching
+    *patterns* from the manifest for the files in *directory*
+    so that those cases are built again. The identifier of a
+    case is the file name without the extension. The whole
+    manifest is deleted if no *patterns* are given.
+    """
+    path = getBuildManifestPath(directory)
+    if not os.path.exists(path):
+        return
+    if not patterns:
+        os.remove(path)
+        return
+    f = open(path, "rb")
+    try:
+        outputs = json.load(f)["outputs"]
+    except (ValueError, KeyError):
+        outputs = {}
+    f.close()
+    for relativePath in list(outputs.keys()):
+        identifier = os.path.splitext(os.path.basename(relativePath))[0]
+        if isCaseSelected(identifier, patterns):
+            del outputs[relativePath]
+    writeFile(path, json.dumps(dict(outputs=outputs), indent=1, sort_keys=True))
+
+class BuildManifest(object):
+
+    """
+    The manifest for the files in *directory*. The paths
+    of the files are stored relative to the directory.
+    The manifest is stored at *path*, which defaults to
+    the path given by getBuildManifestPath.
+    """
+
+    def __init__(self, directory, path=None):
+        self.directory = directory
+        if path is None:
+            path = getBuildManifestPath(directory)
+        self.path = path
+        self._previousOutputs = {}
+        if os.path.exists(self.path):
+            f = open(self.path, "rb")
+            try:
+                self._previousOutputs = json.load(f)["outputs"]
+            except (ValueError, KeyError):
+                pass
+            f.close()
+        self._outputs = {}
+        self._outputData = {}
+        self._written = False
+
+    def _getRelativePath(self, path):
+        return os.path.relpath(path, self.directory).replace(os.sep, "/")
+
+    def isCurrent(self, path, inputsHash):
+        """
+        Return a boolean indicating if the file at *path*
+        was built from inputs with *inputsHash* and has not
+        been modified since. Current files are kept in
+        the manifest.
+        """
+        relativePath = self._getRelativePath(path)
+        entry = self._previousOutputs.get(relativePath)
+        if entry is None or entry["inputs"] != inputsHash:
+            return False
+        if getFileHash(path) != entry["hash"]:
+            return False
+        self._outputs[relativePath] = entry
+        return True
+
+    def keepFile(self, path):
+        """
+        Keep the entry for *path* from the previous run
+        without checking the file. This is used for the
+        cases that are not selected for building. If the
+        previous run did not record the file but it exists,
+        it is recorded with unknown inputs so that it is
+        built again by the next run that selects it.
+        """
+        relativePath = self._getRelativePath(path)
+        entry = self._previousOutputs.get(relativePath)
+        if entry is None:
+            fileHash = getFileHash(path)
+            if fileHash is None:
+                return
+            entry = dict(hash=fileHash, inputs=None)
+        self._outputs[relativePath] = entry
+
+    def writeFile(self, path, data, inputsHash=None):
+        """
+        Write *data* to *path* if the contents changed
+        and record the file in the manifest.
+        """
+        relativePath = self._getRelativePath(path)
+        self._outputs[relativePath] = dict(hash=getDataHash(data), inputs=inputsHash)
+        self._outputData[relativePath] = data
+        if writeFile(path, data):
+            self._written = True
+            return True
+        return False
+
+    def buildFile(self, path, function, arguments=()):
+        """
+        Build the data for *path* by calling *function*
+        with *arguments* and write it, unless the file
+        is current.
+        """
+        inputsHash = getInputsHash(function, arguments)
+        if self.isCurrent(path, inputsHash):
+            return False
+        return self.writeFile(path, buildData(function, arguments), inputsHash)
+
+    def getOutputPaths(self):
+        """
+        Get the sorted paths of the files
+        recorded in the manifest.
+        """
+        return [os.path.join(self.directory, relativePath) for relativePath in sorted(self._outputs.keys())]
+
+    def getOutputData(self, path):
+        """
+        Get the data for *path*. Data written during this run
+        is kept in memory, other files are read from disk.
+        """
+        data = self._outputData.get(self._getRelativePath(path))
+        if data is None:
+            f = open(path, "rb")
+            data = f.read()
+            f.close()
+        return data
+
+    def _get_written(self):
+        return self._written
+
+    written = property(_get_written, doc="A boolean indicating if any file was written.")
+
+    def _get_changed(self):
+        if self._written:
+            return True
+        return sorted(self._outputs.keys()) != sorted(self._previousOutputs.keys())
+
+    changed = property(_get_changed, doc="A boolean indicating if any file was written or if the set of files changed.")
+
+    def save(self):
+        """
+        Write the manifest. Files that were not
+        recorded during this run are dropped.
+        """
+        text = json.dumps(dict(outputs=self._outputs), indent=1, sort_keys=True)
+        directory = os.path.dirname(self.path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+        writeFile(self.path, text)
+
+# -------
+# Testing
+# -------
+
+def checkPartialBuildWithoutManifest():
+    """
+    Check that a run that only builds some of the files
+    and has no manifest from a previous run keeps the files
+    that are not built in the manifest, and that those
+    files are not current for the next run.
+    """
+    import shutil
+    import tempfile
+    directory = tempfile.mkdtemp()
+    try:
+        builtPath = os.path.join(directory, "built.woff")
+        keptPath = os.path.join(directory, "kept.woff")
+        missingPath = os.path.join(directory, "missing.woff")
+        writeFile(keptPath, "kept")
+        manifestPath = os.path.join(directory, "manifest.json")
+        manifest = BuildManifest(directory, path=manifestPath)
+        manifest.writeFile(builtPath, "built", "inputs")
+        manifest.keepFile(keptPath)
+        manifest.keepFile(missingPath)
+        assert manifest.getOutputPaths() == [builtPath, keptPath], "The kept file is not in the manifest."
+        assert manifest.getOutputData(keptPath) == "kept", "The kept file can not be read."
+        manifest.save()
+        manifest = BuildManifest(directory, path=manifestPath)
+        assert manifest.isCurrent(builtPath, "inputs"), "The built file is not current."
+        assert not manifest.isCurrent(keptPath, "inputs"), "The kept file is current without known inputs."
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    checkPartialBuildWithoutManifest()
+    print "A partial build without a manifest keeps the files that are not built."
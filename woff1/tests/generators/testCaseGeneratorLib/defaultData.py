@@ -2,13 +2,12 @@
 Default data for the test cases.
 """
 
-import zlib
-from copy import deepcopy
-from fontTools.ttLib.sfnt import sfntDirectoryFormat, sfntDirectorySize, sfntDirectoryEntryFormat, sfntDirectoryEntrySize
-from sfnt import getSFNTData
+from sfnt import getCachedSFNTData
 from woff import woffHeaderSize, woffDirectoryEntrySize
 from paths import sfntCFFSourcePath, sfntTTFSourcePath
-from utilities import calcPaddingLength, calcTableChecksum
+from utilities import calcPaddingLength, calcTableChecksum, compressData,\
+    sfntDirectoryFormat, sfntDirectorySize, sfntDirectoryEntryFormat, sfntDirectoryEntrySize
+from timing import timed
 
 # ---------
 # SFNT Data
@@ -16,14 +15,14 @@ from utilities import calcPaddingLength, calcTableChecksum
 
 originalSFNTChecksums = {}
 
-sfntTTFTableData, sfntTTFTableOrder, sfntTTFTableChecksums = getSFNTData(sfntTTFSourcePath)
+sfntTTFTableData, sfntTTFTableOrder, sfntTTFTableChecksums = getCachedSFNTData(sfntTTFSourcePath)
 for tag, checksum in sfntTTFTableChecksums.items():
     data = sfntTTFTableData[tag]
     if data in originalSFNTChecksums:
         assert originalSFNTChecksums[data] == checksum
     originalSFNTChecksums[data] = checksum
 
-sfntCFFTableData, sfntCFFTableOrder, sfntCFFTableChecksums = getSFNTData(sfntCFFSourcePath)
+sfntCFFTableData, sfntCFFTableOrder, sfntCFFTableChecksums = getCachedSFNTData(sfntCFFSourcePath)
 for tag, checksum in sfntCFFTableChecksums.items():
     data = sfntCFFTableData[tag]
     if data in originalSFNTChecksums:
@@ -213,6 +212,29 @@ for tag in sfntCFFTableOrder:
     )
     testCFFDataSFNTDirectory.append(d)
 
+# ------------------
+# Copying Structures
+# ------------------
+
+# The table data is shared between all test cases. The values
+# are (origData, compData) tuples or strings and can not be
+# modified in place, so a copy of the dict is enough for a case
+# to replace tables without affecting any other case. The header
+# and directory entries are dicts of immutable values, so each
+# of them is copied once per case instead of deeply.
+
+@timed("copying")
+def copyHeader(header):
+    return dict(header)
+
+@timed("copying")
+def copyDirectory(directory):
+    return [dict(entry) for entry in directory]
+
+@timed("copying")
+def copyTableData(tableData):
+    return dict(tableData)
+
 # --------------------
 # Default Data Creator
 # --------------------
@@ -221,21 +243,21 @@ def defaultTestData(header=None, directory=None, tableData=None, metadata=None,
     parts = []
     # setup the header
     if header is None:
-        header = deepcopy(testDataWOFFHeader)
+        header = copyHeader(testDataWOFFHeader)
     parts.append(header)
     # setup the directory
     if directory is None:
         if flavor == "cff":
-            directory = deepcopy(testCFFDataWOFFDirectory)
+            directory = copyDirectory(testCFFDataWOFFDirectory)
         else:
-            directory = deepcopy(testTTFDataWOFFDirectory)
+            directory = copyDirectory(testTTFDataWOFFDirectory)
     parts.append(directory)
     # setup the table data
     if tableData is None:
         if flavor == "cff":
-            tableData = deepcopy(sfntCFFTableData)
+            tableData = copyTableData(sfntCFFTableData)
         else:
-            tableData = deepcopy(sfntTTFTableData)
+            tableData = copyTableData(sfntTTFTableData)
     parts.append(tableData)
     # sanity checks
     assert len(directory) == len(tableData)
@@ -278,7 +300,7 @@ def defaultTestData(header=None, directory=None, tableData=None, metadata=None,
         else:
             compMetadata = None
         if compMetadata is None:
-            compMetadata = zlib.compress(metadata)
+            compMetadata = compressData(metadata)
         header["metaOffset"] = header["length"]
         header["metaLength"] = len(compMetadata)
         header["metaOrigLength"] = len(metadata)
@@ -302,19 +324,19 @@ def defaultTestData(header=None, directory=None, tableData=None, metadata=None,
 def defaultSFNTTestData(flavor="cff"):
     parts = []
     # setup the header
-    header = deepcopy(testDataSFNTHeader)
+    header = copyHeader(testDataSFNTHeader)
     parts.append(header)
     # setup the directory
     if flavor == "cff":
-        directory = deepcopy(testCFFDataSFNTDirectory)
+        directory = copyDirectory(testCFFDataSFNTDirectory)
     else:
-        directory = deepcopy(testTTFDataSFNTDirectory)
+        directory = copyDirectory(testTTFDataSFNTDirectory)
     parts.append(directory)
     # setup the table data
     if flavor == "cff":
-        tableData = deepcopy(sfntCFFTableData)
+        tableData = copyTableData(sfntCFFTableData)
     else:
-        tableData = deepcopy(sfntTTFTableData)
+        tableData = copyTableData(sfntTTFTableData)
     for tag, (data, compData) in tableData.items():
         tableData[tag] = data
     parts.append(tableData)
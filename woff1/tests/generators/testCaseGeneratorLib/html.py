@@ -4,6 +4,8 @@ Test case HTML generator.
 
 import os
 import cgi
+from buildManifest import writeFile, FileWriter
+from timing import timed
 
 # ------------------
 # SFNT Display Tests
@@ -54,6 +56,60 @@ def escapeAttributeText(text):
         text = text.replace(before, after)
     return text
 
+# Templates for the test pages. The parts are joined
+# without separators, so each part after the first
+# starts with its own line break.
+
+xhtml1Declaration = "<!DOCTYPE html PUBLIC \"-//W3C//DTD XHTML 1.0 Strict//EN\" \"http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd\">"
+
+testPageHeadTemplate = "\n".join([
+    xhtml1Declaration,
+    "<html xmlns=\"http://www.w3.org/1999/xhtml\">",
+    "\t<head>",
+    "\t\t<meta http-equiv=\"content-type\" content=\"text/html;charset=UTF-8\"/>",
+    "\t\t<title>WOFF Test: %s</title>"
+])
+testPageCreditTemplate = "\n\t\t<link rel=\"%s\" title=\"%s\" href=\"%s\" />"
+testPageCreditDateTemplate = " <!-- %s -->"
+testPageHelpTemplate = "\n\t\t<link rel=\"help\" href=\"%s\" />"
+testPageFlagsTemplate = "\n\t\t<meta name=\"flags\" content=\"%s\" />"
+testPageStyleTemplate = "\n".join([
+    "",
+    "\t\t<meta name=\"assert\" content=\"%(assertion)s\" />",
+    "\t\t<style type=\"text/css\"><![CDATA[",
+    "%(css)s",
+    "\t\t]]></style>",
+    "\t</head>",
+    "\t<body>",
+    "\t\t<p><a href=\"../../FontsToInstall\">Test fonts</a> must be installed for this test. The WOFF being tested will be loaded over the network so please wait until the download is complete before determing the success of this test.</p>"
+])
+testPageNoMetadataNote = "\n\t\t<p>Test passes if the word PASS appears below.</p>"
+testPageInvalidMetadataNote = "\n".join([
+    "",
+    "\t\t<p>If the UA does not display WOFF metadata, the test passes if the word PASS appears below.</p>",
+    "\t\t<p>The Extended Metadata Block is not valid and must not be displayed. If the UA does display it, the test fails.</p>"
+])
+testPageValidMetadataNote = "\n".join([
+    "",
+    "\t\t<p>Test passes if the word PASS appears below.</p>",
+    "\t\t<p>The Extended Metadata Block is valid and may be displayed to the user upon request.</p>"
+])
+testPageParagraphTemplate = "\n\t\t<p>%s</p>"
+testPageTestTemplate = "\n\t\t<div class=\"test\">%s</div>"
+testPageMetadataTemplate = "\n".join([
+    "",
+    "\t\t<p>The XML contained in the Extended Metadata Block is below.</p>",
+    "\t\t<pre>",
+    "%s",
+    "\t\t</pre>"
+])
+pageFoot = "\n".join([
+    "",
+    "\t</body>",
+    "</html>"
+])
+
+@timed("html")
 def _generateSFNTDisplayTestHTML(
     css, bodyCharacter,
     fileName=None, flavor=None,
@@ -69,89 +125,43 @@ def _generateSFNTDisplayTestHTML(
     assert title is not None
     assert specLinks
     assert assertion is not None
-    html = [
-        "<!DOCTYPE html PUBLIC \"-//W3C//DTD XHTML 1.0 Strict//EN\" \"http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd\">",
-        "<html xmlns=\"http://www.w3.org/1999/xhtml\">"
-    ]
-    # head
-    html.append("\t<head>")
-    ## encoding
-    s = "\t\t<meta http-equiv=\"content-type\" content=\"text/html;charset=UTF-8\"/>"
-    html.append(s)
-    ## title
-    s = "\t\t<title>WOFF Test: %s</title>" % cgi.escape(title)
-    html.append(s)
-    ## author
+    assert chapterURL is not None
+    html = [testPageHeadTemplate % cgi.escape(title)]
+    # author
     for credit in credits:
-        role = credit.get("role")
-        title = credit.get("title")
-        link = credit.get("link")
+        html.append(testPageCreditTemplate % (credit.get("role"), credit.get("title"), credit.get("link")))
         date = credit.get("date")
-        s = "\t\t<link rel=\"%s\" title=\"%s\" href=\"%s\" />" % (role, title, link)
         if date:
-            s += " <!-- %s -->" % date
-        html.append(s)
-    ## link
-    assert chapterURL is not None
-    s = "\t\t<link rel=\"help\" href=\"%s\" />" % chapterURL
-    html.append(s)
+            html.append(testPageCreditDateTemplate % date)
+    # link
+    html.append(testPageHelpTemplate % chapterURL)
     for link in specLinks:
-        s = "\t\t<link rel=\"help\" href=\"%s\" />" % ("#" + link.split("#")[-1])
-        html.append(s)
-    ## flags
+        html.append(testPageHelpTemplate % ("#" + link.split("#")[-1]))
+    # flags
     if flags:
-        s = "\t\t<meta name=\"flags\" content=\"%s\" />" % " ".join(flags)
-        html.append(s)
-    ## assertion
-    s = "\t\t<meta name=\"assert\" content=\"%s\" />" % escapeAttributeText(assertion)
-    html.append(s)
-    ## css
-    html.append("\t\t<style type=\"text/css\"><![CDATA[")
-    s = "\n".join(["\t\t\t" + line for line in css.splitlines()])
-    html.append(s)
-    html.append("\t\t]]></style>")
-    ## close
-    html.append("\t</head>")
-    # body
-    html.append("\t<body>")
-    ## install fonts note
-    s = "\t\t<p><a href=\"../../FontsToInstall\">Test fonts</a> must be installed for this test. The WOFF being tested will be loaded over the network so please wait until the download is complete before determing the success of this test.</p>"
-    html.append(s)
-    ## note
+        html.append(testPageFlagsTemplate % " ".join(flags))
+    # assertion, css and the install fonts note
+    css = "\n".join(["\t\t\t" + line for line in css.splitlines()])
+    html.append(testPageStyleTemplate % dict(assertion=escapeAttributeText(assertion), css=css))
+    # note
     if metadataIsValid is None:
-        s = "\t\t<p>Test passes if the word PASS appears below.</p>"
+        html.append(testPageNoMetadataNote)
+    elif not metadataIsValid:
+        html.append(testPageInvalidMetadataNote)
     else:
-        if not metadataIsValid:
-            s = "\t\t<p>If the UA does not display WOFF metadata, the test passes if the word PASS appears below.</p>\n"
-            s += "\t\t<p>The Extended Metadata Block is not valid and must not be displayed. If the UA does display it, the test fails.</p>"
-        else:
-            s = "\t\t<p>Test passes if the word PASS appears below.</p>\n"
-            s += "\t\t<p>The Extended Metadata Block is valid and may be displayed to the user upon request.</p>"
-    html.append(s)
+        html.append(testPageValidMetadataNote)
     # extra notes
     for note in extraSFNTNotes:
-        s = "\t\t<p>%s</p>" % cgi.escape(note)
-        html.append(s)
+        html.append(testPageParagraphTemplate % cgi.escape(note))
     for note in extraMetadataNotes:
-        s = "\t\t<p>%s</p>" % cgi.escape(note)
-        html.append(s)
-    ## test case
-    s = "\t\t<div class=\"test\">%s</div>" % bodyCharacter
-    html.append(s)
-    ## show metadata
+        html.append(testPageParagraphTemplate % cgi.escape(note))
+    # test case
+    html.append(testPageTestTemplate % bodyCharacter)
+    # show metadata
     if metadataToDisplay:
-        s = "\t\t<p>The XML contained in the Extended Metadata Block is below.</p>"
-        html.append(s)
-        html.append("\t\t<pre>")
-        html.append(cgi.escape(metadataToDisplay))
-        html.append("\t\t</pre>")
-    ## close
-    html.append("\t</body>")
-    # close
-    html.append("</html>")
-    # finalize
-    html = "\n".join(html)
-    return html
+        html.append(testPageMetadataTemplate % cgi.escape(metadataToDisplay))
+    html.append(pageFoot)
+    return "".join(html)
 
 def generateSFNTDisplayTestHTML(
     fileName=None, directory=None, flavor=None, title=None,
@@ -185,9 +195,7 @@ def generateSFNTDisplayTestHTML(
     )
     # write the file
     path = os.path.join(directory, fileName) + ".xht"
-    f = open(path, "wb")
-    f.write(html)
-    f.close()
+    writeFile(path, html)
 
 def generateSFNTDisplayRefHTML(
         fileName=None, directory=None, flavor=None, title=None,
@@ -219,272 +227,183 @@ def generateSFNTDisplayRefHTML(
     )
     # write the file
     path = os.path.join(directory, fileName) + "-ref.xht"
-    f = open(path, "wb")
-    f.write(html)
-    f.close()
+    writeFile(path, html)
+
+# -----------
+# Index Pages
+# -----------
+
+# The index pages are written to the file as they are
+# rendered. As with the test pages, each part after
+# the first starts with its own line break.
 
+indexHeadTemplate = "\n".join([
+    "<!DOCTYPE html PUBLIC \"-//W3C//DTD XHTML 1.1//EN\" \"http://www.w3.org/TR/xhtml11/DTD/xhtml11.dtd\">",
+    "<html xmlns=\"http://www.w3.org/1999/xhtml\">",
+    "\t<head>",
+    "\t\t<title>WOFF: %(suite)s Test Suite</title>",
+    "\t\t<style type=\"text/css\">",
+    "\t\t\t@import \"resources/index.css\";",
+    "\t\t</style>",
+    "\t</head>",
+    "\t<body>",
+    "\t\t<h1>WOFF: %(suite)s Test Suite (%(testCount)d tests)</h1>"
+])
+indexInstallFontsNote = "\n\t\t<p class=\"installFontsNote\">All of these tests require special fonts to be installed. The fonts can be obtained <a href=\"../../FontsToInstall\">here</a>.</p>"
+indexDownloadNoteTemplate = "\n".join([
+    "",
+    "\t\t<div class=\"mainNote\">",
+    "\t\t\tThe files used in these test can be obtained individually <a href=\"../xhtml1\">here</a> or as a single zip file <a href=\"%s\">here</a>.",
+    "\t\t</div>"
+])
+indexNoteTemplate = "\n\t\t<div class=\"%s\">%s\n\t\t</div>"
+indexNoteLineTemplate = "\n\t\t\t%s"
+indexGroupTemplate = "\n\n\t\t<h2 class=\"testCategory\">%s</h2>"
+indexTestCaseHeadTemplate = "\n".join([
+    "",
+    "\t\t<div class=\"testCase\" id=\"%(identifier)s\">",
+    "\t\t\t<div class=\"testCaseOverview\">",
+    "\t\t\t\t<h3><a href=\"#%(identifier)s\">%(identifier)s</a>: %(title)s</h3>",
+    "\t\t\t\t<p>%(description)s</p>",
+    "\t\t\t</div>",
+    "\t\t\t<div class=\"testCaseDetails\">"
+])
+indexTestCaseFoot = "\n".join([
+    "",
+    "\t\t\t</div>",
+    "\t\t</div>"
+])
+indexPagesTemplate = "\n".join([
+    "",
+    "\t\t\t\t<div class=\"testCasePages\">",
+    "\t\t\t\t\t<p><a href=\"%s.xht\">Test</a></p>"
+])
+indexReferencePageTemplate = "\n\t\t\t\t\t<p><a href=\"%s-ref.xht\">Reference Rendering</a></p>"
+indexExpectationsTemplate = "\n".join([
+    "",
+    "\t\t\t\t</div>",
+    "\t\t\t\t<div class=\"testCaseExpectations\">",
+    "\t\t\t\t\t<p>%s</p>",
+    "\t\t\t\t\t<p>%s</p>",
+    "\t\t\t\t</div>"
+])
+indexValidityTemplate = "\n\t\t\t\t\t<p>Valid: <span id=\"%s-validity\">%s</span></p>"
+indexShouldConvertTemplate = "\n\t\t\t\t\t<p>Should Convert to WOFF: <span id=\"%s-shouldconvert\">%s</span></p>"
+indexDocumentationTemplate = "\n\t\t\t\t\t<p><a href=\"%s\">Documentation</a></p>"
+
+def _writeIndexNote(writer, className, note):
+    lines = "".join([indexNoteLineTemplate % line for line in note.splitlines()])
+    writer.write(indexNoteTemplate % (className, lines))
+
+def _writeIndexTestCaseHead(writer, identifier, title, description):
+    writer.write(indexTestCaseHeadTemplate % dict(identifier=identifier, title=cgi.escape(title), description=cgi.escape(description)))
+
+def _getExpectationText(expectation):
+    if expectation is None:
+        return "None"
+    if expectation:
+        return "Display"
+    return "Reject"
+
+@timed("html")
 def generateSFNTDisplayIndexHTML(directory=None, testCases=[]):
     testCount = sum([len(group["testCases"]) for group in testCases])
-    html = [
-        "<!DOCTYPE html PUBLIC \"-//W3C//DTD XHTML 1.1//EN\" \"http://www.w3.org/TR/xhtml11/DTD/xhtml11.dtd\">",
-        "<html xmlns=\"http://www.w3.org/1999/xhtml\">",
-        "\t<head>",
-        "\t\t<title>WOFF: User Agent Test Suite</title>",
-        "\t\t<style type=\"text/css\">",
-        "\t\t\t@import \"resources/index.css\";",
-        "\t\t</style>",
-        "\t</head>",
-        "\t<body>",
-        "\t\t<h1>WOFF: User Agent Test Suite (%d tests)</h1>" % testCount,
-        "\t\t<p class=\"installFontsNote\">All of these tests require special fonts to be installed. The fonts can be obtained <a href=\"../../FontsToInstall\">here</a>.</p>"
-    ]
+    path = os.path.join(directory, "testcaseindex.xht")
+    writer = FileWriter(path)
+    writer.write(indexHeadTemplate % dict(suite="User Agent", testCount=testCount))
+    writer.write(indexInstallFontsNote)
     # add the test groups
     for group in testCases:
-        title = group["title"]
-        title = cgi.escape(title)
-        # write the group header
-        html.append("")
-        html.append("\t\t<h2 class=\"testCategory\">%s</h2>" % title)
+        writer.write(indexGroupTemplate % cgi.escape(group["title"]))
         # write the individual test cases
         for test in group["testCases"]:
             identifier = test["identifier"]
-            title = test["title"]
-            title = cgi.escape(title)
-            assertion = test["assertion"]
-            assertion = cgi.escape(assertion)
-            sfntExpectation = test["sfntExpectation"]
-            if sfntExpectation:
-                sfntExpectation = "Display"
-            else:
-                sfntExpectation = "Reject"
-            sfntURL = test["sfntURL"]
-            metadataExpectation = test["metadataExpectation"]
-            if metadataExpectation is None:
-                metadataExpectation = "None"
-            elif metadataExpectation:
-                metadataExpectation = "Display"
-            else:
-                metadataExpectation = "Reject"
-            metadataURL = test["metadataURL"]
-            # start the test case div
-            html.append("\t\t<div class=\"testCase\" id=\"%s\">" % identifier)
-            # start the overview div
-            html.append("\t\t\t<div class=\"testCaseOverview\">")
-            # title
-            html.append("\t\t\t\t<h3><a href=\"#%s\">%s</a>: %s</h3>" % (identifier, identifier, title))
-            # assertion
-            html.append("\t\t\t\t<p>%s</p>" % assertion)
-            # close the overview div
-            html.append("\t\t\t</div>")
-            # start the details div
-            html.append("\t\t\t<div class=\"testCaseDetails\">")
-            # start the pages div
-            html.append("\t\t\t\t<div class=\"testCasePages\">")
-            # test page
-            html.append("\t\t\t\t\t<p><a href=\"%s.xht\">Test</a></p>" % identifier)
-            # reference page
+            _writeIndexTestCaseHead(writer, identifier, test["title"], test["assertion"])
+            # pages
+            writer.write(indexPagesTemplate % identifier)
             if test["hasReferenceRendering"]:
-                html.append("\t\t\t\t\t<p><a href=\"%s-ref.xht\">Reference Rendering</a></p>" % identifier)
-            # close the pages div
-            html.append("\t\t\t\t</div>")
-            # start the expectations div
-            html.append("\t\t\t\t<div class=\"testCaseExpectations\">")
+                writer.write(indexReferencePageTemplate % identifier)
             # sfnt expectation
-            string = "SFNT Expectation: %s" % sfntExpectation
+            sfntExpectation = "SFNT Expectation: %s" % _getExpectationText(bool(test["sfntExpectation"]))
+            sfntURL = test["sfntURL"]
             if sfntURL:
                 links = []
                 for url in sfntURL:
                     if "#" in url:
-                        url = "<a href=\"%s\">%s</a>" % (url, url.split("#")[-1])
-                        links.append(url)
+                        links.append("<a href=\"%s\">%s</a>" % (url, url.split("#")[-1]))
                     else:
-                        url = "<a href=\"%s\">documentation</a>" % url
-                        links.append(url)
-                string += " (%s)" % " ".join(links)
-            html.append("\t\t\t\t\t<p>%s</p>" % string)
+                        links.append("<a href=\"%s\">documentation</a>" % url)
+                sfntExpectation += " (%s)" % " ".join(links)
             # metadata expectation
-            string = "Metadata Expectation: %s" % metadataExpectation
+            metadataExpectation = "Metadata Expectation: %s" % _getExpectationText(test["metadataExpectation"])
+            metadataURL = test["metadataURL"]
             if metadataURL:
                 if "#" in metadataURL:
                     s = "(%s)" % metadataURL.split("#")[-1]
                 else:
                     s = "(documentation)"
-                string += " <a href=\"%s\">%s</a>" % (metadataURL, s)
-            html.append("\t\t\t\t\t<p>%s</p>" % string)
-            # close the expectations div
-            html.append("\t\t\t\t</div>")
-            # close the details div
-            html.append("\t\t\t</div>")
-            # close the test case div
-            html.append("\t\t</div>")
-            
-    # close body
-    html.append("\t</body>")
-    # close html
-    html.append("</html>")
-    # finalize
-    html = "\n".join(html)
-    # write
-    path = os.path.join(directory, "testcaseindex.xht")
-    f = open(path, "wb")
-    f.write(html)
-    f.close()
+                metadataExpectation += " <a href=\"%s\">%s</a>" % (metadataURL, s)
+            writer.write(indexExpectationsTemplate % (sfntExpectation, metadataExpectation))
+            writer.write(indexTestCaseFoot)
+    writer.write(pageFoot)
+    writer.close()
 
+@timed("html")
 def generateFormatIndexHTML(directory=None, testCases=[]):
     testCount = sum([len(group["testCases"]) for group in testCases])
-    html = [
-        "<!DOCTYPE html PUBLIC \"-//W3C//DTD XHTML 1.1//EN\" \"http://www.w3.org/TR/xhtml11/DTD/xhtml11.dtd\">",
-        "<html xmlns=\"http://www.w3.org/1999/xhtml\">",
-        "\t<head>",
-        "\t\t<title>WOFF: Format Test Suite</title>",
-        "\t\t<style type=\"text/css\">",
-        "\t\t\t@import \"resources/index.css\";",
-        "\t\t</style>",
-        "\t</head>",
-        "\t<body>",
-        "\t\t<h1>WOFF: Format Test Suite (%d tests)</h1>" % testCount,
-    ]
-    # add a download note
-    html.append("\t\t<div class=\"mainNote\">")
-    html.append("\t\t\tThe files used in these test can be obtained individually <a href=\"../xhtml1\">here</a> or as a single zip file <a href=\"FormatTestFonts.zip\">here</a>.")
-    html.append("\t\t</div>")
+    path = os.path.join(directory, "testcaseindex.xht")
+    writer = FileWriter(path)
+    writer.write(indexHeadTemplate % dict(suite="Format", testCount=testCount))
+    writer.write(indexDownloadNoteTemplate % "FormatTestFonts.zip")
     # add the test groups
     for group in testCases:
-        title = group["title"]
-        title = cgi.escape(title)
-        # write the group header
-        html.append("")
-        html.append("\t\t<h2 class=\"testCategory\">%s</h2>" % title)
+        writer.write(indexGroupTemplate % cgi.escape(group["title"]))
         # write the individual test cases
         for test in group["testCases"]:
             identifier = test["identifier"]
-            title = test["title"]
-            title = cgi.escape(title)
-            description = test["description"]
-            description = cgi.escape(description)
-            valid = test["valid"]
-            if valid:
+            _writeIndexTestCaseHead(writer, identifier, test["title"], test["description"])
+            # validity
+            if test["valid"]:
                 valid = "Yes"
             else:
                 valid = "No"
-            specLink = test["specLink"]
-            # start the test case div
-            html.append("\t\t<div class=\"testCase\" id=\"%s\">" % identifier)
-            # start the overview div
-            html.append("\t\t\t<div class=\"testCaseOverview\">")
-            # title
-            html.append("\t\t\t\t<h3><a href=\"#%s\">%s</a>: %s</h3>" % (identifier, identifier, title))
-            # assertion
-            html.append("\t\t\t\t<p>%s</p>" % description)
-            # close the overview div
-            html.append("\t\t\t</div>")
-            # start the details div
-            html.append("\t\t\t<div class=\"testCaseDetails\">")
-            # validity
-            string = "Valid: <span id=\"%s-validity\">%s</span>" % (identifier, valid)
-            html.append("\t\t\t\t\t<p>%s</p>" % string)
+            writer.write(indexValidityTemplate % (identifier, valid))
             # documentation
-            if specLink is not None:
-                string = "\t\t\t\t\t<p><a href=\"%s\">Documentation</a></p>" % specLink
-                html.append(string)
-            # close the details div
-            html.append("\t\t\t</div>")
-            # close the test case div
-            html.append("\t\t</div>")
-    # close body
-    html.append("\t</body>")
-    # close html
-    html.append("</html>")
-    # finalize
-    html = "\n".join(html)
-    # write
-    path = os.path.join(directory, "testcaseindex.xht")
-    f = open(path, "wb")
-    f.write(html)
-    f.close()
+            if test["specLink"] is not None:
+                writer.write(indexDocumentationTemplate % test["specLink"])
+            writer.write(indexTestCaseFoot)
+    writer.write(pageFoot)
+    writer.close()
 
+@timed("html")
 def generateAuthoringToolIndexHTML(directory=None, testCases=[], note=None):
     testCount = sum([len(group["testCases"]) for group in testCases])
-    html = [
-        "<!DOCTYPE html PUBLIC \"-//W3C//DTD XHTML 1.1//EN\" \"http://www.w3.org/TR/xhtml11/DTD/xhtml11.dtd\">",
-        "<html xmlns=\"http://www.w3.org/1999/xhtml\">",
-        "\t<head>",
-        "\t\t<title>WOFF: Authoring Tool Test Suite</title>",
-        "\t\t<style type=\"text/css\">",
-        "\t\t\t@import \"resources/index.css\";",
-        "\t\t</style>",
-        "\t</head>",
-        "\t<body>",
-        "\t\t<h1>WOFF: Authoring Tool Test Suite (%d tests)</h1>" % testCount,
-    ]
-    # add a download note
-    html.append("\t\t<div class=\"mainNote\">")
-    html.append("\t\t\tThe files used in these test can be obtained individually <a href=\"../xhtml1\">here</a> or as a single zip file <a href=\"AuthoringToolTestFonts.zip\">here</a>.")
-    html.append("\t\t</div>")
+    path = os.path.join(directory, "testcaseindex.xht")
+    writer = FileWriter(path)
+    writer.write(indexHeadTemplate % dict(suite="Authoring Tool", testCount=testCount))
+    writer.write(indexDownloadNoteTemplate % "AuthoringToolTestFonts.zip")
     # add the note
     if note:
-        html.append("\t\t<div class=\"mainNote\">")
-        for line in note.splitlines():
-            html.append("\t\t\t" + line)
-        html.append("\t\t</div>")
+        _writeIndexNote(writer, "mainNote", note)
     # add the test groups
     for group in testCases:
-        title = group["title"]
-        title = cgi.escape(title)
-        # write the group header
-        html.append("")
-        html.append("\t\t<h2 class=\"testCategory\">%s</h2>" % title)
+        writer.write(indexGroupTemplate % cgi.escape(group["title"]))
         # write the group note
-        note = group["note"]
-        if note:
-            html.append("\t\t<div class=\"testCategoryNote\">")
-            for line in note.splitlines():
-                html.append("\t\t\t" + line)
-            html.append("\t\t</div>")
+        if group["note"]:
+            _writeIndexNote(writer, "testCategoryNote", group["note"])
         # write the individual test cases
         for test in group["testCases"]:
             identifier = test["identifier"]
-            title = test["title"]
-            title = cgi.escape(title)
-            description = test["description"]
-            description = cgi.escape(description)
-            shouldConvert = test["shouldConvert"]
-            if shouldConvert:
+            _writeIndexTestCaseHead(writer, identifier, test["title"], test["description"])
+            # conversion
+            if test["shouldConvert"]:
                 shouldConvert = "Yes"
             else:
                 shouldConvert = "No"
-            specLink = test["specLink"]
-            # start the test case div
-            html.append("\t\t<div class=\"testCase\" id=\"%s\">" % identifier)
-            # start the overview div
-            html.append("\t\t\t<div class=\"testCaseOverview\">")
-            # title
-            html.append("\t\t\t\t<h3><a href=\"#%s\">%s</a>: %s</h3>" % (identifier, identifier, title))
-            # assertion
-            html.append("\t\t\t\t<p>%s</p>" % description)
-            # close the overview div
-            html.append("\t\t\t</div>")
-            # start the details div
-            html.append("\t\t\t<div class=\"testCaseDetails\">")
-            # validity
-            string = "Should Convert to WOFF: <span id=\"%s-shouldconvert\">%s</span>" % (identifier, shouldConvert)
-            html.append("\t\t\t\t\t<p>%s</p>" % string)
+            writer.write(indexShouldConvertTemplate % (identifier, shouldConvert))
             # documentation
-            if specLink is not None:
-                string = "\t\t\t\t\t<p><a href=\"%s\">Documentation</a></p>" % specLink
-                html.append(string)
-            # close the details div
-            html.append("\t\t\t</div>")
-            # close the test case div
-            html.append("\t\t</div>")
-    # close body
-    html.append("\t</body>")
-    # close html
-    html.append("</html>")
-    # finalize
-    html = "\n".join(html)
-    # write
-    path = os.path.join(directory, "testcaseindex.xht")
-    f = open(path, "wb")
-    f.write(html)
-    f.close()
+            if test["specLink"] is not None:
+                writer.write(indexDocumentationTemplate % test["specLink"])
+            writer.write(indexTestCaseFoot)
+    writer.write(pageFoot)
+    writer.close()
@@ -23,12 +23,21 @@ def dirname(path, depth=1):
 mainDirectory = dirname(__file__)
 mainDirectory = dirname(mainDirectory, 2)
 
+# directory for the generator scripts
+generatorsDirectory = os.path.join(mainDirectory, "generators")
+
 # directory for SFNT data, test case templates,
-resourcesDirectory = os.path.join(mainDirectory, "generators", "resources")
+resourcesDirectory = os.path.join(generatorsDirectory, "resources")
 # paths to specific resources
 sfntCFFSourcePath = os.path.join(resourcesDirectory, "SFNT-CFF.otf")
 sfntTTFSourcePath = os.path.join(resourcesDirectory, "SFNT-TTF.ttf")
 
+# directory for the regression cases of the format suite
+regressionsDirectory = os.path.join(resourcesDirectory, "regressions")
+
+# directory for data cached between runs of the generators
+cacheDirectory = os.path.join(generatorsDirectory, "cache")
+
 # directories for test output
 userAgentDirectory = os.path.join(mainDirectory, "UserAgent")
 userAgentTestDirectory = os.path.join(userAgentDirectory, "Tests", "xhtml1")
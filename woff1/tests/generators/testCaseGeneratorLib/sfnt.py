@@ -2,18 +2,25 @@
 SFNT data extractor.
 """
 
-import zlib
+import os
+import struct
+import hashlib
+import cPickle
+from cStringIO import StringIO
 import sstruct
-from fontTools.ttLib import TTFont
-from fontTools.ttLib.sfnt import getSearchRange,\
-    SFNTDirectoryEntry, sfntDirectoryFormat, sfntDirectorySize, sfntDirectoryEntryFormat, sfntDirectoryEntrySize
-from utilities import padData, calcHeadCheckSumAdjustmentSFNT
+from utilities import calcPaddingLength, calcChecksum, compressData, getSearchRange,\
+    packSFNTDirectoryEntry, sfntDirectoryFormat, sfntDirectorySize, sfntDirectoryEntryFormat, sfntDirectoryEntrySize
+from paths import cacheDirectory
+from timing import timed
 
 # ---------
 # Unpacking
 # ---------
 
+@timed("extraction")
 def getSFNTData(pathOrFile):
+    # TTFont is only needed when the data is not cached
+    from fontTools.ttLib import TTFont
     font = TTFont(pathOrFile)
     # checksums
     tableChecksums = {}
@@ -25,7 +32,7 @@ def getSFNTData(pathOrFile):
         if len(tag) != 4:
             continue
         origData = font.getTableData(tag)
-        compData = zlib.compress(origData)
+        compData = compressData(origData)
         if len(compData) >= len(origData) or tag == "head":
             compData = origData
         tableData[tag] = (origData, compData)
@@ -35,20 +42,119 @@ def getSFNTData(pathOrFile):
     del font
     return tableData, tableOrder, tableChecksums
 
+# -------
+# Caching
+# -------
+
+# Increment this when the structure returned
+# by getSFNTData changes to invalidate the cache.
+sfntDataCacheVersion = 1
+
+@timed("extraction")
+def getCachedSFNTData(path):
+    """
+    Get the same data as getSFNTData, but from an on-disk cache
+    keyed by the hash of the file at *path*. The data is extracted
+    with getSFNTData and cached when the cache has no data for
+    the current version of the file.
+    """
+    f = open(path, "rb")
+    fileHash = hashlib.sha1(f.read()).hexdigest()
+    f.close()
+    cacheFileName = "sfnt-%d-%s.pickle" % (sfntDataCacheVersion, fileHash)
+    cachePath = os.path.join(cacheDirectory, cacheFileName)
+    if os.path.exists(cachePath):
+        f = open(cachePath, "rb")
+        try:
+            tableData, tableOrder, tableChecksums = cPickle.load(f)
+            return _orderTableData(tableData, tableOrder), tableOrder, tableChecksums
+        except (cPickle.UnpicklingError, EOFError, ValueError):
+            pass
+        finally:
+            f.close()
+    sfntData = getSFNTData(path)
+    if not os.path.exists(cacheDirectory):
+        os.mkdir(cacheDirectory)
+    # write to a temporary file first so that a
+    # partially written cache file is never read
+    tempPath = "%s.%d.tmp" % (cachePath, os.getpid())
+    f = open(tempPath, "wb")
+    cPickle.dump(sfntData, f, cPickle.HIGHEST_PROTOCOL)
+    f.close()
+    os.rename(tempPath, cachePath)
+    return sfntData
+
+def _orderTableData(tableData, tableOrder):
+    """
+    Rebuild *tableData* by inserting the tables in *tableOrder*,
+    as getSFNTData does. An unpickled dict can iterate in another
+    order and some of the cases depend on the order of the items.
+    """
+    orderedTableData = {}
+    for tag in tableOrder:
+        orderedTableData[tag] = tableData[tag]
+    return orderedTableData
+
+def checkCachedSFNTData(path):
+    """
+    Check that the cached data for the file at *path* is the
+    same as freshly extracted data, including the order of
+    the tables in the dict.
+    """
+    tableData, tableOrder, tableChecksums = getSFNTData(path)
+    # the first call may extract the data and write
+    # the cache. the second one always reads it.
+    getCachedSFNTData(path)
+    cachedTableData, cachedTableOrder, cachedTableChecksums = getCachedSFNTData(path)
+    assert cachedTableData.items() == tableData.items(), "The cached table data differs from the extracted data for %s." % path
+    assert cachedTableOrder == tableOrder, "The cached table order differs from the extracted order for %s." % path
+    assert cachedTableChecksums == tableChecksums, "The cached checksums differ from the extracted checksums for %s." % path
+
 # -------
 # Packing
 # -------
 
-def packSFNT(header, directory, tableData, flavor="cff",
+@timed("checksum")
+def calcSFNTCheckSumAdjustment(directory, flavor):
+    """
+    Calculate the checkSumAdjustment for an SFNT with *directory*
+    from the checksums stored in the directory entries. The header
+    and the directory entries are small so only their checksums are
+    calculated here. The table data is not packed again.
+    """
+    searchRange, entrySelector, rangeShift = getSearchRange(len(directory))
+    header = dict(
+        sfntVersion=flavor,
+        numTables=len(directory),
+        searchRange=searchRange,
+        entrySelector=entrySelector,
+        rangeShift=rangeShift
+    )
+    # the header and the entries are multiples of four bytes so
+    # the checksum of the packed data is the sum of their checksums
+    checksums = [calcChecksum(sstruct.pack(sfntDirectoryFormat, header))]
+    for entry in directory:
+        checksums.append(calcChecksum(packSFNTDirectoryEntry(entry)))
+        checksums.append(entry["checksum"])
+    return (0xB1B0AFBA - sum(checksums)) & 0xffffffff
+
+def writeSFNT(stream, header, directory, tableData, flavor="cff",
     calcCheckSum=True, applyPadding=True, sortDirectory=True,
     searchRange=None, entrySelector=None, rangeShift=None):
+    """
+    Write the SFNT to *stream* in one pass: the header, the
+    directory and then the tables in the order of their offsets.
+    The arguments are the same as for packSFNT.
+    """
+    if flavor == "cff":
+        f = "OTTO"
+    else:
+        f = "\000\001\000\000"
     # update the checkSum
     if calcCheckSum:
-        if flavor == "cff":
-            f = "OTTO"
-        else:
-            f = "\000\001\000\000"
-        calcHeadCheckSumAdjustmentSFNT(directory, tableData, flavor=f)
+        checkSumAdjustment = calcSFNTCheckSumAdjustment(directory, f)
+        headTableData = tableData["head"]
+        tableData["head"] = headTableData[:8] + struct.pack(">L", checkSumAdjustment) + headTableData[12:]
     # update the header
     cSearchRange, cEntrySelector, cRangeShift = getSearchRange(len(directory))
     if searchRange is None:
@@ -57,37 +163,37 @@ def packSFNT(header, directory, tableData, flavor="cff",
         entrySelector = cEntrySelector
     if rangeShift is None:
         rangeShift = cRangeShift
-    if flavor == "cff":
-        header["sfntVersion"] = "OTTO"
-    else:
-        header["sfntVersion"] = "\000\001\000\000"
+    header["sfntVersion"] = f
     header["searchRange"] = searchRange
     header["entrySelector"] = entrySelector
     header["rangeShift"] = rangeShift
     # version and num tables should already be set
-    sfntData = sstruct.pack(sfntDirectoryFormat, header)
-    # compile the directory
-    sfntDirectoryEntries = {}
-    entryOrder = []
-    for entry in directory:
-        sfntEntry = SFNTDirectoryEntry()
-        sfntEntry.tag = entry["tag"]
-        sfntEntry.checkSum = entry["checksum"]
-        sfntEntry.offset = entry["offset"]
-        sfntEntry.length = entry["length"]
-        sfntDirectoryEntries[entry["tag"]] = sfntEntry
-        entryOrder.append(entry["tag"])
+    stream.write(sstruct.pack(sfntDirectoryFormat, header))
+    # write the directory
+    entries = [(entry["tag"], entry) for entry in directory]
     if sortDirectory:
-        entryOrder = sorted(entryOrder)
-    for tag in entryOrder:
-        entry = sfntDirectoryEntries[tag]
-        sfntData += entry.toString()
-    # compile the data
+        entries = sorted(entries)
+    for tag, entry in entries:
+        stream.write(packSFNTDirectoryEntry(entry))
+    # write the data
     directory = [(entry["offset"], entry["tag"]) for entry in directory]
     for o, tag in sorted(directory):
         data = tableData[tag]
+        stream.write(data)
         if applyPadding:
-            data = padData(data)
-        sfntData += data
-    # done
-    return sfntData
+            stream.write("\0" * calcPaddingLength(len(data)))
+
+def packSFNT(header, directory, tableData, flavor="cff",
+    calcCheckSum=True, applyPadding=True, sortDirectory=True,
+    searchRange=None, entrySelector=None, rangeShift=None):
+    stream = StringIO()
+    writeSFNT(stream, header, directory, tableData, flavor=flavor,
+        calcCheckSum=calcCheckSum, applyPadding=applyPadding, sortDirectory=sortDirectory,
+        searchRange=searchRange, entrySelector=entrySelector, rangeShift=rangeShift)
+    return stream.getvalue()
+
+if __name__ == "__main__":
+    from paths import sfntCFFSourcePath, sfntTTFSourcePath
+    for path in (sfntCFFSourcePath, sfntTTFSourcePath):
+        checkCachedSFNTData(path)
+    print "The cached SFNT data matches the extracted data."
@@ -3,33 +3,46 @@ Test cases that can be shared between two or more suites.
 """
 
 import os
-import zlib
 import codecs
-from copy import deepcopy
-from fontTools.ttLib.sfnt import sfntDirectoryEntrySize
-from testCaseGeneratorLib.woff import packTestHeader, packTestDirectory, packTestTableData, packTestMetadata, packTestPrivateData,\
+from testCaseGeneratorLib.woff import packTestHeader, packTestDirectory, packTestTableData, packTestMetadata, packTestPrivateData, packTestWOFF,\
     woffHeaderSize, woffDirectoryEntrySize, woffDirectoryEntryFormat
 from testCaseGeneratorLib.defaultData import defaultTestData, testDataWOFFMetadata, testDataWOFFPrivateData,\
-    sfntCFFTableData, testCFFDataWOFFDirectory
-from testCaseGeneratorLib.utilities import calcPaddingLength, padData, calcTableChecksum, stripMetadata
+    sfntCFFTableData, testCFFDataWOFFDirectory, copyDirectory, copyTableData
+from testCaseGeneratorLib.utilities import calcPaddingLength, padData, calcTableChecksum, stripMetadata, compressData,\
+    sfntDirectoryEntrySize
 
 
+def prepareMetadataTestText(metadata):
+    """
+    Get the metadata text in the form that is
+    stored by makeMetadataTest.
+    """
+    metadata = metadata.strip()
+    metadata = metadata.replace("    ", "\t")
+    return metadata
+
 def makeMetadataTest(metadata):
     """
     This is a convenience functon that eliminates the need to make a complete
     WOFF when only the metadata is being tested.
     """
-    metadata = metadata.strip()
     # convert to tabs
-    metadata = metadata.replace("    ", "\t")
+    metadata = prepareMetadataTestText(metadata)
     # store
     originalMetadata = metadata
     # pack
     header, directory, tableData, metadata = defaultTestData(metadata=metadata)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata)
     # done
     return data, originalMetadata
 
+def makeMetadataTestData(metadata):
+    """
+    Build only the WOFF data for a metadata test.
+    """
+    data, metadata = makeMetadataTest(metadata)
+    return data
+
 
 # -----------
 # Valid Files
@@ -39,7 +52,7 @@ def makeMetadataTest(metadata):
 
 def makeValidWOFF1():
     header, directory, tableData = defaultTestData()
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeValidWOFF1Title = "Valid WOFF 1"
@@ -48,7 +61,7 @@ makeValidWOFF1Credits = [dict(title="Tal Leming", role="author", link="http://ty
 
 def makeValidWOFF2():
     header, directory, tableData, metadata = defaultTestData(metadata=testDataWOFFMetadata)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata)
     return data
 
 makeValidWOFF2Title = "Valid WOFF 2"
@@ -57,7 +70,7 @@ makeValidWOFF2Credits = [dict(title="Tal Leming", role="author", link="http://ty
 
 def makeValidWOFF3():
     header, directory, tableData, privateData = defaultTestData(privateData=testDataWOFFPrivateData)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestPrivateData(privateData)
+    data = packTestWOFF(header, directory, tableData, privateData=privateData)
     return data
 
 makeValidWOFF3Title = "Valid WOFF 3"
@@ -66,7 +79,7 @@ makeValidWOFF3Credits = [dict(title="Tal Leming", role="author", link="http://ty
 
 def makeValidWOFF4():
     header, directory, tableData, metadata, privateData = defaultTestData(metadata=testDataWOFFMetadata, privateData=testDataWOFFPrivateData)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata, havePrivateData=True) + packTestPrivateData(privateData)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata, privateData=privateData)
     return data
 
 makeValidWOFF4Title = "Valid WOFF 4"
@@ -77,7 +90,7 @@ makeValidWOFF4Credits = [dict(title="Tal Leming", role="author", link="http://ty
 
 def makeValidWOFF5():
     header, directory, tableData = defaultTestData(flavor="ttf")
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeValidWOFF5Title = "Valid WOFF 5"
@@ -86,7 +99,7 @@ makeValidWOFF5Credits = [dict(title="Tal Leming", role="author", link="http://ty
 
 def makeValidWOFF6():
     header, directory, tableData, metadata = defaultTestData(metadata=testDataWOFFMetadata, flavor="ttf")
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata)
     return data
 
 makeValidWOFF6Title = "Valid WOFF 6"
@@ -95,7 +108,7 @@ makeValidWOFF6Credits = [dict(title="Tal Leming", role="author", link="http://ty
 
 def makeValidWOFF7():
     header, directory, tableData, privateData = defaultTestData(privateData=testDataWOFFPrivateData, flavor="ttf")
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestPrivateData(privateData)
+    data = packTestWOFF(header, directory, tableData, privateData=privateData)
     return data
 
 makeValidWOFF7Title = "Valid WOFF 7"
@@ -104,7 +117,7 @@ makeValidWOFF7Credits = [dict(title="Tal Leming", role="author", link="http://ty
 
 def makeValidWOFF8():
     header, directory, tableData, metadata, privateData = defaultTestData(metadata=testDataWOFFMetadata, privateData=testDataWOFFPrivateData, flavor="ttf")
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata, havePrivateData=True) + packTestPrivateData(privateData)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata, privateData=privateData)
     return data
 
 makeValidWOFF8Title = "Valid WOFF 8"
@@ -118,7 +131,7 @@ makeValidWOFF8Credits = [dict(title="Tal Leming", role="author", link="http://ty
 def makeHeaderInvalidSignature1():
     header, directory, tableData = defaultTestData()
     header["signature"] = "XXXX"
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeHeaderInvalidSignature1Title = "Header Signature Invalid Value"
@@ -132,7 +145,7 @@ makeHeaderInvalidSignature1Credits = [dict(title="Tal Leming", role="author", li
 def makeHeaderInvalidLength1():
     header, directory, tableData = defaultTestData()
     header["length"] -= 4
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeHeaderInvalidLength1Title = "Header Length Too Short"
@@ -142,7 +155,7 @@ makeHeaderInvalidLength1Credits = [dict(title="Tal Leming", role="author", link=
 def makeHeaderInvalidLength2():
     header, directory, tableData = defaultTestData()
     header["length"] += 4
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeHeaderInvalidLength2Title = "Header Length Too Long"
@@ -156,7 +169,7 @@ makeHeaderInvalidLength2Credits = [dict(title="Tal Leming", role="author", link=
 def makeHeaderInvalidNumTables1():
     header, directory, tableData = defaultTestData()
     header["numTables"] = 0
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeHeaderInvalidNumTables1Title = "Header Number of Tables Set to Zero"
@@ -178,7 +191,7 @@ def makeHeaderInvalidTotalSfntSize1():
             break
     assert decreaseBy is not None
     header["totalSfntSize"] -= decreaseBy
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeHeaderInvalidTotalSfntSize1Title = "Header Total SFNT Size Not a Multiple of 4"
@@ -188,7 +201,7 @@ makeHeaderInvalidTotalSfntSize1Credits = [dict(title="Tal Leming", role="author"
 def makeHeaderInvalidTotalSfntSize2():
     header, directory, tableData = defaultTestData()
     header["totalSfntSize"] += 4
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeHeaderInvalidTotalSfntSize2Title = "Header Total SFNT Size Too Long"
@@ -198,7 +211,7 @@ makeHeaderInvalidTotalSfntSize2Credits = [dict(title="Tal Leming", role="author"
 def makeHeaderInvalidTotalSfntSize3():
     header, directory, tableData = defaultTestData()
     header["totalSfntSize"] -= 4
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeHeaderInvalidTotalSfntSize3Title = "Header Total SFNT Size Too Short"
@@ -212,7 +225,7 @@ makeHeaderInvalidTotalSfntSize3Credits = [dict(title="Tal Leming", role="author"
 def makeHeaderInvalidReserved1():
     header, directory, tableData = defaultTestData()
     header["reserved"] = 1
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeHeaderInvalidReserved1Title = "Header Reserved Invalid Value"
@@ -425,13 +438,13 @@ makeTableData4Byte1Credits = [dict(title="Tal Leming", role="author", link="http
 
 def makeTableData4Byte2():
     # table data
-    tableData = deepcopy(sfntCFFTableData)
+    tableData = copyTableData(sfntCFFTableData)
     tag = "zzzz"
     data = "\0" * 2
     paddingLength = calcPaddingLength(len(data))
     tableData[tag] = (data, data)
     # directory
-    directory = deepcopy(testCFFDataWOFFDirectory)
+    directory = copyDirectory(testCFFDataWOFFDirectory)
     entry = dict(
         tag=tag,
         origChecksum=0,
@@ -443,7 +456,7 @@ def makeTableData4Byte2():
     # update the structures
     header, directory, tableData = defaultTestData(directory=directory, tableData=tableData)
     header["length"] -= paddingLength
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     data = data[:-paddingLength]
     return data
 
@@ -460,7 +473,7 @@ makeTableData4Byte2Credits = [dict(title="Tal Leming", role="author", link="http
 def makeTableDataByteRange1():
     header, directory, tableData = defaultTestData()
     directory[-1]["offset"] = header["length"] + 4
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableDataByteRange1Title = "Font Table Data Offset Past End of File"
@@ -474,7 +487,7 @@ def makeTableDataByteRange2():
     directory[-1]["compLength"] += 4
     directory[-1]["origLength"] += 4
     header["totalSfntSize"] += 4
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableDataByteRange2Title = "Font Table Data Offset+Length Past End of File"
@@ -563,7 +576,7 @@ def makeTableDataByteRange5():
     # adjust the total length
     header["length"] = entry["offset"] + entryLength
     # pack the header, directory and table data
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     # slice off everything after the new offset
     data = data[:entry["offset"]]
     # add the table to the data
@@ -597,7 +610,7 @@ def makeTableDataExtraneousData1():
             origData, compData = tableData[tag]
             tableData[tag] = (origData, compData + bogusBytes)
             header["length"] += bogusByteLength
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableDataExtraneousData1Title = "Extraneous Data Between Tables"
@@ -611,18 +624,18 @@ makeTableDataExtraneousData1Credits = [dict(title="Tal Leming", role="author", l
 # some tables have a compressed length that is longer than the original length
 
 def makeTableDataCompressionLength1():
-    tableData = deepcopy(sfntCFFTableData)
+    tableData = copyTableData(sfntCFFTableData)
     haveCompLargerThanOrig = False
     for tag, (origData, compData) in tableData.items():
         if len(compData) < len(origData):
             continue
-        compData = zlib.compress(origData)
+        compData = compressData(origData)
         if len(compData) > len(origData):
             haveCompLargerThanOrig = True
             tableData[tag] = (origData, compData)
     assert haveCompLargerThanOrig
     header, directory, tableData = defaultTestData(tableData=tableData)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableDataCompressionLength1Title = "Font Table Data Compressed Length Greater Than Original Length"
@@ -644,7 +657,7 @@ def makeTableDataOriginalLength1():
     assert cffEntry["origLength"] - shift > entry["compLength"]
     cffEntry["origLength"] -= shift
     header["totalSfntSize"] -= shift
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableDataOriginalLength1Title = "Original Length Less Than Decompressed Length"
@@ -661,7 +674,7 @@ def makeTableDataOriginalLength2():
     assert cffEntry["compLength"] < cffEntry["origLength"]
     cffEntry["origLength"] += shift
     header["totalSfntSize"] += shift
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableDataOriginalLength2Title = "Original Length Greater Than Decompressed Length"
@@ -675,11 +688,11 @@ makeTableDataOriginalLength2Credits = [dict(title="Tal Leming", role="author", l
 # no tables compressed
 
 def makeTableCompressionTest1():
-    tableData = deepcopy(sfntCFFTableData)
+    tableData = copyTableData(sfntCFFTableData)
     for tag, (origData, compData) in tableData.items():
         tableData[tag] = (origData, origData)
     header, directory, tableData = defaultTestData(tableData=tableData)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableCompressionTest1Title = "Font Table Data Not Compressed"
@@ -697,9 +710,9 @@ def makeTableCompressionTest2():
             continue
         assert len(compData) <= len(origData)
         if len(compData) == len(origData):
-            compTest = zlib.compress(origData)
+            compTest = compressData(origData)
             assert len(compTest) > len(origData)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableCompressionTest2Title = "Font Table Data Is Compressed When Possible"
@@ -709,7 +722,7 @@ makeTableCompressionTest2Credits = [dict(title="Tal Leming", role="author", link
 # not all possible tables are compressed
 
 def makeTableCompressionTest3():
-    tableData = deepcopy(sfntCFFTableData)
+    tableData = copyTableData(sfntCFFTableData)
     haveStoredCompressed = False
     for tag, (origData, compData) in tableData.items():
         if haveStoredCompressed and len(compData) < len(origData):
@@ -719,7 +732,7 @@ def makeTableCompressionTest3():
         tableData[tag] = (origData, compData)
     assert haveStoredCompressed
     header, directory, tableData = defaultTestData(tableData=tableData)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableCompressionTest3Title = "Not All Font Table Data Is Compressed When Possible"
@@ -729,7 +742,7 @@ makeTableCompressionTest3Credits = [dict(title="Tal Leming", role="author", link
 # varying compression levels
 
 def makeTableCompressionTest4():
-    tableData = deepcopy(sfntCFFTableData)
+    tableData = copyTableData(sfntCFFTableData)
     compressionLevels = set()
     for index, (tag, (origData, compData)) in enumerate(tableData.items()):
         if tag == "head":
@@ -739,7 +752,7 @@ def makeTableCompressionTest4():
         if index % 2:
             r = reversed(r)
         for level in r:
-            c = zlib.compress(origData, level)
+            c = compressData(origData, level)
             if len(c) < len(origData):
                 compData = c
                 compressionLevels.add(level)
@@ -747,7 +760,7 @@ def makeTableCompressionTest4():
         tableData[tag] = (origData, compData)
     assert len(compressionLevels) > 1
     header, directory, tableData = defaultTestData(tableData=tableData)
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableCompressionTest4Title = "Font Table Data Is Compressed At Different Levels"
@@ -771,7 +784,7 @@ def makeTableZlibCompressionTest1():
         madeBogusTableData = True
         break
     assert madeBogusTableData
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData)
+    data = packTestWOFF(header, directory, tableData)
     return data
 
 makeTableZlibCompressionTest1Title = "Font Table Data Invalid Compressed Data"
@@ -788,7 +801,7 @@ def makeMetadataCompression1():
     diff = header["metaOrigLength"] - header["metaLength"]
     header["length"] += diff
     header["metaLength"] = header["metaOrigLength"]
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata)
     return data
 
 makeMetadataCompression1Title = "Metadata Invalid Compression"
@@ -804,7 +817,7 @@ makeMetadataCompression1Credits = [dict(title="Tal Leming", role="author", link=
 def makeMetaOrigLengthTest1():
     header, directory, tableData, metadata = defaultTestData(metadata=testDataWOFFMetadata)
     header["metaOrigLength"] += 1
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata)
     return data
 
 makeMetaOrigLengthTest1Title = "Decompressed Metadata Length Less Than metaOrigLength"
@@ -816,7 +829,7 @@ makeMetaOrigLengthTest1Credits = [dict(title="Tal Leming", role="author", link="
 def makeMetaOrigLengthTest2():
     header, directory, tableData, metadata = defaultTestData(metadata=testDataWOFFMetadata)
     header["metaOrigLength"] -= 1
-    data = packTestHeader(header) + packTestDirectory(directory) + packTestTableData(directory, tableData) + packTestMetadata(metadata)
+    data = packTestWOFF(header, directory, tableData, metadata=metadata)
     return data
 
 makeMetaOrigLengthTest2Title = "Decompressed Metadata Length Greater Than metaOrigLength"
@@ -0,0 +1,28 @@
+"""
+Running the suite scripts in the current process.
+"""
+
+import os
+import sys
+import runpy
+from paths import generatorsDirectory
+
+suiteScripts = [
+    # name, script
+    ("format", "FormatTestCaseGenerator.py"),
+    ("useragent", "UserAgentTestCaseGenerator.py"),
+    ("authoringtool", "AuthoringToolTestCaseGenerator.py")
+]
+
+def runSuite(script, arguments=[]):
+    """
+    Run a suite script as if it was run from the command line
+    with *arguments*.
+    """
+    path = os.path.join(generatorsDirectory, script)
+    argv = sys.argv
+    sys.argv = [path] + list(arguments)
+    try:
+        runpy.run_path(path, run_name="__main__")
+    finally:
+        sys.argv = argv
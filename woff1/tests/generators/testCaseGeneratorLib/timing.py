@@ -0,0 +1,136 @@
+"""
+Timing of the test case generation.
+
+The functions that do the expensive parts of the generation are
+decorated with *timed* and a category. Nothing is recorded unless
+timing has been enabled with *enableTiming*, so the generators are
+not slowed down when they are run normally. When a timed function
+calls another timed function, the time of the inner call is only
+counted in the category of the inner function.
+
+The times are recorded for the current suite and the current case.
+The generator scripts set the current case as they build each one
+and time outside of a case is recorded for the suite itself.
+"""
+
+import functools
+from timeit import default_timer
+
+timingCategories = [
+    "extraction",
+    "copying",
+    "compression",
+    "checksum",
+    "html",
+    "write"
+]
+
+_enabled = [False]
+_records = {}
+_current = dict(suite=None, case=None, start=None)
+# the time spent in timed functions called by
+# each of the timed functions that are running
+_stack = []
+
+def enableTiming():
+    _enabled[0] = True
+    _current["start"] = default_timer()
+
+def disableTiming():
+    _switch(None, None)
+    _enabled[0] = False
+
+def clearTimings():
+    _records.clear()
+
+def _getRecord(suite, case):
+    key = (suite, case)
+    record = _records.get(key)
+    if record is None:
+        record = _records[key] = dict(total=0.0, categories={})
+    return record
+
+def _switch(suite, case):
+    if not _enabled[0]:
+        return
+    now = default_timer()
+    record = _getRecord(_current["suite"], _current["case"])
+    record["total"] += now - _current["start"]
+    _current["suite"] = suite
+    _current["case"] = case
+    _current["start"] = now
+
+def setCurrentSuite(suite):
+    """
+    Record the following time for *suite*.
+    """
+    _switch(suite, None)
+
+def setCurrentCase(case):
+    """
+    Record the following time for *case* in the current
+    suite. If *case* is None, the time is recorded for
+    the suite itself.
+    """
+    _switch(_current["suite"], case)
+
+def timed(category):
+    """
+    Decorate a function so that the time spent in
+    it is recorded in *category* when timing is enabled.
+    """
+    assert category in timingCategories
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled[0]:
+                return function(*args, **kwargs)
+            _stack.append(0.0)
+            start = default_timer()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = default_timer() - start
+                innerTime = _stack.pop()
+                categories = _getRecord(_current["suite"], _current["case"])["categories"]
+                categories[category] = categories.get(category, 0.0) + elapsed - innerTime
+                if _stack:
+                    _stack[-1] += elapsed
+        return wrapper
+    return decorator
+
+def getTimings():
+    """
+    Get the recorded times in seconds in this form:
+
+        {
+            suite : {
+                "total" : time,
+                "categories" : {category : time},
+                "cases" : {
+                    case : {
+                        "total" : time,
+                        "categories" : {category : time}
+                    }
+                }
+            }
+        }
+
+    The totals of the suites include their cases. Time
+    recorded before the first suite was set, such as
+    the loading of the default data, is in the suite
+    named "setup".
+    """
+    timings = {}
+    for (suite, case), record in _records.items():
+        if suite is None:
+            suite = "setup"
+        suiteTimings = timings.get(suite)
+        if suiteTimings is None:
+            suiteTimings = timings[suite] = dict(total=0.0, categories={}, cases={})
+        suiteTimings["total"] += record["total"]
+        for category, time in record["categories"].items():
+            suiteTimings["categories"][category] = suiteTimings["categories"].get(category, 0.0) + time
+        if case is not None:
+            suiteTimings["cases"][case] = dict(total=record["total"], categories=dict(record["categories"]))
+    return timings
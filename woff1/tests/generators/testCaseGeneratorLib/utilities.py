@@ -2,10 +2,61 @@
 Miscellaneous utilities.
 """
 
+import zlib
 import struct
+import hashlib
+from collections import OrderedDict
 import sstruct
-from fontTools.ttLib.sfnt import calcChecksum, getSearchRange,\
-    SFNTDirectoryEntry, sfntDirectoryFormat, sfntDirectorySize, sfntDirectoryEntryFormat, sfntDirectoryEntrySize
+from timing import timed
+
+# --------------
+# SFNT Directory
+# --------------
+
+# These are the same as in fontTools.ttLib.sfnt. They are defined
+# here so that fontTools is only imported when the resource fonts
+# are read, which is not needed when their data is cached.
+
+sfntDirectoryFormat = """
+    > # big endian
+    sfntVersion:    4s
+    numTables:      H    # number of tables
+    searchRange:    H    # (max2 <= numTables)*16
+    entrySelector:  H    # log2(max2 <= numTables)
+    rangeShift:     H    # numTables*16-searchRange
+"""
+
+sfntDirectorySize = sstruct.calcsize(sfntDirectoryFormat)
+
+sfntDirectoryEntryFormat = """
+    > # big endian
+    tag:            4s
+    checkSum:       L
+    offset:         L
+    length:         L
+"""
+
+sfntDirectoryEntrySize = sstruct.calcsize(sfntDirectoryEntryFormat)
+
+def getSearchRange(n):
+    """
+    Calculate searchRange, entrySelector and rangeShift
+    for an SFNT directory with *n* tables.
+    """
+    exponent = 0
+    while (2 ** (exponent + 1)) <= n:
+        exponent += 1
+    searchRange = (2 ** exponent) * 16
+    entrySelector = exponent
+    rangeShift = n * 16 - searchRange
+    return searchRange, entrySelector, rangeShift
+
+def packSFNTDirectoryEntry(entry):
+    """
+    Pack an SFNT directory *entry* dict with
+    tag, checksum, offset and length keys.
+    """
+    return struct.pack(">4sLLL", entry["tag"], entry["checksum"], entry["offset"], entry["length"])
 
 # -------
 # Padding
@@ -49,6 +100,7 @@ def calcTableChecksum(tag, data):
         checksum = calcChecksum(data)
     return checksum & 0xffffffff
 
+@timed("checksum")
 def calcHeadCheckSumAdjustment(directory, tableData, flavor=None):
     """
     Set the checkSumAdjustment in the head table data.
@@ -81,6 +133,7 @@ def calcHeadCheckSumAdjustment(directory, tableData, flavor=None):
     newHeadTableData = sfntTableData["head"]
     tableData["head"] = (newHeadTableData, newHeadTableData)
 
+@timed("checksum")
 def calcHeadCheckSumAdjustmentSFNT(directory, tableData, flavor=None):
     """
     Set the checkSumAdjustment in the head table data.
@@ -107,12 +160,7 @@ def calcHeadCheckSumAdjustmentSFNT(directory, tableData, flavor=None):
     # make a SFNT table directory
     directory = [(entry["tag"], entry) for entry in directory]
     for tag, entry in sorted(directory):
-        sfntEntry = SFNTDirectoryEntry()
-        sfntEntry.tag = entry["tag"]
-        sfntEntry.checkSum = entry["checksum"]
-        sfntEntry.offset = entry["offset"]
-        sfntEntry.length = entry["length"]
-        sfntData += sfntEntry.toString()
+        sfntData += packSFNTDirectoryEntry(entry)
     # calculate the checksum
     sfntDataChecksum = calcChecksum(sfntData)
     # gather all of the checksums
@@ -128,6 +176,43 @@ def calcHeadCheckSumAdjustmentSFNT(directory, tableData, flavor=None):
     newHeadTableData += headTableData[12:]
     tableData["head"] = newHeadTableData
 
+# -----------
+# Compression
+# -----------
+
+# The same table and metadata data is compressed by many
+# test cases. The results are kept in a process wide cache
+# keyed by the hash of the data and the compression level.
+# The least recently used results are dropped when the
+# total size of the cached results exceeds this limit.
+
+compressionCacheMaxSize = 32 * 1024 * 1024
+
+_compressionCache = OrderedDict()
+_compressionCacheSize = [0]
+
+@timed("compression")
+def compressData(data, level=6):
+    """
+    Compress *data* with zlib at *level*. This returns
+    the same data as zlib.compress(data, level).
+    """
+    key = (hashlib.sha1(data).digest(), len(data), level)
+    compData = _compressionCache.pop(key, None)
+    if compData is None:
+        compData = zlib.compress(data, level)
+        _compressionCacheSize[0] += len(compData)
+        while _compressionCacheSize[0] > compressionCacheMaxSize and _compressionCache:
+            oldKey, oldCompData = _compressionCache.popitem(last=False)
+            _compressionCacheSize[0] -= len(oldCompData)
+    # (re)insert as the most recently used
+    _compressionCache[key] = compData
+    return compData
+
+def clearCompressionCache():
+    _compressionCache.clear()
+    _compressionCacheSize[0] = 0
+
 # --------
 # Metadata
 # --------
@@ -2,8 +2,9 @@
 WOFF data packers.
 """
 
+import struct
 import sstruct
-from utilities import padData, calcHeadCheckSumAdjustment
+from utilities import padData, calcPaddingLength, calcHeadCheckSumAdjustment
 
 # ------------------
 # struct Description
@@ -45,11 +46,11 @@ def packTestHeader(header):
     return sstruct.pack(woffHeaderFormat, header)
 
 def packTestDirectory(directory):
-    data = ""
+    data = []
     directory = [(entry["tag"], entry) for entry in directory]
     for tag, table in sorted(directory):
-        data += sstruct.pack(woffDirectoryEntryFormat, table)
-    return data
+        data.append(sstruct.pack(woffDirectoryEntryFormat, table))
+    return "".join(data)
 
 def packTestTableData(directory, tableData, calcCheckSum=True):
     if calcCheckSum:
@@ -69,3 +70,94 @@ def packTestMetadata((origMetadata, compMetadata), havePrivateData=False):
 
 def packTestPrivateData(privateData):
     return privateData
+
+def packTestWOFF(header, directory, tableData, metadata=None, privateData=None):
+    """
+    Pack the header, directory, table data, metadata and private
+    data in that order with a WOFFBuilder. The metadata is padded
+    when private data follows it.
+    """
+    # the header length may be deliberately wrong
+    # so the buffer length is measured from the parts
+    length = woffHeaderSize + (woffDirectoryEntrySize * len(directory))
+    for entry in directory:
+        origData, compData = tableData[entry["tag"]]
+        length += len(compData) + calcPaddingLength(len(compData))
+    if metadata is not None:
+        length += len(metadata[1])
+        if privateData is not None:
+            length += calcPaddingLength(len(metadata[1]))
+    if privateData is not None:
+        length += len(privateData)
+    builder = WOFFBuilder(length)
+    builder.addHeader(header)
+    builder.addDirectory(directory)
+    builder.addTableData(directory, tableData)
+    if metadata is not None:
+        builder.addMetadata(metadata, havePrivateData=privateData is not None)
+    if privateData is not None:
+        builder.addPrivateData(privateData)
+    return builder.getData()
+
+# -------
+# Builder
+# -------
+
+woffHeaderStructFormat, woffHeaderNames = sstruct.getformat(woffHeaderFormat)[:2]
+woffDirectoryEntryStructFormat, woffDirectoryEntryNames = sstruct.getformat(woffDirectoryEntryFormat)[:2]
+
+class WOFFBuilder(object):
+
+    """
+    Collects the parts of a WOFF in a single buffer of *length*
+    bytes instead of concatenating strings. The header and the
+    directory entries are packed directly into the buffer and
+    the buffer starts out filled with null bytes, so the padding
+    is skipped rather than written.
+    """
+
+    def __init__(self, length):
+        self._buffer = bytearray(length)
+        self.offset = 0
+
+    def _write(self, data):
+        end = self.offset + len(data)
+        self._buffer[self.offset:end] = data
+        self.offset = end
+
+    def _skipPadding(self, length):
+        self.offset += calcPaddingLength(length)
+
+    def addHeader(self, header):
+        values = [header[name] for name in woffHeaderNames]
+        struct.pack_into(woffHeaderStructFormat, self._buffer, self.offset, *values)
+        self.offset += woffHeaderSize
+
+    def addDirectory(self, directory):
+        directory = [(entry["tag"], entry) for entry in directory]
+        for tag, table in sorted(directory):
+            values = [table[name] for name in woffDirectoryEntryNames]
+            struct.pack_into(woffDirectoryEntryStructFormat, self._buffer, self.offset, *values)
+            self.offset += woffDirectoryEntrySize
+
+    def addTableData(self, directory, tableData, calcCheckSum=True):
+        if calcCheckSum:
+            calcHeadCheckSumAdjustment(directory, tableData)
+        for entry in directory:
+            origData, compData = tableData[entry["tag"]]
+            self._write(compData)
+            self._skipPadding(len(compData))
+
+    def addMetadata(self, (origMetadata, compMetadata), havePrivateData=False):
+        self._write(compMetadata)
+        if havePrivateData:
+            self._skipPadding(len(compMetadata))
+
+    def addPrivateData(self, privateData):
+        self._write(privateData)
+
+    def getData(self):
+        assert self.offset == len(self._buffer), "The parts do not fill the buffer."
+        # the cases slice, concatenate and hash the
+        # data as a string, so this is the one copy
+        return str(self._buffer)
@@ -0,0 +1,86 @@
+"""
+Reproducible zip archives of the test case files.
+
+The members are deflated in a pool of threads and written in sorted
+order with a fixed timestamp, so the same files always produce the
+same archive. The member data is passed in directly so files that are
+already in memory do not need to be read again.
+"""
+
+import zlib
+import struct
+from cStringIO import StringIO
+from multiprocessing.pool import ThreadPool
+from buildManifest import writeFile
+from timing import timed
+
+# 1980-01-01 00:00:00, the earliest date a zip can store
+zipDate = (1 << 5) | 1
+zipTime = 0
+
+# a regular file with -rw-r--r-- in the upper two bytes.
+# this is the Unix mode, so the archive is made on Unix.
+zipExternalAttributes = 0100644 << 16
+
+zipLocalHeaderFormat = "<LHHHHHLLLHH"
+zipLocalHeaderSignature = 0x04034b50
+zipCentralHeaderFormat = "<LHHHHHHLLLHHHHHLL"
+zipCentralHeaderSignature = 0x02014b50
+zipEndFormat = "<LHHHHLLH"
+zipEndSignature = 0x06054b50
+zipVersion = 20
+zipVersionMadeBy = (3 << 8) | zipVersion
+zipDeflated = 8
+
+def deflateMember(data):
+    """
+    Get the CRC-32 and the raw deflated form of *data*.
+    """
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    compData = compressor.compress(data) + compressor.flush()
+    return zlib.crc32(data) & 0xffffffff, compData
+
+@timed("compression")
+def packZip(members, jobs=None):
+    """
+    Pack *members*, a list of (name, data) tuples, into zip data.
+    The members are sorted by name. The data is compressed in a
+    pool of *jobs* threads unless *jobs* is 1.
+    """
+    members = sorted(members)
+    datas = [data for name, data in members]
+    if jobs == 1:
+        deflated = [deflateMember(data) for data in datas]
+    else:
+        pool = ThreadPool(jobs)
+        try:
+            deflated = pool.map(deflateMember, datas)
+        finally:
+            pool.close()
+            pool.join()
+    stream = StringIO()
+    centralDirectory = []
+    for (name, data), (crc, compData) in zip(members, deflated):
+        offset = stream.tell()
+        stream.write(struct.pack(zipLocalHeaderFormat,
+            zipLocalHeaderSignature, zipVersion, 0, zipDeflated, zipTime, zipDate,
+            crc, len(compData), len(data), len(name), 0))
+        stream.write(name)
+        stream.write(compData)
+        centralDirectory.append(struct.pack(zipCentralHeaderFormat,
+            zipCentralHeaderSignature, zipVersionMadeBy, zipVersion, 0, zipDeflated, zipTime, zipDate,
+            crc, len(compData), len(data), len(name), 0, 0, 0, 0, zipExternalAttributes, offset) + name)
+    centralDirectoryOffset = stream.tell()
+    centralDirectory = "".join(centralDirectory)
+    stream.write(centralDirectory)
+    stream.write(struct.pack(zipEndFormat,
+        zipEndSignature, 0, 0, len(members), len(members),
+        len(centralDirectory), centralDirectoryOffset, 0))
+    return stream.getvalue()
+
+def writeZip(path, members, jobs=None):
+    """
+    Write *members* to a zip at *path*. The file is only
+    written when the archive changed. See packZip.
+    """
+    return writeFile(path, packZip(members, jobs=jobs))
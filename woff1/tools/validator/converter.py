@@ -0,0 +1,592 @@
+#! /usr/bin/env python
+
+"""
+A module for converting between WOFF and SFNT files.
+*decodeWOFF* writes the SFNT for a WOFF read from a stream
+to another stream, one table at a time. *encodeSFNT* writes
+the WOFF for an SFNT, compressing the tables concurrently.
+*decodeWOFFData* and *encodeSFNTData* do the same with data
+in memory.
+
+This can also be used as a command line tool for converting fonts.
+"""
+
+# import
+
+from __future__ import division, print_function
+import os
+import sys
+import zlib
+import json
+import hashlib
+import optparse
+from io import BytesIO
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from validator import structPack, structUnpack, headerFormat, headerSize,\
+    directoryFormat, directorySize, sfntHeaderFormat, sfntHeaderSize,\
+    sfntDirectoryEntryFormat, sfntDirectoryEntrySize, getSearchRange,\
+    calcPaddingLength, findUniqueFileName
+
+# Data is read, inflated and written in pieces of this size.
+# This bounds the memory used for a table of any size.
+chunkSize = 65536
+
+
+class WOFFDecodeError(ValueError): pass
+
+class WOFFEncodeError(ValueError): pass
+
+
+# ---------------
+# Support: Reader
+# ---------------
+
+class _StreamReader(object):
+
+    """
+    Forward-only reading from a binary stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+
+    def read(self, length):
+        data = self.stream.read(length)
+        self.position += len(data)
+        return data
+
+    def readExactly(self, length, what, error=WOFFDecodeError):
+        chunks = []
+        remaining = length
+        while remaining:
+            chunk = self.read(min(chunkSize, remaining))
+            if not chunk:
+                raise error("The %s is not complete." % what)
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return "".encode().join(chunks)
+
+    def skipTo(self, position, what, error=WOFFDecodeError):
+        if position < self.position:
+            raise error("The %s overlaps the preceding data." % what)
+        while self.position < position:
+            chunk = self.read(min(chunkSize, position - self.position))
+            if not chunk:
+                raise error("The %s is located after the end of the file." % what)
+
+    def iterChunks(self, length, what, error=WOFFDecodeError):
+        remaining = length
+        while remaining:
+            chunk = self.read(min(chunkSize, remaining))
+            if not chunk:
+                raise error("The %s is not complete." % what)
+            remaining -= len(chunk)
+            yield chunk
+
+
+# --------------------
+# Support: Directories
+# --------------------
+
+def unpackWOFFDirectory(reader):
+    """
+    Read the WOFF header and table directory from *reader*.
+    """
+    data = reader.readExactly(headerSize, "header")
+    header = structUnpack(headerFormat, data)[0]
+    if header["signature"] != "wOFF".encode():
+        raise WOFFDecodeError("Invalid signature in header.")
+    if not header["numTables"]:
+        raise WOFFDecodeError("The header does not define any tables.")
+    data = reader.readExactly(directorySize * header["numTables"], "table directory")
+    directory = []
+    for index in range(header["numTables"]):
+        entry, data = structUnpack(directoryFormat, data)
+        directory.append(entry)
+    return header, directory
+
+def packSFNTDirectory(flavor, directory):
+    """
+    Pack the SFNT header and table directory for the WOFF
+    *directory*. The tables are placed in the order of their
+    WOFF offsets and the directory is sorted by tag.
+    """
+    numTables = len(directory)
+    searchRange, entrySelector, rangeShift = getSearchRange(numTables)
+    sfntHeaderData = dict(
+        sfntVersion=flavor,
+        numTables=numTables,
+        searchRange=searchRange,
+        entrySelector=entrySelector,
+        rangeShift=rangeShift
+    )
+    data = structPack(sfntHeaderFormat, sfntHeaderData)
+    offset = sfntHeaderSize + (sfntDirectoryEntrySize * numTables)
+    sfntEntries = []
+    for entry in sorted(directory, key=lambda entry: entry["offset"]):
+        length = entry["origLength"]
+        sfntEntries.append(dict(
+            tag=entry["tag"],
+            checkSum=entry["origChecksum"],
+            offset=offset,
+            length=length
+        ))
+        offset += length + calcPaddingLength(length)
+    for sfntEntry in sorted(sfntEntries, key=lambda entry: entry["tag"]):
+        data += structPack(sfntDirectoryEntryFormat, sfntEntry)
+    return data
+
+def unpackSFNTDirectory(reader):
+    """
+    Read the SFNT header and table directory from *reader*.
+    """
+    data = reader.readExactly(sfntHeaderSize, "header", WOFFEncodeError)
+    header = structUnpack(sfntHeaderFormat, data)[0]
+    if header["sfntVersion"] not in ("OTTO".encode(), "\0\1\0\0".encode(), "true".encode()):
+        raise WOFFEncodeError("Unknown SFNT version in header.")
+    if not header["numTables"]:
+        raise WOFFEncodeError("The header does not define any tables.")
+    data = reader.readExactly(sfntDirectoryEntrySize * header["numTables"], "table directory", WOFFEncodeError)
+    directory = []
+    for index in range(header["numTables"]):
+        entry, data = structUnpack(sfntDirectoryEntryFormat, data)
+        directory.append(entry)
+    return header, directory
+
+def packWOFFDirectory(flavor, directory, compressedData, majorVersion=0, minorVersion=0):
+    """
+    Pack the WOFF header and table directory for the SFNT
+    *directory*. *compressedData* is a dict of tags and the
+    data that will be stored for each table. The tables are
+    placed in the order of their SFNT offsets and the directory
+    is sorted by tag. This returns the packed data and the
+    tags in the order that the tables must be written.
+    """
+    numTables = len(directory)
+    totalSfntSize = sfntHeaderSize + (sfntDirectoryEntrySize * numTables)
+    offset = headerSize + (directorySize * numTables)
+    entries = []
+    tableOrder = []
+    for entry in sorted(directory, key=lambda entry: entry["offset"]):
+        tag = entry["tag"]
+        compLength = len(compressedData[tag])
+        entries.append(dict(
+            tag=tag,
+            offset=offset,
+            compLength=compLength,
+            origLength=entry["length"],
+            origChecksum=entry["checkSum"]
+        ))
+        tableOrder.append(tag)
+        offset += compLength + calcPaddingLength(compLength)
+        totalSfntSize += entry["length"] + calcPaddingLength(entry["length"])
+    header = dict(
+        signature="wOFF".encode(),
+        flavor=flavor,
+        length=offset,
+        numTables=numTables,
+        reserved=0,
+        totalSfntSize=totalSfntSize,
+        majorVersion=majorVersion,
+        minorVersion=minorVersion,
+        metaOffset=0,
+        metaLength=0,
+        metaOrigLength=0,
+        privOffset=0,
+        privLength=0
+    )
+    data = structPack(headerFormat, header)
+    for entry in sorted(entries, key=lambda entry: entry["tag"]):
+        data += structPack(directoryFormat, entry)
+    return data, tableOrder
+
+
+# ----------------
+# Support: Decoder
+# ----------------
+
+def _decodeTable(reader, entry, outStream):
+    """
+    Write the data for the table in *entry* to *outStream*.
+    This returns the number of bytes written, including padding.
+    """
+    tag = entry["tag"]
+    what = "data for the %s table" % repr(tag)
+    compLength = entry["compLength"]
+    origLength = entry["origLength"]
+    if compLength > origLength:
+        raise WOFFDecodeError("The compressed length of the %s table is larger than the original length." % repr(tag))
+    written = 0
+    # stored
+    if compLength == origLength:
+        for chunk in reader.iterChunks(compLength, what):
+            outStream.write(chunk)
+            written += len(chunk)
+    # compressed
+    else:
+        decompressor = zlib.decompressobj()
+        try:
+            for chunk in reader.iterChunks(compLength, what):
+                while chunk:
+                    # never inflate more than a chunk at a time
+                    data = decompressor.decompress(chunk, chunkSize)
+                    chunk = decompressor.unconsumed_tail
+                    written += len(data)
+                    if written > origLength:
+                        break
+                    outStream.write(data)
+            data = decompressor.flush()
+        except zlib.error:
+            raise WOFFDecodeError("The %s table could not be decompressed." % repr(tag))
+        written += len(data)
+        if written <= origLength:
+            outStream.write(data)
+    if written != origLength:
+        raise WOFFDecodeError("The decompressed length of the %s table does not match the original length." % repr(tag))
+    padding = calcPaddingLength(origLength)
+    outStream.write("\0".encode() * padding)
+    return written + padding
+
+
+# ----------------
+# Support: Encoder
+# ----------------
+
+def compressTable(data, level=6):
+    """
+    Compress table *data*. The spec requires the table to
+    be stored uncompressed if compressing does not make it
+    smaller, so in that case *data* is returned.
+    """
+    compressedData = zlib.compress(data, level)
+    if len(compressedData) >= len(data):
+        return data
+    return compressedData
+
+def _compressTables(reader, directory, compress, threads=None):
+    """
+    Read the tables in *directory* from *reader* and pass each one
+    to *compress* in a pool of *threads* as soon as it has been
+    read. zlib releases the GIL while it works, so compression runs
+    concurrently. Reading waits while as many tables as there are
+    threads are waiting to be compressed, so only those tables are
+    held uncompressed. This returns a dict of tags and compressed
+    data.
+    """
+    compressedData = {}
+    if threads is None:
+        threads = cpu_count()
+    pool = None
+    if threads > 1 and len(directory) > 1:
+        pool = ThreadPool(threads)
+    pending = []
+    try:
+        for entry in sorted(directory, key=lambda entry: entry["offset"]):
+            tag = entry["tag"]
+            if tag in compressedData:
+                raise WOFFEncodeError("The %s table is defined more than once." % repr(tag))
+            what = "data for the %s table" % repr(tag)
+            reader.skipTo(entry["offset"], what, WOFFEncodeError)
+            data = reader.readExactly(entry["length"], what, WOFFEncodeError)
+            if pool is None:
+                compressedData[tag] = compress(data)
+                continue
+            compressedData[tag] = None
+            pending.append((tag, pool.apply_async(compress, (data,))))
+            del data
+            if len(pending) >= threads:
+                tag, result = pending.pop(0)
+                compressedData[tag] = result.get()
+        for tag, result in pending:
+            compressedData[tag] = result.get()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return compressedData
+
+
+# ---------------
+# Support: Tuning
+# ---------------
+
+# The zlib settings that are tried for each table when tuning.
+# The strategies that are not available in this version of
+# Python are skipped. wbits must be 9 or more since the WOFF
+# must be readable by any zlib decompressor and the window
+# size can't be larger than 15 in a zlib stream.
+tuningLevels = [6, 9]
+tuningStrategies = [
+    getattr(zlib, name) for name in ("Z_DEFAULT_STRATEGY", "Z_FILTERED", "Z_HUFFMAN_ONLY", "Z_RLE", "Z_FIXED")
+    if hasattr(zlib, name)
+]
+tuningWBits = [9, 12, 15]
+tuningMemLevels = [8, 9]
+
+def getTuningCandidates():
+    """
+    Get the (level, wbits, memLevel, strategy)
+    combinations that are tried when tuning.
+    """
+    candidates = []
+    for level in tuningLevels:
+        for strategy in tuningStrategies:
+            for wbits in tuningWBits:
+                for memLevel in tuningMemLevels:
+                    candidates.append((level, wbits, memLevel, strategy))
+    return candidates
+
+def compressWithParameters(data, parameters):
+    """
+    Compress *data* into a zlib stream with the
+    (level, wbits, memLevel, strategy) *parameters*.
+    """
+    level, wbits, memLevel, strategy = parameters
+    compressor = zlib.compressobj(level, zlib.DEFLATED, wbits, memLevel, strategy)
+    return compressor.compress(data) + compressor.flush()
+
+def getTableHash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+class TuningCache(object):
+
+    """
+    The best compression parameters found for tables, keyed by
+    a hash of the table data. If a *path* is given, the cache
+    is read from there and *save* writes it back as JSON.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.parameters = {}
+        if path is not None and os.path.exists(path):
+            f = open(path, "r")
+            try:
+                data = json.load(f)
+            finally:
+                f.close()
+            for key, parameters in data.get("tables", {}).items():
+                self.parameters[key] = tuple(parameters)
+
+    def get(self, key):
+        return self.parameters.get(key)
+
+    def set(self, key, parameters):
+        self.parameters[key] = tuple(parameters)
+
+    def save(self, path=None):
+        if path is None:
+            path = self.path
+        data = dict(tables=dict([(key, list(parameters)) for key, parameters in self.parameters.items()]))
+        f = open(path, "w")
+        try:
+            json.dump(data, f, sort_keys=True, indent=0)
+        finally:
+            f.close()
+
+
+def tuneTable(data, cache=None):
+    """
+    Compress table *data* with every tuning candidate and return
+    the smallest result. If the table is found in the optional
+    *TuningCache* given as *cache*, it is only compressed with the
+    cached parameters. Otherwise the winning parameters are stored
+    in *cache*. As with *compressTable*, *data* is returned if
+    compressing does not make it smaller.
+    """
+    key = getTableHash(data)
+    candidates = None
+    if cache is not None:
+        parameters = cache.get(key)
+        if parameters is not None:
+            candidates = [parameters]
+    if candidates is None:
+        candidates = getTuningCandidates()
+    best = None
+    for parameters in candidates:
+        result = compressWithParameters(data, parameters)
+        # ties go to the earlier candidate
+        if best is None or len(result) < len(best[1]):
+            best = (parameters, result)
+    parameters, result = best
+    if cache is not None:
+        cache.set(key, parameters)
+    if len(result) >= len(data):
+        return data
+    return result
+
+
+# ---------------
+# Public Function
+# ---------------
+
+def decodeWOFF(inStream, outStream):
+    """
+    Read a WOFF from the binary stream *inStream* and write the
+    SFNT to the binary stream *outStream*. The input is only read
+    forward, so it does not need to be seekable. The table data
+    is processed in pieces, so the memory used does not depend on
+    the size of the tables. This returns the number of bytes
+    written. A *WOFFDecodeError* is raised if the WOFF can not
+    be decoded.
+    """
+    reader = _StreamReader(inStream)
+    header, directory = unpackWOFFDirectory(reader)
+    sfntDirectoryData = packSFNTDirectory(header["flavor"], directory)
+    outStream.write(sfntDirectoryData)
+    written = len(sfntDirectoryData)
+    for entry in sorted(directory, key=lambda entry: entry["offset"]):
+        reader.skipTo(entry["offset"], "data for the %s table" % repr(entry["tag"]))
+        written += _decodeTable(reader, entry, outStream)
+    return written
+
+def decodeWOFFData(data):
+    """
+    Decode the WOFF *data* and return the SFNT data.
+    """
+    outStream = BytesIO()
+    decodeWOFF(BytesIO(data), outStream)
+    return outStream.getvalue()
+
+def encodeSFNT(inStream, outStream, threads=None, majorVersion=0, minorVersion=0, tune=False, tuningCache=None):
+    """
+    Read an SFNT from the binary stream *inStream* and write the
+    WOFF to the binary stream *outStream*. The input is only read
+    forward. The tables are compressed concurrently in a pool of
+    *threads* (the default is one per CPU) and each table is stored
+    uncompressed if compressing does not make it smaller. Each table
+    is compressed as soon as it has been read, so only the tables
+    waiting for a thread are held uncompressed. The WOFF directory
+    needs the compressed lengths, so the compressed tables are held
+    in memory but the WOFF is written a table at a time.
+    *majorVersion* and *minorVersion* are the font version for the
+    WOFF header. If *tune* is True, several zlib levels, strategies,
+    window sizes and memory levels are tried for each table and the
+    smallest result is kept. The winning parameters are stored in
+    the optional *TuningCache* given as *tuningCache* so that the
+    same table is not tuned again. This returns the number of bytes
+    written. A *WOFFEncodeError* is raised if the SFNT can not be
+    encoded.
+    """
+    reader = _StreamReader(inStream)
+    header, directory = unpackSFNTDirectory(reader)
+    # read and compress
+    if tune:
+        compress = lambda data: tuneTable(data, tuningCache)
+    else:
+        compress = compressTable
+    compressedData = _compressTables(reader, directory, compress, threads)
+    # write
+    data, tableOrder = packWOFFDirectory(header["sfntVersion"], directory, compressedData, majorVersion, minorVersion)
+    outStream.write(data)
+    written = len(data)
+    for tag in tableOrder:
+        data = compressedData.pop(tag)
+        outStream.write(data)
+        padding = calcPaddingLength(len(data))
+        outStream.write("\0".encode() * padding)
+        written += len(data) + padding
+    return written
+
+def encodeSFNTData(data, threads=None, majorVersion=0, minorVersion=0, tune=False, tuningCache=None):
+    """
+    Encode the SFNT *data* and return the WOFF data.
+    """
+    outStream = BytesIO()
+    encodeSFNT(BytesIO(data), outStream, threads, majorVersion, minorVersion, tune, tuningCache)
+    return outStream.getvalue()
+
+def getSFNTExtension(flavor):
+    """
+    Get the file extension for an SFNT with *flavor*.
+    """
+    if flavor == "OTTO".encode():
+        return ".otf"
+    return ".ttf"
+
+
+# --------------------
+# Command Line Behvior
+# --------------------
+
+usage = "%prog [options] fontpath1 fontpath2"
+
+description = """This tool converts one or more WOFF
+files to SFNT files and SFNT files to WOFF files. The
+converted files are written next to the original files
+unless an output directory is given.
+"""
+
+def _convertFont(fontPath, directory, options):
+    """
+    Convert the font at *fontPath* in the direction given
+    by its signature and return the path to the written file.
+    """
+    fileName = os.path.splitext(os.path.basename(fontPath))[0]
+    inStream = open(fontPath, "rb")
+    try:
+        data = inStream.read(headerSize)
+        inStream.seek(0)
+        if data[:4] == "wOFF".encode():
+            if len(data) < headerSize:
+                raise WOFFDecodeError("The header is not complete.")
+            header = structUnpack(headerFormat, data)[0]
+            extension = getSFNTExtension(header["flavor"])
+            convert = decodeWOFF
+            kwargs = {}
+        else:
+            extension = ".woff"
+            convert = encodeSFNT
+            kwargs = dict(threads=options.threads, tune=options.tune, tuningCache=options.tuningCache)
+        outputPath = os.path.join(directory, fileName + extension)
+        outputPath = findUniqueFileName(outputPath)
+        outStream = open(outputPath, "wb")
+        try:
+            convert(inStream, outStream, **kwargs)
+        except (WOFFDecodeError, WOFFEncodeError):
+            outStream.close()
+            os.remove(outputPath)
+            raise
+        outStream.close()
+    finally:
+        inStream.close()
+    return outputPath
+
+def main():
+    parser = optparse.OptionParser(usage=usage, description=description, version="%prog 0.1beta")
+    parser.add_option("-d", dest="outputDirectory", help="Output directory. The default is to output the font into the same directory as the original file.")
+    parser.add_option("-j", dest="threads", type="int", help="Number of threads used to compress the tables. The default is one per CPU.")
+    parser.add_option("--tune", dest="tune", action="store_true", help="Try several compression settings for each table and keep the smallest.")
+    parser.add_option("--tuning-cache", dest="tuningCachePath", help="JSON file for caching the best compression settings for each table. This implies --tune.")
+    parser.set_defaults(tune=False)
+    (options, args) = parser.parse_args()
+    options.tuningCache = None
+    if options.tuningCachePath is not None:
+        options.tune = True
+        options.tuningCache = TuningCache(options.tuningCachePath)
+    outputDirectory = options.outputDirectory
+    if outputDirectory is not None and not os.path.exists(outputDirectory):
+        print("Directory does not exist:", outputDirectory)
+        sys.exit()
+    for fontPath in args:
+        if not os.path.exists(fontPath):
+            print("File does not exist:", fontPath)
+            sys.exit()
+        print("Converting: %s..." % fontPath)
+        directory = outputDirectory
+        if directory is None:
+            directory = os.path.dirname(fontPath)
+        try:
+            outputPath = _convertFont(fontPath, directory, options)
+        except (WOFFDecodeError, WOFFEncodeError) as e:
+            print("Could not convert: %s" % e)
+            continue
+        print("Wrote font to: %s" % outputPath)
+    if options.tuningCache is not None:
+        options.tuningCache.save()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,704 @@
+#! /usr/bin/env python
+
+"""
+A mutation fuzzer for the validator. The seed corpus is the WOFF
+files written by the test case generators: the Format suite and
+the UserAgent suite resources, which are built from the cases in
+sharedCases.py. Each run mutates a seed, validates the result with
+*validateBytes* in-process and records the runs that raise an
+exception, run past the timeout or use too much memory.
+
+The mutations change header fields, directory entries, zlib streams,
+the metadata XML and raw bytes. The input for a run is derived from
+the fuzzer seed and the run number only, so any finding can be
+reproduced with *makeCase*. The runs are spread over a pool of
+processes.
+
+This can also be used as a command line tool.
+"""
+
+# import
+
+from __future__ import division, print_function
+import os
+import sys
+import time
+import zlib
+import struct
+import random
+import signal
+import optparse
+import traceback
+import multiprocessing
+from validator import validateBytes, headerFormat, headerSize, directoryFormat, directorySize
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    xrange
+except NameError:
+    xrange = range
+
+toolDirectory = os.path.dirname(os.path.abspath(__file__))
+testsDirectory = os.path.join(os.path.dirname(os.path.dirname(toolDirectory)), "tests")
+defaultSeedPaths = [
+    os.path.join(testsDirectory, "Format", "Tests", "xhtml1"),
+    os.path.join(testsDirectory, "UserAgent", "Tests", "xhtml1", "resources")
+]
+
+
+# -------------
+# Support: Data
+# -------------
+
+def _getFieldLayout(format):
+    """
+    Get a list of (name, struct format, offset)
+    for the fields in a validator *format*.
+    """
+    layout = []
+    offset = 0
+    for line in format.strip().splitlines():
+        name, code = [part.strip() for part in line.split(":")]
+        layout.append((name, code, offset))
+        offset += struct.calcsize(">" + code)
+    return layout
+
+headerLayout = _getFieldLayout(headerFormat)
+headerOffsets = dict([(name, offset) for name, code, offset in headerLayout])
+directoryLayout = _getFieldLayout(directoryFormat)
+directoryOffsets = dict([(name, offset) for name, code, offset in directoryLayout])
+
+def getField(data, offset, code):
+    return struct.unpack_from(">" + code, data, offset)[0]
+
+def setField(data, offset, code, value):
+    struct.pack_into(">" + code, data, offset, value)
+
+def getHeaderField(data, name):
+    return getField(data, headerOffsets[name], "L")
+
+def setHeaderField(data, name, value):
+    setField(data, headerOffsets[name], "L", value)
+
+def getDirectoryEntryOffsets(data):
+    """
+    Get the offsets of the directory entries that are
+    complete in *data*.
+    """
+    numTables = getField(data, headerOffsets["numTables"], "H")
+    numTables = min(numTables, (len(data) - headerSize) // directorySize)
+    return [headerSize + (index * directorySize) for index in range(numTables)]
+
+def getEntryField(data, entryOffset, name):
+    return getField(data, entryOffset + directoryOffsets[name], "L")
+
+def setEntryField(data, entryOffset, name, value):
+    setField(data, entryOffset + directoryOffsets[name], "L", value)
+
+def replaceBlock(data, offset, length, block):
+    """
+    Replace the *length* bytes at *offset* in *data* with *block*
+    padded to four bytes. The offsets of the tables, the metadata
+    and the private data after the block are moved and the length
+    in the header is updated. This returns the new data.
+    """
+    oldEnd = offset + length
+    oldEnd += (4 - (oldEnd % 4)) % 4
+    oldEnd = min(oldEnd, len(data))
+    block = bytearray(block)
+    block += bytearray((4 - (len(block) % 4)) % 4)
+    delta = len(block) - (oldEnd - offset)
+    newData = data[:offset] + block + data[oldEnd:]
+    for entryOffset in getDirectoryEntryOffsets(newData):
+        tableOffset = getEntryField(newData, entryOffset, "offset")
+        if tableOffset > offset:
+            setEntryField(newData, entryOffset, "offset", tableOffset + delta)
+    for name in ("metaOffset", "privOffset"):
+        blockOffset = getHeaderField(newData, name)
+        if blockOffset > offset:
+            setHeaderField(newData, name, blockOffset + delta)
+    setHeaderField(newData, "length", len(newData))
+    return newData
+
+def _getCompressedBlocks(data):
+    """
+    Get a list of (kind, entry offset, block offset, block length)
+    for the compressed tables and the metadata in *data*. The entry
+    offset is None for the metadata.
+    """
+    blocks = []
+    for entryOffset in getDirectoryEntryOffsets(data):
+        compLength = getEntryField(data, entryOffset, "compLength")
+        origLength = getEntryField(data, entryOffset, "origLength")
+        tableOffset = getEntryField(data, entryOffset, "offset")
+        if compLength < origLength and tableOffset + compLength <= len(data):
+            blocks.append(("table", entryOffset, tableOffset, compLength))
+    metaOffset = getHeaderField(data, "metaOffset")
+    metaLength = getHeaderField(data, "metaLength")
+    if metaOffset and metaLength and metaOffset + metaLength <= len(data):
+        blocks.append(("metadata", None, metaOffset, metaLength))
+    return blocks
+
+
+# ------------------
+# Support: Mutations
+# ------------------
+
+# Each mutator takes the data as a bytearray and a random
+# number generator. It returns the mutated data and a short
+# description of the mutation, or None if the mutation does
+# not apply to the data.
+
+def _getInterestingValue(code, value, dataLength, rand):
+    if code == "4s":
+        return rand.choice([b"wOFF", b"wOF2", b"OTTO", b"\0\1\0\0", b"true", b"\0\0\0\0", bytes(bytearray([rand.randrange(256) for i in range(4)]))])
+    if code == "H":
+        maximum = 0xffff
+    else:
+        maximum = 0xffffffff
+    candidates = [
+        0, 1, 2, 3, 4,
+        maximum, maximum - 3, maximum >> 1, (maximum >> 1) + 1,
+        value + 1, value - 1, value + 4, value * 2, value // 2,
+        dataLength, dataLength - 1, dataLength + 1, dataLength - headerSize,
+        rand.randrange(maximum + 1)
+    ]
+    return rand.choice(candidates) & maximum
+
+def mutateHeaderField(data, rand):
+    name, code, offset = rand.choice(headerLayout)
+    value = getField(data, offset, code)
+    setField(data, offset, code, _getInterestingValue(code, value, len(data), rand))
+    return data, "header %s" % name
+
+def mutateDirectoryEntry(data, rand):
+    entryOffsets = getDirectoryEntryOffsets(data)
+    if not entryOffsets:
+        return None
+    entryOffset = rand.choice(entryOffsets)
+    index = entryOffsets.index(entryOffset)
+    kind = rand.randrange(3)
+    if kind == 0 and len(entryOffsets) > 1:
+        # swap two entries
+        otherOffset = rand.choice(entryOffsets)
+        entry = data[entryOffset:entryOffset + directorySize]
+        data[entryOffset:entryOffset + directorySize] = data[otherOffset:otherOffset + directorySize]
+        data[otherOffset:otherOffset + directorySize] = entry
+        return data, "directory swap %d %d" % (index, entryOffsets.index(otherOffset))
+    if kind == 1 and len(entryOffsets) > 1:
+        # duplicate the tag of another entry
+        otherOffset = rand.choice(entryOffsets)
+        data[entryOffset:entryOffset + 4] = data[otherOffset:otherOffset + 4]
+        return data, "directory tag %d" % index
+    name, code, offset = rand.choice(directoryLayout)
+    value = getField(data, entryOffset + offset, code)
+    setField(data, entryOffset + offset, code, _getInterestingValue(code, value, len(data), rand))
+    return data, "directory %d %s" % (index, name)
+
+_bombs = {}
+
+def _getBomb(length):
+    if length not in _bombs:
+        _bombs[length] = zlib.compress(b"\0" * length, 9)
+    return _bombs[length]
+
+def mutateZlibStream(data, rand):
+    blocks = _getCompressedBlocks(data)
+    if not blocks:
+        return None
+    kind, entryOffset, offset, length = rand.choice(blocks)
+    # the bombs are slow to validate, so they are rare
+    mutation = rand.randrange(8)
+    if mutation < 3:
+        # corrupt the stream
+        for i in range(rand.randint(1, 8)):
+            data[offset + rand.randrange(length)] = rand.randrange(256)
+        return data, "zlib %s corrupt" % kind
+    if mutation < 5:
+        # cut the stream short
+        newLength = rand.randrange(length)
+        if kind == "table":
+            setEntryField(data, entryOffset, "compLength", newLength)
+        else:
+            setHeaderField(data, "metaLength", newLength)
+        return data, "zlib %s truncate" % kind
+    if mutation < 7:
+        # claim a different decompressed length
+        origLength = _getInterestingValue("L", length, len(data), rand)
+        if kind == "table":
+            setEntryField(data, entryOffset, "origLength", origLength)
+        else:
+            setHeaderField(data, "metaOrigLength", origLength)
+        return data, "zlib %s origLength" % kind
+    # replace the stream with one that inflates to a lot of data
+    bombLength = 1 << rand.randint(16, 24)
+    bomb = _getBomb(bombLength)
+    data = replaceBlock(data, offset, length, bomb)
+    if kind == "table":
+        setEntryField(data, entryOffset, "compLength", len(bomb))
+        if rand.randrange(2):
+            setEntryField(data, entryOffset, "origLength", bombLength)
+    else:
+        setHeaderField(data, "metaLength", len(bomb))
+        if rand.randrange(2):
+            setHeaderField(data, "metaOrigLength", bombLength)
+    return data, "zlib %s bomb %d" % (kind, bombLength)
+
+_minimalMetadata = b"<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<metadata version=\"1.0\">\n\t<uniqueid id=\"fuzz\" />\n</metadata>\n"
+
+def _mutateXML(xml, rand):
+    # the first three mutations are slow to
+    # validate, so they are picked less often
+    mutation = rand.randrange(12)
+    if mutation > 6:
+        mutation = rand.randrange(3, 7)
+    position = rand.randint(0, len(xml))
+    rootEnd = xml.find(b">", xml.find(b"<metadata")) + 1
+    if mutation == 0:
+        depth = rand.choice([10, 100, 1000, 10000])
+        xml = xml[:rootEnd] + (b"<text>" * depth) + (b"</text>" * depth) + xml[rootEnd:]
+        return xml, "nesting %d" % depth
+    if mutation == 1:
+        # nested entities, starting after the xml declaration
+        levels = rand.randint(2, 6)
+        declarations = [b"<!ENTITY e0 \"fuzz\">"]
+        for level in range(1, levels + 1):
+            reference = ("&e%d;" % (level - 1)).encode("ascii")
+            declarations.append(("<!ENTITY e%d \"" % level).encode("ascii") + (reference * 10) + b"\">")
+        doctype = b"<!DOCTYPE metadata [" + b"".join(declarations) + b"]>"
+        declarationEnd = xml.find(b"?>") + 2
+        xml = xml[:declarationEnd] + doctype + xml[declarationEnd:]
+        rootEnd = xml.find(b">", xml.find(b"<metadata")) + 1
+        xml = xml[:rootEnd] + ("<description><text>&e%d;</text></description>" % levels).encode("ascii") + xml[rootEnd:]
+        return xml, "entities %d" % levels
+    if mutation == 2:
+        size = 1 << rand.randint(10, 22)
+        xml = xml[:rootEnd] + b"<credits><credit name=\"" + (b"x" * size) + b"\" /></credits>" + xml[rootEnd:]
+        return xml, "attribute %d" % size
+    if mutation == 3:
+        invalid = rand.choice([b"\xff", b"\xc3", b"\xed\xa0\x80", b"\0", b"\xef\xbb\xbf"])
+        return xml[:position] + invalid + xml[position:], "invalid bytes"
+    if mutation == 4:
+        return xml[:position], "truncate"
+    if mutation == 5:
+        start = rand.randint(0, len(xml))
+        end = rand.randint(start, len(xml))
+        copies = rand.choice([2, 10, 100])
+        return xml[:end] + (xml[start:end] * copies) + xml[end:], "repeat %d" % copies
+    for i in range(rand.randint(1, 8)):
+        if xml:
+            index = rand.randrange(len(xml))
+            xml = xml[:index] + bytes(bytearray([rand.randrange(256)])) + xml[index + 1:]
+    return xml, "flip"
+
+def mutateMetadata(data, rand):
+    metaOffset = getHeaderField(data, "metaOffset")
+    metaLength = getHeaderField(data, "metaLength")
+    if metaOffset and metaLength and metaOffset + metaLength <= len(data):
+        try:
+            xml = zlib.decompress(bytes(data[metaOffset:metaOffset + metaLength]))
+        except zlib.error:
+            return None
+    else:
+        # add metadata at the end of the data
+        xml = _minimalMetadata
+        metaOffset = len(data) + ((4 - (len(data) % 4)) % 4)
+        metaLength = 0
+        data = data + bytearray(metaOffset - len(data))
+        setHeaderField(data, "metaOffset", metaOffset)
+    xml, description = _mutateXML(xml, rand)
+    compressed = zlib.compress(xml, rand.choice([1, 6, 9]))
+    data = replaceBlock(data, metaOffset, metaLength, compressed)
+    setHeaderField(data, "metaLength", len(compressed))
+    setHeaderField(data, "metaOrigLength", len(xml))
+    return data, "metadata %s" % description
+
+def mutateBytes(data, rand):
+    if not data:
+        return None
+    mutation = rand.randrange(4)
+    if mutation == 0:
+        for i in range(rand.randint(1, 16)):
+            index = rand.randrange(len(data))
+            data[index] ^= 1 << rand.randrange(8)
+        return data, "bytes flip"
+    if mutation == 1:
+        return data[:rand.randrange(len(data))], "bytes truncate"
+    index = rand.randrange(len(data))
+    count = rand.randint(1, 16)
+    if mutation == 2:
+        return data[:index] + bytearray([rand.randrange(256) for i in range(count)]) + data[index:], "bytes insert %d" % count
+    return data[:index] + data[index + count:], "bytes delete %d" % count
+
+mutators = [
+    mutateHeaderField,
+    mutateDirectoryEntry,
+    mutateZlibStream,
+    mutateMetadata,
+    mutateBytes
+]
+
+def mutate(data, rand, count=None):
+    """
+    Apply *count* random mutations to *data*. This
+    returns the mutated data and a list of descriptions.
+    """
+    data = bytearray(data)
+    if count is None:
+        count = rand.randint(1, 3)
+    descriptions = []
+    for i in range(count):
+        mutator = rand.choice(mutators)
+        # the mutators assume that there is a complete header
+        if len(data) < headerSize and mutator is not mutateBytes:
+            mutator = mutateBytes
+        try:
+            result = mutator(data, rand)
+        except (struct.error, zlib.error, IndexError, ValueError):
+            result = None
+        if result is None:
+            result = mutateBytes(data, rand)
+            if result is None:
+                continue
+        data, description = result
+        descriptions.append(description)
+    return bytes(data), descriptions
+
+
+# --------------
+# Support: Seeds
+# --------------
+
+def findSeedFiles(paths):
+    """
+    Get the WOFF files in *paths*, which may be files or
+    directories. Directories are searched recursively.
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, directoryNames, fileNames in os.walk(path):
+                directoryNames.sort()
+                for fileName in sorted(fileNames):
+                    if os.path.splitext(fileName)[1].lower() == ".woff":
+                        found.append(os.path.join(directory, fileName))
+        else:
+            found.append(path)
+    return found
+
+def loadSeeds(paths):
+    """
+    Load the seeds in *paths* as a list of (name, data).
+    """
+    seeds = []
+    for path in findSeedFiles(paths):
+        f = open(path, "rb")
+        seeds.append((os.path.basename(path), f.read()))
+        f.close()
+    return seeds
+
+def makeCase(seeds, fuzzerSeed, number):
+    """
+    Make the input for run *number*. This returns the
+    name of the seed, the data and the mutations.
+    """
+    rand = random.Random(fuzzerSeed * 0x100000000 + number)
+    name, data = rand.choice(seeds)
+    data, descriptions = mutate(data, rand)
+    return name, data, descriptions
+
+
+# ---------------
+# Support: Limits
+# ---------------
+
+class _Timeout(Exception):
+    pass
+
+_timedOut = [False]
+
+def _alarm(signalNumber, frame):
+    # the validator has bare excepts that may swallow the
+    # exception, so the alarm repeats until it is cleared
+    _timedOut[0] = True
+    signal.setitimer(signal.ITIMER_REAL, 0.05)
+    raise _Timeout()
+
+def _resetPeakMemory():
+    """
+    Reset the peak resident memory of this process. This only
+    works on Linux. The return value tells if it worked.
+    """
+    try:
+        f = open("/proc/self/clear_refs", "w")
+        try:
+            f.write("5")
+        finally:
+            f.close()
+    except (IOError, OSError):
+        return False
+    return True
+
+def _getPeakMemory():
+    """
+    Get the peak resident memory of this process in bytes
+    or None if it can not be measured.
+    """
+    # the high water mark in /proc follows _resetPeakMemory
+    try:
+        f = open("/proc/self/status", "r")
+        try:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+        finally:
+            f.close()
+    except (IOError, OSError, ValueError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes everywhere but macOS
+    if sys.platform != "darwin":
+        peak *= 1024
+    return peak
+
+
+# -------------
+# Support: Runs
+# -------------
+
+class FuzzResult(object):
+
+    """
+    The result of one run. *status* is "ok", "crash", "timeout" or
+    "memory". *detail* is the traceback for crashes. *signature*
+    groups the results that are likely to have the same cause.
+    """
+
+    def __init__(self, number, seedName, descriptions, status, duration=0.0, peakMemory=None, detail=None, signature=None):
+        self.number = number
+        self.seedName = seedName
+        self.descriptions = descriptions
+        self.status = status
+        self.duration = duration
+        self.peakMemory = peakMemory
+        self.detail = detail
+        if signature is None:
+            signature = "%s %s" % (status, " ".join(sorted(set([description.split(" ")[0] for description in descriptions]))))
+        self.signature = signature
+
+    def getText(self):
+        lines = [
+            "status: %s" % self.status,
+            "run: %d" % self.number,
+            "seed: %s" % self.seedName,
+            "mutations: %s" % ", ".join(self.descriptions),
+            "duration: %.3f" % self.duration
+        ]
+        if self.peakMemory is not None:
+            lines.append("peak memory: %d" % self.peakMemory)
+        if self.detail:
+            lines.append("")
+            lines.append(self.detail)
+        return "\n".join(lines) + "\n"
+
+
+def _getCrashSignature(tracebackObject, exception):
+    frames = traceback.extract_tb(tracebackObject)
+    if frames:
+        fileName, line, function = frames[-1][:3]
+        return "crash %s %s:%d %s" % (type(exception).__name__, os.path.basename(fileName), line, function)
+    return "crash %s" % type(exception).__name__
+
+def setLimits(memoryLimit=None):
+    """
+    Prepare this process for *runValidator*. This installs the
+    handler for the timeout and caps the address space at four
+    times *memoryLimit* so that runaway allocations fail instead
+    of swapping.
+    """
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _alarm)
+    if resource is not None and memoryLimit:
+        cap = memoryLimit * 4
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (cap, cap))
+        except (ValueError, resource.error):
+            pass
+
+def runValidator(data, timeout=None, memoryLimit=None):
+    """
+    Run the validator on *data* with the limits. This returns
+    a tuple of the status, the duration, the peak memory, the
+    traceback and the signature. The traceback and the
+    signature are None unless the status is "crash". The
+    timeout only works after *setLimits* has been called.
+    """
+    # after the reset the peak starts at the memory that the
+    # process holds now, which depends on the earlier runs, so
+    # the growth is compared. without the reset only a run
+    # that raises the peak is counted.
+    peakReset = _resetPeakMemory()
+    peakBefore = _getPeakMemory()
+    status = "ok"
+    detail = signature = None
+    _timedOut[0] = False
+    useAlarm = timeout and hasattr(signal, "setitimer")
+    start = time.time()
+    try:
+        try:
+            if useAlarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            validateBytes(data).isValid
+        finally:
+            if useAlarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except _Timeout:
+        pass
+    except MemoryError:
+        status = "memory"
+    except Exception as e:
+        status = "crash"
+        detail = traceback.format_exc()
+        signature = _getCrashSignature(sys.exc_info()[2], e)
+    duration = time.time() - start
+    if status == "ok" and (_timedOut[0] or (timeout and duration > timeout)):
+        status = "timeout"
+    peakMemory = _getPeakMemory()
+    if status == "ok" and memoryLimit and peakMemory is not None:
+        if peakReset:
+            tooMuch = peakMemory - peakBefore > memoryLimit
+        else:
+            tooMuch = peakMemory > memoryLimit and peakMemory > peakBefore
+        if tooMuch:
+            status = "memory"
+    return status, duration, peakMemory, detail, signature
+
+_worker = {}
+
+def _initializeWorker(seedPaths, fuzzerSeed, timeout, memoryLimit):
+    # the parent handles interrupts
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker["seeds"] = loadSeeds(seedPaths)
+    _worker["fuzzerSeed"] = fuzzerSeed
+    _worker["timeout"] = timeout
+    _worker["memoryLimit"] = memoryLimit
+    setLimits(memoryLimit)
+
+def runCase(number):
+    """
+    Run the validator on the input for run *number* in a
+    worker process and return a *FuzzResult*.
+    """
+    seedName, data, descriptions = makeCase(_worker["seeds"], _worker["fuzzerSeed"], number)
+    status, duration, peakMemory, detail, signature = runValidator(data, _worker["timeout"], _worker["memoryLimit"])
+    return FuzzResult(number, seedName, descriptions, status, duration=duration, peakMemory=peakMemory, detail=detail, signature=signature)
+
+def fuzz(seedPaths, runs, fuzzerSeed=0, jobs=None, timeout=1.0, memoryLimit=None, stallTimeout=None):
+    """
+    Run the validator on *runs* mutated inputs in a pool of
+    *jobs* processes and yield a *FuzzResult* for each run in
+    order. *timeout* is in seconds and *memoryLimit* is in bytes.
+    The timeout can not interrupt the validator while it is
+    in C code, so when no result arrives for *stallTimeout*
+    seconds the run being waited for is recorded as a timeout
+    and the pool is restarted after it.
+    """
+    if stallTimeout is None:
+        stallTimeout = max(10.0, (timeout or 1.0) * 10)
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    number = 0
+    while number < runs:
+        pool = multiprocessing.Pool(jobs, _initializeWorker, (seedPaths, fuzzerSeed, timeout, memoryLimit))
+        # the runs are sent one at a time so
+        # that a stalled run can be identified
+        results = pool.imap(runCase, xrange(number, runs))
+        try:
+            while number < runs:
+                try:
+                    result = results.next(stallTimeout)
+                except multiprocessing.TimeoutError:
+                    seedName, data, descriptions = makeCase(loadSeeds(seedPaths), fuzzerSeed, number)
+                    yield FuzzResult(number, seedName, descriptions, "timeout", duration=stallTimeout)
+                    number += 1
+                    break
+                yield result
+                number += 1
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+# --------------------
+# Command Line Behvior
+# --------------------
+
+usage = "%prog [options] [seedpath1 seedpath2]"
+
+description = """This tool mutates WOFF files and runs the
+validator on them to find inputs that make it crash, run
+too long or use too much memory. The default seeds are the
+generated Format and UserAgent test cases. The findings are
+written to the output directory, one for each signature.
+"""
+
+def main():
+    parser = optparse.OptionParser(usage=usage, description=description, version="%prog 0.1beta")
+    parser.add_option("-n", dest="runs", type="int", help="Number of runs. The default is 10000.")
+    parser.add_option("-j", dest="jobs", type="int", help="Number of processes. The default is one per CPU.")
+    parser.add_option("-s", dest="seed", type="int", help="Seed for the mutations. The default is 0.")
+    parser.add_option("-t", dest="timeout", type="float", help="Seconds after which a run is a timeout. The default is 1.")
+    parser.add_option("-m", dest="memoryLimit", type="int", help="Megabytes of peak memory after which a run uses too much memory. The default is 256.")
+    parser.add_option("-d", dest="outputDirectory", help="Output directory for the findings. The default is fuzzer-findings.")
+    parser.add_option("-q", dest="quiet", action="store_true", help="Only report the findings.")
+    parser.set_defaults(runs=10000, seed=0, timeout=1.0, memoryLimit=256, outputDirectory="fuzzer-findings", quiet=False)
+    (options, args) = parser.parse_args()
+    seedPaths = args or defaultSeedPaths
+    seeds = loadSeeds(seedPaths)
+    if not seeds:
+        print("No seed files found.")
+        sys.exit(1)
+    if not os.path.exists(options.outputDirectory):
+        os.makedirs(options.outputDirectory)
+    counts = dict(ok=0, crash=0, timeout=0, memory=0)
+    signatures = set()
+    start = lastProgress = time.time()
+    results = fuzz(seedPaths, options.runs, fuzzerSeed=options.seed, jobs=options.jobs,
+        timeout=options.timeout, memoryLimit=options.memoryLimit * 1024 * 1024)
+    try:
+        for result in results:
+            counts[result.status] += 1
+            if result.status != "ok" and result.signature not in signatures:
+                signatures.add(result.signature)
+                # the input is made again from the run number
+                seedName, data, descriptions = makeCase(seeds, options.seed, result.number)
+                basePath = os.path.join(options.outputDirectory, "%s-%d-%06d" % (result.status, options.seed, result.number))
+                f = open(basePath + ".woff", "wb")
+                f.write(data)
+                f.close()
+                f = open(basePath + ".txt", "w")
+                f.write(result.getText())
+                f.close()
+                print("%s %s (%s)" % (result.status.upper(), basePath + ".woff", result.signature))
+            now = time.time()
+            if not options.quiet and now - lastProgress >= 5:
+                lastProgress = now
+                done = sum(counts.values())
+                print("%d runs, %.0f runs/s" % (done, done / (now - start)))
+    except KeyboardInterrupt:
+        pass
+    results.close()
+    duration = time.time() - start
+    done = sum(counts.values())
+    print("%d runs in %.1f s (%.0f runs/s): %d crashes, %d timeouts, %d memory, %d signatures" % (
+        done, duration, done / max(duration, 0.001), counts["crash"], counts["timeout"], counts["memory"], len(signatures)))
+    if len(signatures):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
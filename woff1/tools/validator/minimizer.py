@@ -0,0 +1,378 @@
+#! /usr/bin/env python
+
+"""
+A minimizer for WOFF files that make the validator crash, run too
+long or use too much memory. The file is reduced step by step while
+the failure is kept: tables, the metadata and the private data are
+removed, blocks are truncated, header and directory fields are
+zeroed and then ranges of bytes are removed, halving the size of
+the ranges as in delta debugging. Each step keeps the first
+candidate, in the order above, that still fails in the same way.
+A crash is the same failure when the exception is raised at the
+same place.
+
+The candidates are validated in-process in a pool of processes and
+the minimization stops when no candidate fails or when the time
+budget runs out. The minimized file can be stored as a regression
+case for the Format suite. Its validity has to be given because the
+validator can not tell it. The case is also added to the expected
+results of test_validator.py. For an invalid file the report is left
+empty, so test_validator.py fails on the case until the report has
+been filled in by hand once the validator has been fixed.
+
+This can also be used as a command line tool.
+"""
+
+# import
+
+from __future__ import division, print_function
+import os
+import sys
+import json
+import time
+import signal
+import optparse
+import multiprocessing
+from validator import headerSize, directorySize
+from fuzzer import testsDirectory, headerLayout, headerOffsets, directoryLayout, getField, setField,\
+    getHeaderField, setHeaderField, getDirectoryEntryOffsets, getEntryField, setEntryField,\
+    replaceBlock, setLimits, runValidator
+
+regressionsDirectory = os.path.join(testsDirectory, "generators", "resources", "regressions")
+expectationsPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_validatorExpectations.txt")
+
+
+# -------------------
+# Support: Candidates
+# -------------------
+
+def _removeBlock(data, offsetName, lengthName, extraNames=[]):
+    offset = getHeaderField(data, offsetName)
+    length = getHeaderField(data, lengthName)
+    if not offset or not length or offset + length > len(data):
+        return None
+    data = replaceBlock(data, offset, length, b"")
+    for name in [offsetName, lengthName] + extraNames:
+        setHeaderField(data, name, 0)
+    return data
+
+def _removeTable(data, entryOffset):
+    tableOffset = getEntryField(data, entryOffset, "offset")
+    compLength = getEntryField(data, entryOffset, "compLength")
+    if tableOffset >= headerSize and tableOffset + compLength <= len(data):
+        data = replaceBlock(data, tableOffset, compLength, b"")
+    numTables = getField(data, headerOffsets["numTables"], "H")
+    setField(data, headerOffsets["numTables"], "H", numTables - 1)
+    # the entry is removed after the count is
+    # changed so it is not moved with the tables
+    return replaceBlock(data, entryOffset, directorySize, b"")
+
+def _truncateTable(data, entryOffset):
+    tableOffset = getEntryField(data, entryOffset, "offset")
+    compLength = getEntryField(data, entryOffset, "compLength")
+    origLength = getEntryField(data, entryOffset, "origLength")
+    if not compLength or tableOffset < headerSize or tableOffset + compLength > len(data):
+        return None
+    length = compLength // 2
+    data = replaceBlock(data, tableOffset, compLength, data[tableOffset:tableOffset + length])
+    setEntryField(data, entryOffset, "compLength", length)
+    if compLength == origLength:
+        setEntryField(data, entryOffset, "origLength", length)
+    return data
+
+def _truncateMetadata(data):
+    offset = getHeaderField(data, "metaOffset")
+    length = getHeaderField(data, "metaLength")
+    if not offset or not length or offset + length > len(data):
+        return None
+    newLength = length // 2
+    data = replaceBlock(data, offset, length, data[offset:offset + newLength])
+    setHeaderField(data, "metaLength", newLength)
+    return data
+
+def getCandidates(data):
+    """
+    Yield (description, data) for the reductions of *data*,
+    starting with the ones that remove the most.
+    """
+    data = bytearray(data)
+    if len(data) >= headerSize:
+        # blocks
+        candidate = _removeBlock(bytearray(data), "privOffset", "privLength")
+        if candidate is not None:
+            yield "remove private data", candidate
+        candidate = _removeBlock(bytearray(data), "metaOffset", "metaLength", ["metaOrigLength"])
+        if candidate is not None:
+            yield "remove metadata", candidate
+        # tables, largest first
+        entryOffsets = getDirectoryEntryOffsets(data)
+        entryOffsets.sort(key=lambda entryOffset: -getEntryField(data, entryOffset, "compLength"))
+        for entryOffset in entryOffsets:
+            yield "remove table %d" % ((entryOffset - headerSize) // directorySize), _removeTable(bytearray(data), entryOffset)
+        for entryOffset in entryOffsets:
+            candidate = _truncateTable(bytearray(data), entryOffset)
+            if candidate is not None:
+                yield "truncate table %d" % ((entryOffset - headerSize) // directorySize), candidate
+        candidate = _truncateMetadata(bytearray(data))
+        if candidate is not None:
+            yield "truncate metadata", candidate
+        # fields
+        for name, code, offset in headerLayout:
+            candidate = bytearray(data)
+            setField(candidate, offset, code, b"\0\0\0\0" if code == "4s" else 0)
+            if candidate != data:
+                yield "zero header %s" % name, candidate
+        for entryOffset in getDirectoryEntryOffsets(data):
+            for name, code, offset in directoryLayout:
+                candidate = bytearray(data)
+                setField(candidate, entryOffset + offset, code, b"\0\0\0\0" if code == "4s" else 0)
+                if candidate != data:
+                    yield "zero directory %d %s" % ((entryOffset - headerSize) // directorySize, name), candidate
+    # ranges of bytes
+    chunkSize = len(data) // 2
+    while chunkSize >= 1:
+        for start in range(len(data) - chunkSize, -1, -chunkSize):
+            yield "remove bytes %d-%d" % (start, start + chunkSize), data[:start] + data[start + chunkSize:]
+        chunkSize //= 2
+
+def _isSmaller(candidate, data):
+    """
+    Candidates must be shorter or have fewer
+    nonzero bytes so the minimization ends.
+    """
+    if len(candidate) != len(data):
+        return len(candidate) < len(data)
+    return candidate.count(b"\0") > data.count(b"\0")
+
+
+# ---------------
+# Support: Checks
+# ---------------
+
+_worker = {}
+
+def _initializeWorker(timeout, memoryLimit):
+    # the parent handles interrupts
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker["timeout"] = timeout
+    _worker["memoryLimit"] = memoryLimit
+    setLimits(memoryLimit)
+
+def getFailure(data, timeout=1.0, memoryLimit=None):
+    """
+    Get the failure for *data*: the signature for crashes
+    and the status for timeouts and memory use, or None
+    if the validator does not fail.
+    """
+    status, duration, peakMemory, detail, signature = runValidator(bytes(data), timeout, memoryLimit)
+    if status == "ok":
+        return None
+    if status == "crash":
+        return signature
+    return status
+
+def _checkCandidate(data):
+    return getFailure(data, _worker["timeout"], _worker["memoryLimit"])
+
+
+# ---------------
+# Public Function
+# ---------------
+
+def minimize(data, jobs=None, timeout=1.0, memoryLimit=None, budget=60.0, stallTimeout=None, log=None):
+    """
+    Minimize the WOFF *data* while the validator keeps failing in
+    the same way. The candidates are checked in a pool of *jobs*
+    processes, *jobs* at a time, and the first failing candidate of
+    each batch is kept. No new batch is started after *budget*
+    seconds. A batch that gives no result for *stallTimeout*
+    seconds is checked again one candidate at a time and the
+    candidates that stall count as timeouts. *log* is called
+    with a line of text for each reduction. This returns the
+    minimized data and the failure, or the original data and
+    None if it does not fail.
+    """
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    if stallTimeout is None:
+        stallTimeout = max(10.0, (timeout or 1.0) * 10)
+    start = time.time()
+    # the peak memory of a process only grows, so memory
+    # failures are checked in a new process each time
+    poolOptions = dict(processes=jobs, initializer=_initializeWorker, initargs=(timeout, memoryLimit))
+    pool = multiprocessing.Pool(**poolOptions)
+    try:
+        try:
+            failure = pool.apply_async(_checkCandidate, (bytes(data),)).get(stallTimeout)
+        except multiprocessing.TimeoutError:
+            failure = "timeout"
+        if failure is None:
+            return data, None
+        if failure == "memory":
+            poolOptions["maxtasksperchild"] = 1
+        pool.terminate()
+        pool = multiprocessing.Pool(**poolOptions)
+        data = bytearray(data)
+        progress = True
+        while progress and time.time() - start < budget:
+            progress = False
+            candidates = getCandidates(data)
+            while time.time() - start < budget:
+                batch = []
+                for description, candidate in candidates:
+                    if _isSmaller(candidate, data):
+                        batch.append((description, bytes(candidate)))
+                    if len(batch) == jobs:
+                        break
+                if not batch:
+                    break
+                try:
+                    results = pool.map_async(_checkCandidate, [candidate for description, candidate in batch]).get(stallTimeout)
+                except multiprocessing.TimeoutError:
+                    # check the candidates of the batch one at a time
+                    pool.terminate()
+                    results = []
+                    for description, candidate in batch:
+                        pool = multiprocessing.Pool(**dict(poolOptions, processes=1))
+                        try:
+                            results.append(pool.apply_async(_checkCandidate, (candidate,)).get(stallTimeout))
+                        except multiprocessing.TimeoutError:
+                            results.append("timeout")
+                        pool.terminate()
+                    pool = multiprocessing.Pool(**poolOptions)
+                for (description, candidate), result in zip(batch, results):
+                    if result == failure:
+                        data = bytearray(candidate)
+                        progress = True
+                        if log is not None:
+                            log("%s: %d bytes" % (description, len(data)))
+                        break
+                if progress:
+                    break
+    finally:
+        pool.terminate()
+        pool.join()
+    return bytes(data), failure
+
+def writeRegression(data, failure, sourceName, valid, directory=None):
+    """
+    Store *data* as a regression case for the Format suite. The
+    WOFF is written with a JSON file holding the title, the
+    description and the validity of the case, which the Format
+    suite generator reads. *valid* tells if the WOFF is valid.
+    This returns the path of the WOFF.
+    """
+    if directory is None:
+        directory = regressionsDirectory
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    number = 1
+    while os.path.exists(os.path.join(directory, "regression-validator-%03d.woff" % number)):
+        number += 1
+    identifier = "regression-validator-%03d" % number
+    path = os.path.join(directory, identifier + ".woff")
+    f = open(path, "wb")
+    f.write(data)
+    f.close()
+    if valid:
+        validity = "valid"
+    else:
+        validity = "invalid"
+    info = dict(
+        title="Validator Regression %d" % number,
+        description="The validator failed on this file with \"%s\". It was minimized from %s. The file is %s." % (failure, sourceName, validity),
+        valid=valid,
+        specLink=None
+    )
+    f = open(os.path.join(directory, identifier + ".json"), "w")
+    f.write(json.dumps(info, indent=1, sort_keys=True, separators=(",", ": ")) + "\n")
+    f.close()
+    return path
+
+def writeExpectation(regressionPath, path=None):
+    """
+    Add the regression case at *regressionPath* to the expected
+    results of test_validator.py. The report of an invalid case
+    is left empty. test_validator.py fails on the case until the
+    report has been filled in by hand, which can only be done
+    once the validator has been fixed.
+    """
+    if path is None:
+        path = expectationsPath
+    identifier = os.path.splitext(os.path.basename(regressionPath))[0]
+    f = open(os.path.splitext(regressionPath)[0] + ".json", "r")
+    info = json.load(f)
+    f.close()
+    lines = [
+        "identifier: %s" % identifier,
+        "title: %s" % info["title"],
+        "description: %s" % info["description"],
+        "valid: %s" % info["valid"]
+    ]
+    if not info["valid"]:
+        lines.append("report:")
+    f = open(path, "a")
+    f.write("\n\n" + "\n".join(lines))
+    f.close()
+
+
+# --------------------
+# Command Line Behvior
+# --------------------
+
+usage = "%prog [options] fontpath"
+
+description = """This tool reduces a WOFF file that makes the
+validator crash, run too long or use too much memory to a
+small file that fails in the same way.
+"""
+
+def main():
+    parser = optparse.OptionParser(usage=usage, description=description, version="%prog 0.1beta")
+    parser.add_option("-o", dest="outputPath", help="Output path. The default is \"fontfilename-min.woff\".")
+    parser.add_option("-j", dest="jobs", type="int", help="Number of processes. The default is one per CPU.")
+    parser.add_option("-t", dest="timeout", type="float", help="Seconds after which a run is a timeout. The default is 1.")
+    parser.add_option("-m", dest="memoryLimit", type="int", help="Megabytes of peak memory after which a run uses too much memory. The default is 256.")
+    parser.add_option("-b", dest="budget", type="float", help="Seconds to spend on the minimization. The default is 60.")
+    parser.add_option("--regression", dest="regression", action="store_true", help="Also store the minimized file as a regression case for the Format suite and add it to the expected results of test_validator.py. This requires --valid or --invalid.")
+    parser.add_option("--valid", dest="valid", action="store_true", help="The minimized file is valid.")
+    parser.add_option("--invalid", dest="valid", action="store_false", help="The minimized file is invalid.")
+    parser.add_option("-q", dest="quiet", action="store_true", help="Do not report the reductions.")
+    parser.set_defaults(timeout=1.0, memoryLimit=256, budget=60.0, regression=False, quiet=False)
+    (options, args) = parser.parse_args()
+    if len(args) != 1:
+        parser.error("One font path is required.")
+    if options.regression and options.valid is None:
+        parser.error("The validity of a regression case must be given with --valid or --invalid.")
+    path = args[0]
+    if not os.path.exists(path):
+        print("File does not exist:", path)
+        sys.exit(1)
+    f = open(path, "rb")
+    data = f.read()
+    f.close()
+    log = None
+    if not options.quiet:
+        log = print
+    minimized, failure = minimize(data, jobs=options.jobs, timeout=options.timeout,
+        memoryLimit=options.memoryLimit * 1024 * 1024, budget=options.budget, log=log)
+    if failure is None:
+        print("The validator does not fail on %s." % path)
+        sys.exit(1)
+    outputPath = options.outputPath
+    if outputPath is None:
+        outputPath = os.path.splitext(path)[0] + "-min.woff"
+    f = open(outputPath, "wb")
+    f.write(minimized)
+    f.close()
+    print("%s: %d bytes to %d bytes (%s)" % (outputPath, len(data), len(minimized), failure))
+    if options.regression:
+        regressionPath = writeRegression(minimized, failure, os.path.basename(path), options.valid)
+        writeExpectation(regressionPath)
+        print("Regression case:", regressionPath)
+        if not options.valid:
+            print("Fill in the report of the case in %s once the validator has been fixed." % os.path.basename(expectationsPath))
+
+
+if __name__ == "__main__":
+    main()
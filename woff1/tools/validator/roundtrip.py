@@ -0,0 +1,240 @@
+#! /usr/bin/env python
+
+"""
+A module for verifying that SFNT files survive a round trip through
+WOFF bitwise identical. *verifyRoundTrip* converts one SFNT to WOFF
+and back and compares the digests of the original and the decoded
+data. When they differ, the first differing table and offset are
+located.
+
+This can also be used as a command line tool for verifying whole
+directories of fonts in parallel.
+"""
+
+# import
+
+from __future__ import division, print_function
+import os
+import sys
+import struct
+import hashlib
+import optparse
+from io import BytesIO
+from validator import structUnpack, sfntHeaderFormat, sfntHeaderSize,\
+    sfntDirectoryEntryFormat, sfntDirectoryEntrySize
+from converter import encodeSFNT, decodeWOFF
+
+sfntExtensions = [".otf", ".ttf"]
+
+
+# ---------------
+# Support: Digest
+# ---------------
+
+class _DigestStream(object):
+
+    """
+    A write-only stream that only keeps the
+    digest and the length of the written data.
+    """
+
+    def __init__(self):
+        self.digest = hashlib.sha1()
+        self.length = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.length += len(data)
+
+
+# --------------------
+# Support: Differences
+# --------------------
+
+def _getRegions(data):
+    """
+    Get a list of (name, start, end) regions in the SFNT *data*
+    sorted by position: the header and the directory, then the
+    tables. The region names for tables are the tags.
+    """
+    if len(data) < sfntHeaderSize:
+        return [("header", 0, len(data))]
+    header = structUnpack(sfntHeaderFormat, data)[0]
+    directoryEnd = sfntHeaderSize + (sfntDirectoryEntrySize * header["numTables"])
+    regions = [("header", 0, directoryEnd)]
+    directoryData = data[sfntHeaderSize:directoryEnd]
+    for index in range(header["numTables"]):
+        if len(directoryData) < sfntDirectoryEntrySize:
+            break
+        entry, directoryData = structUnpack(sfntDirectoryEntryFormat, directoryData)
+        tag = entry["tag"].decode("latin-1")
+        regions.append((tag, entry["offset"], entry["offset"] + entry["length"]))
+    return sorted(regions, key=lambda region: (region[1], region[2]))
+
+def findFirstDifference(original, roundTripped):
+    """
+    Locate the first byte that differs between the *original* SFNT
+    data and the *roundTripped* data. This returns a tuple of the
+    region name (a table tag, "header" or the padding after a table),
+    the offset in that region and the offset in the file, or None if
+    the data is identical.
+    """
+    length = min(len(original), len(roundTripped))
+    position = None
+    # compare in blocks and only look at bytes in a differing block
+    blockSize = 4096
+    for start in range(0, length, blockSize):
+        end = min(start + blockSize, length)
+        if original[start:end] != roundTripped[start:end]:
+            for position in range(start, end):
+                if original[position:position + 1] != roundTripped[position:position + 1]:
+                    break
+            break
+    if position is None:
+        if len(original) == len(roundTripped):
+            return None
+        position = length
+    previous = None
+    for name, start, end in _getRegions(original):
+        if start <= position < end:
+            return name, position - start, position
+        if end <= position:
+            previous = (name, end)
+    if previous is None:
+        return "padding", position, position
+    name, end = previous
+    return "padding after %s" % name, position - end, position
+
+
+# ---------------
+# Public Function
+# ---------------
+
+class RoundTripResult(object):
+
+    """
+    The result of a round trip. *status* is "identical",
+    "different" or "error". *difference* is the tuple from
+    *findFirstDifference* and *error* is the text of a
+    reading, encoding or decoding error.
+    """
+
+    def __init__(self, path, status, difference=None, error=None):
+        self.path = path
+        self.status = status
+        self.difference = difference
+        self.error = error
+
+    def _get_passed(self):
+        return self.status == "identical"
+
+    passed = property(_get_passed)
+
+    def getText(self):
+        if self.status == "identical":
+            return "PASS %s" % self.path
+        if self.status == "error":
+            return "ERROR %s: %s" % (self.path, self.error)
+        name, regionOffset, fileOffset = self.difference
+        return "FAIL %s: first difference in %s at offset %d (file offset %d)" % (self.path, repr(name), regionOffset, fileOffset)
+
+
+def verifyRoundTrip(path, threads=1):
+    """
+    Encode the SFNT at *path* to WOFF, decode it again and compare
+    the digests of the original and the decoded data. The decoded
+    data is only kept in memory when it needs to be searched for
+    the first difference. *threads* is passed to the encoder.
+    This returns a *RoundTripResult*. A file that can not be
+    read, encoded or decoded is reported as an error, so one
+    bad file does not stop the others from being verified.
+    """
+    try:
+        return _verifyRoundTrip(path, threads)
+    except (IOError, OSError, ValueError, struct.error) as e:
+        return RoundTripResult(path, "error", error=str(e))
+
+def _verifyRoundTrip(path, threads):
+    f = open(path, "rb")
+    try:
+        original = f.read()
+    finally:
+        f.close()
+    woffStream = BytesIO()
+    encodeSFNT(BytesIO(original), woffStream, threads=threads)
+    woffData = woffStream.getvalue()
+    del woffStream
+    digestStream = _DigestStream()
+    decodeWOFF(BytesIO(woffData), digestStream)
+    if digestStream.length == len(original) and digestStream.digest.digest() == hashlib.sha1(original).digest():
+        return RoundTripResult(path, "identical")
+    roundTripStream = BytesIO()
+    decodeWOFF(BytesIO(woffData), roundTripStream)
+    difference = findFirstDifference(original, roundTripStream.getvalue())
+    return RoundTripResult(path, "different", difference=difference)
+
+def findSFNTFiles(paths):
+    """
+    Get the SFNT files in *paths*, which may be files or
+    directories. Directories are searched recursively.
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, directoryNames, fileNames in os.walk(path):
+                directoryNames.sort()
+                for fileName in sorted(fileNames):
+                    if os.path.splitext(fileName)[1].lower() in sfntExtensions:
+                        found.append(os.path.join(directory, fileName))
+        else:
+            found.append(path)
+    return found
+
+
+# --------------------
+# Command Line Behvior
+# --------------------
+
+usage = "%prog [options] path1 path2"
+
+description = """This tool round trips SFNT files through WOFF
+and reports the files that are not bitwise identical after the
+round trip. Directories are searched for .otf and .ttf files.
+"""
+
+def main():
+    parser = optparse.OptionParser(usage=usage, description=description, version="%prog 0.1beta")
+    parser.add_option("-j", dest="jobs", type="int", help="Number of fonts to verify in parallel. The default is one per CPU.")
+    parser.add_option("-q", dest="quiet", action="store_true", help="Only report the fonts that fail.")
+    parser.set_defaults(quiet=False)
+    (options, args) = parser.parse_args()
+    for path in args:
+        if not os.path.exists(path):
+            print("File does not exist:", path)
+            sys.exit()
+    paths = findSFNTFiles(args)
+    if options.jobs == 1:
+        pool = None
+        results = (verifyRoundTrip(path) for path in paths)
+    else:
+        import multiprocessing
+        pool = multiprocessing.Pool(options.jobs)
+        results = pool.imap(verifyRoundTrip, paths)
+    failed = 0
+    try:
+        for result in results:
+            if not result.passed:
+                failed += 1
+            if not result.passed or not options.quiet:
+                print(result.getText())
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    print("%d files, %d passed, %d failed" % (len(paths), len(paths) - failed, failed))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
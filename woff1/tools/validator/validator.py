@@ -2,7 +2,12 @@
 
 """
 A module for validating the the file structure of WOFF Files.
-*validateFont* is the only public function.
+*validateFont*, *validateBytes* and *validateStream* are the main
+public functions. *triageBytes* and *triageStream* run the quick
+header and directory tests on the start of a file. The work done
+by the validator can be measured with *ValidationCounters*. WOFF2
+data given to any of these functions is checked by the
+woff2validator module.
 
 This can also be used as a command line tool for validating WOFF files.
 """
@@ -13,11 +18,13 @@ from __future__ import division, print_function
 import os
 import re
 import time
+import errno
 import sys
 import struct
 import zlib
 import optparse
 import codecs
+import json
 from io import BytesIO
 from xml.etree import ElementTree
 from xml.parsers.expat import ExpatError
@@ -468,6 +475,62 @@ metadataSpec_1_0 = {
     }
 }
 
+# --------------------------
+# Support: Hot-Path Counters
+# --------------------------
+
+class ValidationCounters(dict):
+
+    """
+    Counters for the work performed by the hot paths of the
+    validator. These are collected per font and they can be
+    aggregated across a batch with *add*. The counters are:
+
+    - bytesInflated: bytes produced by zlib decompression.
+    - bytesChecksummed: bytes summed by the checksum calculators.
+    - bytesCopied: bytes sliced by structUnpack for the values it
+      unpacks and bytes copied by padData when it adds padding.
+    - unpackDirectoryCalls: number of unpackDirectory calls.
+    - xmlParses: number of metadata XML parses.
+    """
+
+    counterNames = [
+        "bytesInflated",
+        "bytesChecksummed",
+        "bytesCopied",
+        "unpackDirectoryCalls",
+        "xmlParses"
+    ]
+
+    def __init__(self):
+        super(ValidationCounters, self).__init__()
+        for name in self.counterNames:
+            self[name] = 0
+
+    def add(self, other):
+        for name, value in other.items():
+            self[name] = self.get(name, 0) + value
+
+    def getText(self):
+        return ", ".join(["%s=%d" % (name, self[name]) for name in self.counterNames])
+
+# the counters for the font currently being validated.
+# this is set by validateFont for the duration of the tests.
+_activeCounters = None
+
+def _count(name, value=1):
+    if _activeCounters is not None:
+        _activeCounters[name] += value
+
+def _decompress(data):
+    data = zlib.decompress(data)
+    _count("bytesInflated", len(data))
+    return data
+
+def _parseXML(data):
+    _count("xmlParses")
+    return ElementTree.fromstring(data)
+
 # ----------------------
 # Support: struct Helper
 # ----------------------
@@ -491,6 +554,7 @@ def structUnpack(format, data):
     for index, key in enumerate(keys):
         value = values[index]
         unpacked[key] = value
+    _count("bytesCopied", size)
     return unpacked, data[size:]
 
 def structCalcSize(format):
@@ -925,8 +989,26 @@ def _testTableDirectoryPadding(data, reporter):
     - All tables, including the final table, must be padded to a
       four byte boundary using null bytes as needed.
     """
-    header = unpackHeader(data)
     directory = unpackDirectory(data)
+    haveError = _testTableDataEndPadding(data, reporter)[1]
+    # test the bytes used for padding
+    for table in directory:
+        offset = table["offset"]
+        length = table["compLength"]
+        paddingLength = calcPaddingLength(length)
+        if paddingLength:
+            paddingOffset = offset + length
+            padding = data[paddingOffset:paddingOffset+paddingLength]
+            if _testTablePadding(table, padding, reporter):
+                haveError = True
+    return False, haveError
+
+def _testTableDataEndPadding(data, reporter):
+    """
+    Tests:
+    - The final table must be padded to a four byte boundary.
+    """
+    header = unpackHeader(data)
     haveError = False
     # test final table
     if header["metaOffset"] != 0:
@@ -940,23 +1022,23 @@ def _testTableDirectoryPadding(data, reporter):
         haveError = True
     else:
         reporter.logPass(message="The sfnt data ends with proper padding.")
-    # test the bytes used for padding
-    for table in directory:
-        tag = table["tag"].decode()
-        offset = table["offset"]
-        length = table["compLength"]
-        paddingLength = calcPaddingLength(length)
-        if paddingLength:
-            paddingOffset = offset + length
-            padding = data[paddingOffset:paddingOffset+paddingLength]
-            expectedPadding = ("\0" * paddingLength).encode()
-            if padding != expectedPadding:
-                reporter.logError(message="The \"%s\" table is not padded with null bytes." % tag)
-                haveError = True
-            else:
-                reporter.logPass(message="The \"%s\" table is padded with null bytes." % tag)
     return False, haveError
 
+def _testTablePadding(table, padding, reporter):
+    """
+    Tests:
+    - The padding following the table must be null bytes.
+    This returns a boolean indicating if an error was found.
+    """
+    tag = table["tag"].decode()
+    paddingLength = calcPaddingLength(table["compLength"])
+    expectedPadding = ("\0" * paddingLength).encode()
+    if padding != expectedPadding:
+        reporter.logError(message="The \"%s\" table is not padded with null bytes." % tag)
+        return True
+    reporter.logPass(message="The \"%s\" table is padded with null bytes." % tag)
+    return False
+
 def _testTableDirectoryPositions(data, reporter):
     """
     Tests:
@@ -1072,23 +1154,31 @@ def _testTableDirectoryDecompressedLength(data, reporter):
     tableData = unpackTableData(data)
     haveError = False
     for table in directory:
-        tag = table["tag"]
-        compLength = table["compLength"]
-        origLength = table["origLength"]
-        if compLength >= origLength:
-            continue
-        decompressedData = tableData[tag]
-        # couldn't be decompressed. handled elsewhere.
-        if decompressedData is None:
-            continue
-        decompressedLength = len(decompressedData)
-        if origLength != decompressedLength:
-            reporter.logError(message="The \"%s\" table directory entry has an original length (%d) that does not match the actual length of the decompressed data (%d)." % (tag.decode(), origLength, decompressedLength))
+        if _testTableDecompressedLength(table, tableData[table["tag"]], reporter):
             haveError = True
-        else:
-            reporter.logPass(message="The \"%s\" table directory entry has a proper original length compared to the actual decompressed data." % tag.decode())
     return False, haveError
 
+def _testTableDecompressedLength(table, decompressedData, reporter):
+    """
+    Tests:
+    - The decompressed length of the table data must match the defined original length.
+    This returns a boolean indicating if an error was found.
+    """
+    tag = table["tag"]
+    compLength = table["compLength"]
+    origLength = table["origLength"]
+    if compLength >= origLength:
+        return False
+    # couldn't be decompressed. handled elsewhere.
+    if decompressedData is None:
+        return False
+    decompressedLength = len(decompressedData)
+    if origLength != decompressedLength:
+        reporter.logError(message="The \"%s\" table directory entry has an original length (%d) that does not match the actual length of the decompressed data (%d)." % (tag.decode(), origLength, decompressedLength))
+        return True
+    reporter.logPass(message="The \"%s\" table directory entry has a proper original length compared to the actual decompressed data." % tag.decode())
+    return False
+
 def _testTableDirectoryChecksums(data, reporter):
     """
     Tests:
@@ -1100,40 +1190,56 @@ def _testTableDirectoryChecksums(data, reporter):
     tables = unpackTableData(data)
     haveError = False
     for entry in directory:
-        tag = entry["tag"]
-        origChecksum = entry["origChecksum"]
-        decompressedData = tables[tag]
-        # couldn't be decompressed.
-        if decompressedData is None:
-            continue
-        newChecksum = calcChecksum(tag, decompressedData)
-        if newChecksum != origChecksum:
-            newChecksum = hex(newChecksum).strip("L")
-            origChecksum = hex(origChecksum).strip("L")
-            reporter.logError(message="The \"%s\" table directory entry original checksum (%s) does not match the checksum (%s) calculated from the data." % (tag.decode(), origChecksum, newChecksum))
+        if _testTableChecksum(entry, tables[entry["tag"]], reporter):
             haveError = True
-        else:
-            reporter.logPass(message="The \"%s\" table directory entry original checksum is correct." % tag.decode())
     # check the head checksum adjustment
     if "head".encode() not in tables.keys():
         reporter.logWarning(message="The font does not contain a \"head\" table.")
-    else:
-        newChecksum = calcHeadChecksum(data)
-        data = tables["head".encode()]
-        try:
-            checksum = struct.unpack(">L", data[8:12])[0]
-            if checksum != newChecksum:
-                checksum = hex(checksum).strip("L")
-                newChecksum = hex(newChecksum).strip("L")
-                reporter.logError(message="The \"head\" table checkSumAdjustment (%s) does not match the calculated checkSumAdjustment (%s)." % (checksum, newChecksum))
-                haveError = True
-            else:
-                reporter.logPass(message="The \"head\" table checkSumAdjustment is valid.")
-        except:
-            reporter.logError(message="The \"head\" table is not properly structured.")
-            haveError = True
+    elif _testHeadCheckSumAdjustment(data, tables["head".encode()], reporter):
+        haveError = True
     return False, haveError
 
+def _testTableChecksum(table, decompressedData, reporter):
+    """
+    Tests:
+    - The checksum for the table must match the checksum in the directory.
+    This returns a boolean indicating if an error was found.
+    """
+    tag = table["tag"]
+    origChecksum = table["origChecksum"]
+    # couldn't be decompressed.
+    if decompressedData is None:
+        return False
+    newChecksum = calcChecksum(tag, decompressedData)
+    if newChecksum != origChecksum:
+        newChecksum = hex(newChecksum).strip("L")
+        origChecksum = hex(origChecksum).strip("L")
+        reporter.logError(message="The \"%s\" table directory entry original checksum (%s) does not match the checksum (%s) calculated from the data." % (tag.decode(), origChecksum, newChecksum))
+        return True
+    reporter.logPass(message="The \"%s\" table directory entry original checksum is correct." % tag.decode())
+    return False
+
+def _testHeadCheckSumAdjustment(data, headData, reporter):
+    """
+    Tests:
+    - The head checksum adjustment must be correct.
+    This returns a boolean indicating if an error was found.
+    """
+    newChecksum = calcHeadChecksum(data)
+    try:
+        checksum = struct.unpack(">L", headData[8:12])[0]
+        if checksum != newChecksum:
+            checksum = hex(checksum).strip("L")
+            newChecksum = hex(newChecksum).strip("L")
+            reporter.logError(message="The \"head\" table checkSumAdjustment (%s) does not match the calculated checkSumAdjustment (%s)." % (checksum, newChecksum))
+            return True
+        else:
+            reporter.logPass(message="The \"head\" table checkSumAdjustment is valid.")
+    except:
+        reporter.logError(message="The \"head\" table is not properly structured.")
+        return True
+    return False
+
 def _testTableDirectoryTableOrder(data, reporter):
     """
     Tests:
@@ -1175,21 +1281,31 @@ def _testTableDataDecompression(data, reporter):
     """
     haveError = False
     for table in unpackDirectory(data):
-        tag = table["tag"].decode()
         offset = table["offset"]
         compLength = table["compLength"]
-        origLength = table["origLength"]
-        if origLength <= compLength:
-            continue
         entryData = data[offset:offset+compLength]
-        try:
-            zlib.decompress(entryData)
-            reporter.logPass(message="The \"%s\" table data can be decompressed with zlib." % tag)
-        except zlib.error:
-            reporter.logError(message="The \"%s\" table data can not be decompressed with zlib." % tag)
+        if _testTableDecompression(table, entryData, reporter):
             haveError = True
     return False, haveError
 
+def _testTableDecompression(table, entryData, reporter):
+    """
+    Tests:
+    - The table data, when the defined compressed length is less
+      than the original length, must be properly compressed.
+    This returns a boolean indicating if an error was found.
+    """
+    tag = table["tag"].decode()
+    if table["origLength"] <= table["compLength"]:
+        return False
+    try:
+        _decompress(entryData)
+        reporter.logPass(message="The \"%s\" table data can be decompressed with zlib." % tag)
+    except zlib.error:
+        reporter.logError(message="The \"%s\" table data can not be decompressed with zlib." % tag)
+        return True
+    return False
+
 # ----------------
 # Tests: Metadata
 # ----------------
@@ -1275,7 +1391,7 @@ def _testMetadataDecompression(data, reporter):
         return False, False
     compData = unpackMetadata(data, decompress=False, parse=False)
     try:
-        zlib.decompress(compData)
+        _decompress(compData)
     except zlib.error:
         reporter.logError(message="The metadata can not be decompressed with zlib.")
         return True, False
@@ -1309,7 +1425,7 @@ def _testMetadataParse(data, reporter):
         return False, False
     metadata = unpackMetadata(data, parse=False)
     try:
-        ElementTree.fromstring(metadata)
+        _parseXML(metadata)
     except (ExpatError, LookupError):
         reporter.logError(message="The metadata can not be parsed.")
         return True, False
@@ -1323,7 +1439,14 @@ def _testMetadataEncoding(data, reporter):
     """
     if _shouldSkipMetadataTest(data, reporter):
         return False, False
-    metadata = unpackMetadata(data, parse=False).decode()
+    metadata = unpackMetadata(data, parse=False)
+    return _testMetadataTextEncoding(metadata, reporter)
+
+def _testMetadataTextEncoding(metadata, reporter):
+    """
+    Test the encoding of the decompressed *metadata*.
+    """
+    metadata = metadata.decode()
     errorMessage = "The metadata encoding is not valid."
     # check the BOM
     if not metadata.startswith("<"):
@@ -1372,6 +1495,12 @@ def _testMetadataStructure(data, reporter):
     if _shouldSkipMetadataTest(data, reporter):
         return False, False
     tree = unpackMetadata(data)
+    return _testMetadataTree(tree, reporter)
+
+def _testMetadataTree(tree, reporter):
+    """
+    Test the structure of the parsed metadata *tree*.
+    """
     # make sure the top element is metadata
     if tree.tag != "metadata":
         reporter.logError("The top element is not \"metadata\".")
@@ -1715,6 +1844,12 @@ def getMetadataForDisplay(data):
     if not test:
         return None
     metadata = unpackMetadata(data)
+    return getMetadataTreeForDisplay(metadata)
+
+def getMetadataTreeForDisplay(metadata):
+    """
+    Build the display tree from the parsed *metadata* element.
+    """
     tree = []
     for element in metadata:
         _recurseMetadataElement(element, tree)
@@ -1792,10 +1927,16 @@ def calcPaddingLength(length):
     return 4 - (length % 4)
 
 def padData(data):
-    data += "\0".encode() * calcPaddingLength(len(data))
+    paddingLength = calcPaddingLength(len(data))
+    if not paddingLength:
+        return data
+    # the padded data is a copy
+    data += "\0".encode() * paddingLength
+    _count("bytesCopied", len(data))
     return data
 
 def sumDataULongs(data):
+    _count("bytesChecksummed", len(data))
     longs = struct.unpack(">%dL" % (len(data) / 4), data)
     value = sum(longs) % (2 ** 32)
     return value
@@ -1942,6 +2083,7 @@ class BaseReporter(object):
         self.metadata = None
         self.testResults = []
         self.haveReadError = False
+        self.counters = ValidationCounters()
 
     def logTitle(self, title):
         self.title = title
@@ -1981,6 +2123,20 @@ class BaseReporter(object):
     def getReport(self, *args, **kwargs):
         raise NotImplementedError
 
+    def getData(self):
+        """
+        Get everything that has been logged as a dict
+        containing only basic types.
+        """
+        return dict(
+            title=self.title,
+            fileInfo=[list(info) for info in self.fileInfo],
+            haveReadError=self.haveReadError,
+            metadata=self.metadata,
+            testResults=[dict(title=group.title, results=list(group)) for group in self.testResults],
+            counters=dict(self.counters)
+        )
+
 
 class TextReporter(BaseReporter):
 
@@ -2012,6 +2168,27 @@ class HTMLReporter(BaseReporter):
 
     def getReport(self):
         writer = startHTML(title=self.title)
+        self._writeReport(writer)
+        # close the html
+        text = finishHTML(writer)
+        # done
+        return text
+
+    def getSection(self, sectionID):
+        """
+        Get the report as a div with *sectionID* that can
+        be placed in the body of a combined report.
+        """
+        writer = XMLWriter()
+        writer.begintag("div", id=sectionID, c_l_a_s_s="fontReport")
+        writer.begintag("h2", c_l_a_s_s="fontReportTitle")
+        writer.write(self.title)
+        writer.endtag("h2")
+        self._writeReport(writer)
+        writer.endtag("div")
+        return compileHTMLFragment(writer)
+
+    def _writeReport(self, writer):
         # write the file info
         self._writeFileInfo(writer)
         # write major error alert
@@ -2024,10 +2201,6 @@ class HTMLReporter(BaseReporter):
         self._writeTestResultsOverview(writer)
         # write the test groups
         self._writeTestResults(writer)
-        # close the html
-        text = finishHTML(writer)
-        # done
-        return text
 
     def _writeFileInfo(self, writer):
         # write the font info
@@ -2511,7 +2684,16 @@ def finishHTML(writer):
     writer.endtag("html")
     # get the text
     text = "<!DOCTYPE html PUBLIC \"-//W3C//DTD XHTML 1.0 Transitional//EN\" \"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd\">\n"
-    text += writer.compile()
+    text += compileHTMLFragment(writer)
+    # return
+    return text
+
+def compileHTMLFragment(writer):
+    """
+    Compile the elements in *writer* and undo the
+    escaping hacks needed by ElementTree.
+    """
+    text = writer.compile()
     text = text.replace("c_l_a_s_s", "class")
     text = text.replace("a_p_o_s_t_r_o_p_h_e", "'")
     text = text.replace("l_e_s_s", "<")
@@ -2528,6 +2710,7 @@ def unpackHeader(data):
     return structUnpack(headerFormat, data)[0]
 
 def unpackDirectory(data):
+    _count("unpackDirectoryCalls")
     header = unpackHeader(data)
     numTables = header["numTables"]
     data = data[headerSize:]
@@ -2553,7 +2736,7 @@ def unpackTableData(data):
             tableData = data[offset:offset+compLength]
         if compLength < origLength:
             try:
-                td = zlib.decompress(tableData)
+                td = _decompress(tableData)
                 tableData = td
             except zlib.error:
                 tableData = None
@@ -2564,9 +2747,9 @@ def unpackMetadata(data, decompress=True, parse=True):
     header = unpackHeader(data)
     data = data[header["metaOffset"]:header["metaOffset"]+header["metaLength"]]
     if decompress and data:
-        data = zlib.decompress(data)
+        data = _decompress(data)
     if parse and data:
-        data = ElementTree.fromstring(data)
+        data = _parseXML(data)
     return data
 
 def unpackPrivateData(data):
@@ -2574,6 +2757,414 @@ def unpackPrivateData(data):
     data = data[header["privOffset"]:header["privOffset"]+header["privLength"]]
     return data
 
+# -------------------------
+# Support: Stream Validation
+# -------------------------
+
+# Streams are read in chunks of this size when
+# bytes are skipped or when a block is read.
+streamChunkSize = 65536
+
+class _StreamReader(object):
+
+    """
+    Sequential reader for a binary file-like object. This
+    tracks the position relative to the start of the WOFF.
+    Seekable streams may be repositioned backwards.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+        self.furthest = 0
+        self.start = None
+        seekable = getattr(stream, "seekable", None)
+        try:
+            if seekable is not None:
+                canSeek = seekable()
+            else:
+                canSeek = hasattr(stream, "seek") and hasattr(stream, "tell")
+            if canSeek:
+                self.start = stream.tell()
+        except (AttributeError, IOError, OSError):
+            self.start = None
+
+    def read(self, length):
+        chunks = []
+        while length > 0:
+            chunk = self.stream.read(min(length, streamChunkSize))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            length -= len(chunk)
+        data = "".encode().join(chunks)
+        self.position += len(data)
+        self.furthest = max(self.furthest, self.position)
+        return data
+
+    def skip(self, length):
+        while length > 0:
+            chunk = self.stream.read(min(length, streamChunkSize))
+            if not chunk:
+                break
+            length -= len(chunk)
+            self.position += len(chunk)
+        self.furthest = max(self.furthest, self.position)
+
+    def seek(self, position):
+        """
+        Go to *position*. This returns a boolean indicating if the
+        position could be reached. Positions after the end of the
+        stream can always be reached. Reading there returns nothing.
+        """
+        if position >= self.position:
+            self.skip(position - self.position)
+            return True
+        if self.start is None:
+            return False
+        self.stream.seek(self.start + position)
+        self.position = position
+        return True
+
+    def readToEnd(self):
+        """
+        Consume the rest of the stream and return the total length.
+        """
+        if self.position < self.furthest:
+            self.seek(self.furthest)
+        self.skip(sys.maxsize)
+        return self.position
+
+
+class _StreamData(object):
+
+    """
+    A stand-in for the complete WOFF data while validating a stream
+    or triaging a prefix. This holds the header and directory data
+    and, at most, one block read from the stream. Slices outside of
+    the available data are truncated, just as they would be at the
+    end of a file.
+    """
+
+    def __init__(self, prefix, length):
+        self.prefix = prefix
+        self.length = length
+        self.blockOffset = None
+        self.block = None
+
+    def setBlock(self, offset, block):
+        self.blockOffset = offset
+        self.block = block
+
+    def clearBlock(self):
+        self.blockOffset = None
+        self.block = None
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError("Only simple slices of the stream data are supported.")
+        start = index.start
+        if start is None:
+            start = 0
+        stop = index.stop
+        if stop is None:
+            stop = self.length
+        if start < 0 or stop < 0:
+            start, stop, step = index.indices(self.length)
+        if start < len(self.prefix):
+            return self.prefix[start:stop]
+        if self.block is not None:
+            blockStart = start - self.blockOffset
+            blockEnd = blockStart + len(self.block)
+            if 0 <= blockStart < blockEnd:
+                return self.block[blockStart:stop - self.blockOffset]
+        return "".encode()
+
+
+class _StreamResults(object):
+
+    """
+    Storage for test results that are logged while blocks are read
+    from a stream. The results are replayed into the reporter, in
+    directory order, after the stream has been consumed.
+    """
+
+    def __init__(self):
+        self._results = {}
+
+    def run(self, key, tag, function, *args):
+        reporter = BaseReporter()
+        reporter.logTestTitle(key)
+        result = function(*args + (reporter,))
+        self._results.setdefault(key, {})[tag] = (list(reporter.testResults[-1]), result)
+
+    def have(self, key, tag):
+        return tag in self._results.get(key, {})
+
+    def get(self, key, tag):
+        return self._results[key][tag]
+
+    def replay(self, key, tags, reporter):
+        """
+        Log the stored results for *tags* in *reporter*. This
+        returns a boolean indicating if an error was found.
+        """
+        haveError = False
+        results = self._results.get(key, {})
+        for tag in tags:
+            if tag not in results:
+                continue
+            entries, result = results[tag]
+            reporter.testResults[-1].extend(entries)
+            if result:
+                haveError = True
+        return haveError
+
+
+def _readStreamBlocks(reader, data, results):
+    """
+    Read the table, metadata and private data blocks from the stream
+    in offset order. Only one block is held in memory at a time.
+    This returns the metadata display tree or None.
+    """
+    header = unpackHeader(data)
+    directory = unpackDirectory(data)
+    blocks = []
+    for order, entry in enumerate(directory):
+        blocks.append((entry["offset"], 0, order, entry))
+    if header["metaOffset"] and header["metaLength"]:
+        blocks.append((header["metaOffset"], 1, 0, None))
+    if header["privOffset"] and header["privLength"]:
+        blocks.append((header["privOffset"], 2, 0, None))
+    metadataDisplay = None
+    for offset, kind, order, entry in sorted(blocks, key=lambda block: block[:3]):
+        # private data is not tested
+        if kind == 2:
+            continue
+        if kind == 0:
+            length = entry["compLength"] + calcPaddingLength(entry["compLength"])
+            tag = entry["tag"]
+        else:
+            length = header["metaLength"]
+            if header["privOffset"]:
+                length += calcPaddingLength(length)
+            tag = None
+        if not reader.seek(offset):
+            results.run("unreadable", tag, _logUnreadableStreamBlock, entry)
+            continue
+        data.setBlock(offset, reader.read(length))
+        if kind == 0:
+            _testStreamTableBlock(entry, data, results)
+        else:
+            results.run("metadata", None, _testStreamMetadataBlock, data)
+            try:
+                metadataDisplay = getMetadataForDisplay(data)
+            except Exception:
+                metadataDisplay = None
+        data.clearBlock()
+    return metadataDisplay
+
+def _logUnreadableStreamBlock(entry, reporter):
+    # the untested block may hide errors, so a stream
+    # with such a block can never be reported as valid
+    if entry is None:
+        reporter.logError(message="The metadata could not be tested because it overlaps data that was already read from the stream.")
+    else:
+        reporter.logError(message="The \"%s\" table data could not be tested because it overlaps data that was already read from the stream." % entry["tag"].decode())
+    return True
+
+def _testStreamTableBlock(entry, data, results):
+    """
+    Run the tests that need the data of one table.
+    """
+    tag = entry["tag"]
+    offset = entry["offset"]
+    compLength = entry["compLength"]
+    origLength = entry["origLength"]
+    compData = data[offset:offset+compLength]
+    paddingLength = calcPaddingLength(compLength)
+    if paddingLength:
+        padding = data[offset+compLength:offset+compLength+paddingLength]
+        results.run("padding", tag, _testTablePadding, entry, padding)
+    results.run("decompression", tag, _testTableDecompression, entry, compData)
+    # this mirrors unpackTableData
+    tableData = compData
+    if compLength < origLength:
+        try:
+            tableData = _decompress(compData)
+        except zlib.error:
+            tableData = None
+    results.run("decompressedLength", tag, _testTableDecompressedLength, entry, tableData)
+    results.run("checksum", tag, _testTableChecksum, entry, tableData)
+    if tag == "head".encode():
+        results.run("headCheckSumAdjustment", tag, _testHeadCheckSumAdjustment, data, tableData)
+
+def _testStreamMetadataBlock(data, reporter):
+    return testMetadata(data, reporter)
+
+def _runStreamTests(data, directory, results, reporter):
+    """
+    Run the test groups on the stream data. This follows _runTests,
+    but the tests that need block data replay the stored results.
+    """
+    tags = [entry["tag"] for entry in directory]
+    def replay(key):
+        def function(data, reporter):
+            return False, results.replay(key, tags, reporter)
+        return function
+    def testHeadCheckSumAdjustment(data, reporter):
+        if "head".encode() not in tags:
+            reporter.logWarning(message="The font does not contain a \"head\" table.")
+            return False, False
+        return False, results.replay("headCheckSumAdjustment", ["head".encode()], reporter)
+    def testMetadataBlock(data, reporter):
+        if results.have("unreadable", None):
+            results.replay("unreadable", [None], reporter)
+            return False, True
+        if results.have("metadata", None):
+            entries, (stoppingError, nonStoppingError) = results.get("metadata", None)
+            reporter.testResults[-1].extend(entries)
+            return stoppingError, nonStoppingError
+        return testMetadata(data, reporter)
+    groups = [
+        ("Header", [testHeader]),
+        ("Data Blocks", [testDataBlocks]),
+        ("Table Directory", [
+            _testTableDirectoryStructure,
+            _testTableDirectory4ByteOffsets,
+            _testTableDataEndPadding,
+            replay("padding"),
+            _testTableDirectoryPositions,
+            _testTableDirectoryCompressedLength,
+            replay("decompressedLength"),
+            replay("checksum"),
+            testHeadCheckSumAdjustment,
+            _testTableDirectoryTableOrder
+        ]),
+        ("Table Data", [replay("unreadable"), replay("decompression")]),
+        ("Metadata", [testMetadataBlock])
+    ]
+    return _runTestGroups(data, groups, reporter)
+
+def _runTestGroups(data, groups, reporter):
+    """
+    Run a list of (title, test functions) groups. This returns
+    two booleans indicating if a read error was found and
+    if the metadata can be displayed.
+    """
+    canDisplayMetadata = True
+    for title, functions in groups:
+        reporter.logTestTitle(title)
+        for function in functions:
+            stoppingError, nonStoppingError = function(data, reporter)
+            if nonStoppingError:
+                canDisplayMetadata = False
+            if stoppingError:
+                return True, canDisplayMetadata
+    return False, canDisplayMetadata
+
+def _testStream(source, reporter):
+    """
+    Read and test the WOFF in *source*, a tuple of a *_StreamReader*
+    and the header data already read from it. This returns a boolean
+    indicating if a read error was found and the metadata to
+    display or None.
+    """
+    reader, prefix = source
+    if len(prefix) < headerSize:
+        reporter.logTestTitle("Header")
+        _testHeaderStructure(prefix, reporter)
+        return True, None
+    header = unpackHeader(prefix)
+    prefix += reader.read(directorySize * header["numTables"])
+    if len(prefix) < headerSize + (directorySize * header["numTables"]):
+        # the data ends in the directory, so this is all of the data.
+        return _testData(prefix, reporter)
+    data = _StreamData(prefix, header["length"])
+    results = _StreamResults()
+    metadata = _readStreamBlocks(reader, data, results)
+    data.length = reader.readToEnd()
+    haveReadError, canDisplayMetadata = _runStreamTests(data, unpackDirectory(data), results, reporter)
+    if haveReadError or not canDisplayMetadata:
+        metadata = None
+    return haveReadError, metadata
+
+
+# ---------------
+# Support: Triage
+# ---------------
+
+# The tests that only need the header, the
+# directory and the length of the file.
+triageTestGroups = [
+    ("Header", [testHeader]),
+    ("Data Blocks", [testDataBlocks]),
+    ("Table Directory", [
+        _testTableDirectoryStructure,
+        _testTableDirectory4ByteOffsets,
+        _testTableDataEndPadding,
+        _testTableDirectoryPositions,
+        _testTableDirectoryCompressedLength,
+        _testTableDirectoryTableOrder
+    ])
+]
+
+def getTriageLength(data):
+    """
+    Get the number of bytes needed for a triage from
+    *data*, which must contain at least the header.
+    """
+    header = unpackHeader(data)
+    return headerSize + (directorySize * header["numTables"])
+
+def _triageLayout(header, directory):
+    """
+    Get the declared block layout as a list of dicts
+    sorted by offset.
+    """
+    blocks = []
+    for entry in directory:
+        blocks.append(dict(kind="table", tag=entry["tag"], offset=entry["offset"], length=entry["compLength"]))
+    if header["metaOffset"] or header["metaLength"]:
+        blocks.append(dict(kind="metadata", tag=None, offset=header["metaOffset"], length=header["metaLength"]))
+    if header["privOffset"] or header["privLength"]:
+        blocks.append(dict(kind="private", tag=None, offset=header["privOffset"], length=header["privLength"]))
+    return sorted(blocks, key=lambda block: (block["offset"], block["length"]))
+
+
+class TriageResult(object):
+
+    """
+    The result of a triage. This holds the values from the
+    header, the declared block layout, the test results for
+    the header and the directory and the reporter.
+    """
+
+    def __init__(self, reporter, fileLength):
+        self.reporter = reporter
+        self.fileLength = fileLength
+        self.flavor = None
+        self.numTables = None
+        self.totalSfntSize = None
+        self.length = None
+        self.blocks = []
+        self.haveReadError = False
+        self.headerPassed = False
+        self.directoryPassed = False
+
+    def _get_report(self):
+        return self.reporter.getReport()
+
+    report = property(_get_report)
+
+    def _get_passed(self):
+        return self.headerPassed and self.directoryPassed
+
+    passed = property(_get_passed)
+
 # -----------------------
 # Support: Report Helpers
 # -----------------------
@@ -2594,28 +3185,75 @@ def findUniqueFileName(path):
     assert not os.path.exists(newPath)
     return newPath
 
+def createUniqueFile(path):
+    """
+    Create a new file at *path* or, when a file with that name
+    exists, at a path with a time stamp and a number added to
+    the file name. The file is created with O_EXCL so that two
+    processes writing reports to the same directory can not
+    pick the same name. This returns the file, opened for
+    writing bytes, and its path.
+    """
+    folder = os.path.dirname(path)
+    fileName, extension = os.path.splitext(os.path.basename(path))
+    stamp = time.strftime("%Y-%m-%d %H-%M-%S %Z")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    candidate = path
+    number = 1
+    while True:
+        try:
+            fileDescriptor = os.open(candidate, flags, 0o666)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        else:
+            return os.fdopen(fileDescriptor, "wb"), candidate
+        if number == 1:
+            newFileName = "%s (%s)%s" % (fileName, stamp, extension)
+        else:
+            newFileName = "%s (%s %d)%s" % (fileName, stamp, number, extension)
+        candidate = os.path.join(folder, newFileName)
+        number += 1
 
-# ---------------
-# Public Function
-# ---------------
 
-def validateFont(path, options, writeFile=True):
-    # start the reporter
-    if options.outputFormat == "html":
-        reporter = HTMLReporter()
-    elif options.outputFormat == "text":
-        reporter = TextReporter()
+def writeReport(report, path, options):
+    """
+    Write *report* for the font at *path* following the output
+    options and return the path of the written report.
+    """
+    # make the output file name
+    if options.outputFileName is not None:
+        fileName = options.outputFileName
     else:
-        raise NotImplementedError
-    # log the title
-    reporter.logTitle("Report: %s" % os.path.basename(path))
-    # log fileinfo
-    reporter.logFileInfo("FILE", os.path.basename(path))
-    reporter.logFileInfo("DIRECTORY", os.path.dirname(path))
-    # run tests and log results
-    f = open(path, "rb")
-    data = f.read()
+        fileName = os.path.splitext(os.path.basename(path))[0]
+        fileName += "_validate"
+        if options.outputFormat == "html":
+            fileName += ".html"
+        else:
+            fileName += ".txt"
+    # make the output directory
+    if options.outputDirectory is not None:
+        directory = options.outputDirectory
+    else:
+        directory = os.path.dirname(path)
+    # write the file
+    reportPath = os.path.join(directory, fileName)
+    f, reportPath = createUniqueFile(reportPath)
+    f.write(report.encode())
     f.close()
+    return reportPath
+
+
+# ---------------------
+# Support: Test Runner
+# ---------------------
+
+def _runTests(data, reporter):
+    """
+    Run the test groups on *data* and log the results in *reporter*.
+    This returns two booleans indicating if a read error was found
+    and if the metadata can be displayed.
+    """
     haveReadError = False
     canDisplayMetadata = True
     while 1:
@@ -2670,44 +3308,576 @@ def validateFont(path, options, writeFile=True):
             break
         # done
         break
-    reporter.haveReadError = haveReadError
-    # report the metadata
+    return haveReadError, canDisplayMetadata
+
+
+def _makeReporter(options):
+    outputFormat = getattr(options, "outputFormat", "text")
+    if outputFormat == "html":
+        reporter = HTMLReporter()
+    elif outputFormat == "text":
+        reporter = TextReporter()
+    else:
+        raise NotImplementedError
+    return reporter
+
+def _testData(data, reporter):
+    """
+    Test *data*. This returns a boolean indicating if a
+    read error was found and the metadata to display or None.
+    """
+    haveReadError, canDisplayMetadata = _runTests(data, reporter)
+    metadata = None
     if not haveReadError and canDisplayMetadata:
         metadata = getMetadataForDisplay(data)
-        reporter.logMetadata(metadata)
-    # get the report
-    report = reporter.getReport()
+    return haveReadError, metadata
+
+def _validate(function, source, reporter, counters=None):
+    """
+    Call *function* with *source* and *reporter* while
+    collecting the hot-path counters, log the results
+    and the metadata and compile the report.
+    """
+    global _activeCounters
+    previousCounters = _activeCounters
+    _activeCounters = reporter.counters
+    try:
+        haveReadError, metadata = function(source, reporter)
+        reporter.haveReadError = haveReadError
+        # report the metadata
+        if metadata is not None:
+            reporter.logMetadata(metadata)
+    finally:
+        _activeCounters = previousCounters
+    if counters is not None:
+        counters.add(reporter.counters)
+    return ValidationResult(reporter)
+
+woff2Signature = "wOF2".encode()
+
+def _validateData(data, reporter, counters=None):
+    """
+    Validate *data* and return a *ValidationResult*.
+    WOFF2 data is passed to the woff2validator module.
+    """
+    if data[:4] == woff2Signature:
+        import woff2validator
+        return woff2validator.validateWOFF2Data(data, reporter, counters)
+    return _validate(_testData, data, reporter, counters)
+
+def _validateFontResult(path, options, counters=None):
+    """
+    Validate the WOFF or WOFF2 at *path* and
+    return a *ValidationResult*.
+    """
+    # start the reporter
+    reporter = _makeReporter(options)
+    # log the title
+    reporter.logTitle("Report: %s" % os.path.basename(path))
+    # log fileinfo
+    reporter.logFileInfo("FILE", os.path.basename(path))
+    reporter.logFileInfo("DIRECTORY", os.path.dirname(path))
+    # run tests and log results
+    f = open(path, "rb")
+    data = f.read()
+    f.close()
+    return _validateData(data, reporter, counters)
+
+
+# -------------------------
+# Support: Batch Validation
+# -------------------------
+
+def getGroupStatus(group):
+    """
+    Get the most severe status in a *TestResultGroup*.
+    Tracebacks are counted as errors.
+    """
+    if group.haveError() or group.haveTraceback():
+        return "ERROR"
+    if group.haveWarning():
+        return "WARNING"
+    return "PASS"
+
+def _validateFontJob(job):
+    """
+    Validate and write the report for one font in a batch.
+    This may run in a worker process, so everything that
+    is returned must be picklable. An exception is returned
+    as text so that it does not stop the rest of the batch.
+    When an aggregate report is being written, the output is
+    the report section or data for the font instead of the
+    path to a report file.
+    """
+    fontPath, options = job
+    aggregateFormat = getattr(options, "aggregateFormat", None)
+    counters = ValidationCounters()
+    try:
+        result = _validateFontResult(fontPath, options, counters)
+        if aggregateFormat is None:
+            output = writeReport(result.report, fontPath, options)
+        elif aggregateFormat == "html":
+            output = result.reporter.getSection(_getSectionID(fontPath))
+        else:
+            output = result.reporter.getData()
+    except Exception:
+        import traceback
+        return fontPath, None, None, counters, traceback.format_exc()
+    groups = [(group.title, getGroupStatus(group)) for group in result.reporter.testResults]
+    return fontPath, output, groups, counters, None
+
+def _formatDuration(seconds):
+    seconds = int(round(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return "%d:%02d:%02d" % (hours, minutes, seconds)
+
+
+class BatchProgress(object):
+
+    """
+    A progress line for a batch. The throughput is measured
+    in files and bytes per second and the remaining time is
+    estimated from the bytes that are left.
+    """
+
+    def __init__(self, fileCount, byteCount, stream=None):
+        if stream is None:
+            stream = sys.stderr
+        self.stream = stream
+        self.fileCount = fileCount
+        self.byteCount = byteCount
+        self.filesDone = 0
+        self.bytesDone = 0
+        self.startTime = time.time()
+        self._lineLength = 0
+
+    def update(self, byteCount):
+        self.filesDone += 1
+        self.bytesDone += byteCount
+        text = self.getText()
+        # pad to clear the remains of a longer previous line
+        self.stream.write("\r" + text.ljust(self._lineLength))
+        self.stream.flush()
+        self._lineLength = len(text)
+
+    def finish(self):
+        self.stream.write("\n")
+        self.stream.flush()
+
+    def getText(self):
+        elapsed = max(time.time() - self.startTime, 0.000001)
+        bytesPerSecond = self.bytesDone / elapsed
+        if bytesPerSecond:
+            remaining = (self.byteCount - self.bytesDone) / bytesPerSecond
+        else:
+            remaining = 0
+        return "%d/%d files, %.1f files/s, %.2f MB/s, ETA %s" % (
+            self.filesDone,
+            self.fileCount,
+            self.filesDone / elapsed,
+            bytesPerSecond / (1024 * 1024),
+            _formatDuration(remaining)
+        )
+
+
+class BatchSummary(object):
+
+    """
+    The pass, warning and error counts for each
+    test group across a batch.
+    """
+
+    statusNames = ["PASS", "WARNING", "ERROR"]
+
+    def __init__(self):
+        self.groupTitles = []
+        self.counts = {}
+        self.fileCount = 0
+        self.failedCount = 0
+        self.errorPaths = []
+
+    def add(self, fontPath, groups):
+        """
+        Add the (title, status) pairs for *fontPath*.
+        If *groups* is None, the font could not be validated.
+        """
+        self.fileCount += 1
+        failed = groups is None
+        if failed:
+            self.errorPaths.append(fontPath)
+        for title, status in groups or []:
+            if title not in self.counts:
+                self.groupTitles.append(title)
+                self.counts[title] = dict.fromkeys(self.statusNames, 0)
+            self.counts[title][status] += 1
+            if status == "ERROR":
+                failed = True
+        if failed:
+            self.failedCount += 1
+
+    def getText(self):
+        titleWidth = max([len(title) for title in self.groupTitles] + [len("Test Group")])
+        row = "%-" + str(titleWidth) + "s %8s %8s %8s"
+        lines = [row % ("Test Group", "Pass", "Warning", "Error")]
+        lines.append("-" * len(lines[0]))
+        for title in self.groupTitles:
+            counts = self.counts[title]
+            lines.append(row % (title, counts["PASS"], counts["WARNING"], counts["ERROR"]))
+        lines.append("-" * len(lines[0]))
+        lines.append("%d files, %d passed, %d failed" % (self.fileCount, self.fileCount - self.failedCount, self.failedCount))
+        return "\n".join(lines)
+
+    def getData(self):
+        groups = []
+        for title in self.groupTitles:
+            counts = self.counts[title]
+            groups.append(dict(title=title, passCount=counts["PASS"], warningCount=counts["WARNING"], errorCount=counts["ERROR"]))
+        return dict(
+            fileCount=self.fileCount,
+            failedCount=self.failedCount,
+            errorPaths=list(self.errorPaths),
+            groups=groups
+        )
+
+
+# ---------------------------
+# Support: Aggregated Reports
+# ---------------------------
+
+# Aggregated reports are written to a single file
+# while the batch runs. The format is chosen by
+# the extension of the report path.
+aggregateFormats = {
+    ".html" : "html",
+    ".htm" : "html",
+    ".json" : "json",
+    ".ndjson" : "ndjson"
+}
+
+def getAggregateFormat(path):
+    extension = os.path.splitext(path)[1].lower()
+    return aggregateFormats.get(extension)
+
+def _getSectionID(fontPath):
+    return "font-" + re.sub("[^A-Za-z0-9_.-]", "_", fontPath)
+
+def _getStatusText(groups):
+    if groups is None:
+        return "ERROR"
+    statuses = [status for title, status in groups]
+    if "ERROR" in statuses:
+        return "ERROR"
+    if "WARNING" in statuses:
+        return "WARNING"
+    return "PASS"
+
+
+class BaseAggregateWriter(object):
+
+    """
+    Base aggregated report writer. Fonts are added in the
+    order that they were validated and the summary is
+    written when the writer is closed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb")
+
+    def write(self, text):
+        self._file.write(text.encode("utf-8"))
+
+    def addFont(self, fontPath, output, groups, error):
+        raise NotImplementedError
+
+    def close(self, summary):
+        self._file.close()
+
+
+class HTMLAggregateWriter(BaseAggregateWriter):
+
+    """
+    Writes an HTML file containing a section for each
+    font and, at the end, an index linking to them.
+    """
+
+    _bodyPlaceholder = "a_g_g_r_e_g_a_t_e_b_o_d_y"
+
+    def __init__(self, path):
+        super(HTMLAggregateWriter, self).__init__(path)
+        self._index = []
+        # split an empty document around the body
+        writer = startHTML(title="Validation Report")
+        writer.write(self._bodyPlaceholder)
+        text = finishHTML(writer)
+        self._head, self._tail = text.split(self._bodyPlaceholder)
+        self.write(self._head)
+
+    def addFont(self, fontPath, output, groups, error):
+        sectionID = _getSectionID(fontPath)
+        self._index.append((fontPath, sectionID, _getStatusText(groups)))
+        if error is not None:
+            writer = XMLWriter()
+            writer.begintag("div", id=sectionID, c_l_a_s_s="fontReport")
+            writer.begintag("h2", c_l_a_s_s="readError")
+            writer.write("Could not validate: %s" % fontPath)
+            writer.endtag("h2")
+            writer.begintag("pre")
+            writer.write(error)
+            writer.endtag("pre")
+            writer.endtag("div")
+            output = compileHTMLFragment(writer)
+        self.write(output)
+
+    def close(self, summary):
+        writer = XMLWriter()
+        writer.begintag("div", id="index", c_l_a_s_s="infoBlock")
+        writer.begintag("h3", c_l_a_s_s="infoBlockTitle")
+        writer.write("Results for %d Files" % summary.fileCount)
+        writer.endtag("h3")
+        writer.begintag("table", c_l_a_s_s="report")
+        for fontPath, sectionID, status in self._index:
+            writer.begintag("tr", c_l_a_s_s="testReport%s" % status.title())
+            writer.begintag("td", c_l_a_s_s="title")
+            writer.write(status)
+            writer.endtag("td")
+            writer.begintag("td")
+            writer.begintag("a", href="#" + sectionID)
+            writer.write(fontPath)
+            writer.endtag("a")
+            writer.endtag("td")
+            writer.endtag("tr")
+        writer.endtag("table")
+        writer.endtag("div")
+        self.write(compileHTMLFragment(writer))
+        self.write(self._tail)
+        super(HTMLAggregateWriter, self).close(summary)
+
+
+class JSONAggregateWriter(BaseAggregateWriter):
+
+    """
+    Writes a JSON object with a list of fonts and
+    the batch summary.
+    """
+
+    def __init__(self, path):
+        super(JSONAggregateWriter, self).__init__(path)
+        self._fontCount = 0
+        self.write("{\"fonts\": [")
+
+    def addFont(self, fontPath, output, groups, error):
+        if self._fontCount:
+            self.write(",")
+        self.write("\n" + _getFontJSON(fontPath, output, groups, error))
+        self._fontCount += 1
+
+    def close(self, summary):
+        self.write("\n], \"summary\": %s}\n" % json.dumps(summary.getData(), sort_keys=True))
+        super(JSONAggregateWriter, self).close(summary)
+
+
+class NDJSONAggregateWriter(BaseAggregateWriter):
+
+    """
+    Writes one JSON object per line for each font.
+    """
+
+    def addFont(self, fontPath, output, groups, error):
+        self.write(_getFontJSON(fontPath, output, groups, error) + "\n")
+
+
+def _getFontJSON(fontPath, output, groups, error):
+    data = dict(path=fontPath, status=_getStatusText(groups), error=error, report=output)
+    return json.dumps(data, sort_keys=True)
+
+aggregateWriterClasses = {
+    "html" : HTMLAggregateWriter,
+    "json" : JSONAggregateWriter,
+    "ndjson" : NDJSONAggregateWriter
+}
+
+
+# ---------------
+# Public Function
+# ---------------
+
+class ValidationResult(object):
+
+    """
+    The result of a validation. This holds the reporter,
+    the compiled report and the hot-path counters. If no
+    report is given, it is compiled when it is first used.
+    """
+
+    def __init__(self, reporter, report=None):
+        self.reporter = reporter
+        self._report = report
+        self.counters = reporter.counters
+        self.haveReadError = reporter.haveReadError
+
+    def _get_report(self):
+        if self._report is None:
+            self._report = self.reporter.getReport()
+        return self._report
+
+    report = property(_get_report)
+
+    def _get_isValid(self):
+        for group in self.reporter.testResults:
+            if group.haveError() or group.haveTraceback():
+                return False
+        return True
+
+    isValid = property(_get_isValid)
+
+
+def validateBytes(data, config=None, fileName=None, counters=None):
+    """
+    Validate WOFF *data* given as bytes, bytearray or memoryview
+    and return a *ValidationResult*. This does not read or write
+    any files. *config* is an object with an outputFormat attribute
+    ("text" or "html"), as used by validateFont. The default is
+    text output. *fileName* is only used for display in the report.
+    If a *counters* object is given, the hot-path counters for
+    the data are added to it.
+    """
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    elif isinstance(data, bytearray):
+        data = bytes(data)
+    elif not isinstance(data, bytes):
+        raise TypeError("The data must be bytes, bytearray or memoryview, not %s." % type(data).__name__)
+    reporter = _makeReporter(config)
+    if fileName is None:
+        fileName = "WOFF Data"
+    reporter.logTitle("Report: %s" % fileName)
+    reporter.logFileInfo("FILE", fileName)
+    return _validateData(data, reporter, counters)
+
+def validateStream(stream, config=None, fileName=None, counters=None):
+    """
+    Validate WOFF data read from the binary file-like object *stream*
+    and return a *ValidationResult*. The header and the directory are
+    read first and then the table, metadata and private data blocks
+    are consumed in offset order, keeping only the current block in
+    memory. Blocks that overlap data already read can only be tested
+    if the stream is seekable. Otherwise they are reported as errors,
+    so the result is never valid. *config*, *fileName* and *counters*
+    are the same as in validateBytes. The tables of a WOFF2 are
+    compressed as one block, so a WOFF2 stream is read completely.
+    """
+    reporter = _makeReporter(config)
+    if fileName is None:
+        fileName = "WOFF Stream"
+    reporter.logTitle("Report: %s" % fileName)
+    reporter.logFileInfo("FILE", fileName)
+    reader = _StreamReader(stream)
+    prefix = reader.read(headerSize)
+    if prefix[:4] == woff2Signature:
+        return _validateData(prefix + reader.read(sys.maxsize), reporter, counters)
+    return _validate(_testStream, (reader, prefix), reporter, counters)
+
+def validateFont(path, options, writeFile=True, counters=None):
+    """
+    Validate the WOFF at *path* and return a tuple containing
+    the path to the written report (or None) and the report.
+    If a *counters* object is given, the hot-path counters
+    for this font are added to it.
+    """
+    report = _validateFontResult(path, options, counters).report
     # write
     reportPath = None
     if writeFile:
-        # make the output file name
-        if options.outputFileName is not None:
-            fileName = options.outputFileName
-        else:
-            fileName = os.path.splitext(os.path.basename(path))[0]
-            fileName += "_validate"
-            if options.outputFormat == "html":
-                fileName += ".html"
-            else:
-                fileName += ".txt"
-        # make the output directory
-        if options.outputDirectory is not None:
-            directory = options.outputDirectory
-        else:
-            directory = os.path.dirname(path)
-        # write the file
-        reportPath = os.path.join(directory, fileName)
-        reportPath = findUniqueFileName(reportPath)
-        f = open(reportPath, "wb")
-        f.write(report.encode())
-        f.close()
+        reportPath = writeReport(report, path, options)
     return reportPath, report
 
+def triageBytes(prefix, fileLength, config=None):
+    """
+    Triage a WOFF using only *prefix*, the first bytes of the
+    file, and *fileLength*, the real size of the file. The prefix
+    must contain the header and the table directory, see
+    getTriageLength. The header tests and the structural directory
+    tests are run, the heavier tests are deferred. This returns a
+    *TriageResult*. WOFF2 data is triaged by the woff2validator
+    module. Its prefix must contain the header and the table and
+    collection directories.
+    """
+    if isinstance(prefix, memoryview):
+        prefix = prefix.tobytes()
+    elif isinstance(prefix, bytearray):
+        prefix = bytes(prefix)
+    if prefix[:4] == woff2Signature:
+        import woff2validator
+        return woff2validator.triageWOFF2Bytes(prefix, fileLength, config)
+    reporter = _makeReporter(config)
+    result = TriageResult(reporter, fileLength)
+    # the header is not complete
+    if len(prefix) < headerSize:
+        reporter.logTestTitle("Header")
+        _testHeaderStructure(prefix, reporter)
+        result.haveReadError = True
+        return result
+    header = unpackHeader(prefix)
+    result.flavor = header["flavor"]
+    result.numTables = header["numTables"]
+    result.totalSfntSize = header["totalSfntSize"]
+    result.length = header["length"]
+    triageLength = getTriageLength(prefix)
+    prefix = prefix[:triageLength]
+    # the directory is not complete
+    if len(prefix) < triageLength:
+        if len(prefix) < fileLength:
+            raise ValueError("The triage requires %d bytes, but only %d bytes were given." % (triageLength, len(prefix)))
+        reporter.logTestTitle("Header")
+        _testHeaderNumTables(prefix, reporter)
+        result.haveReadError = True
+        return result
+    data = _StreamData(prefix, fileLength)
+    result.blocks = _triageLayout(header, unpackDirectory(data))
+    result.haveReadError = _runTestGroups(data, triageTestGroups, reporter)[0]
+    groups = reporter.testResults
+    result.headerPassed = not groups[0].haveError()
+    result.directoryPassed = len(groups) == len(triageTestGroups) and not [group for group in groups[1:] if group.haveError()]
+    return result
+
+def getTriageText(fontPath, result):
+    """
+    Get a one line summary of *result* for *fontPath*.
+    """
+    if result.passed:
+        status = "PASS"
+    else:
+        status = "FAIL"
+    flavor = result.flavor
+    if flavor is None:
+        flavor = "?"
+    elif isinstance(flavor, bytes):
+        flavor = flavor.decode("latin-1")
+    return "%s %s flavor=%r numTables=%s totalSfntSize=%s blocks=%d" % (status, fontPath, flavor, result.numTables, result.totalSfntSize, len(result.blocks))
+
+def triageStream(stream, fileLength, config=None):
+    """
+    Triage the WOFF in the binary file-like object *stream*.
+    Only the header and the table directory are read, and the
+    collection directory of a WOFF2 collection.
+    *fileLength* is the real size of the file.
+    """
+    reader = _StreamReader(stream)
+    prefix = reader.read(headerSize)
+    if prefix[:4] == woff2Signature:
+        import woff2validator
+        prefix = woff2validator.readWOFF2TriagePrefix(reader, prefix)
+    elif len(prefix) == headerSize:
+        prefix += reader.read(getTriageLength(prefix) - headerSize)
+    return triageBytes(prefix, fileLength, config)
+
 # --------------------
 # Command Line Behvior
 # --------------------
 
-usage = "%prog [options] fontpath1 fontpath2"
+usage = "%prog [options] fontpath1 fontpath2 (use - to read a font from stdin)"
 
 description = """This tool examines the structure of one
 or more WOFF files and issues a detailed report about
@@ -2719,7 +3889,11 @@ def main():
     parser = optparse.OptionParser(usage=usage, description=description, version="%prog 0.1beta")
     parser.add_option("-d", dest="outputDirectory", help="Output directory. The default is to output the report into the same directory as the font file.")
     parser.add_option("-o", dest="outputFileName", help="Output file name. The default is \"fontfilename_validate.html\".")
-    parser.set_defaults(excludeTests=[])
+    parser.add_option("--counters", dest="reportCounters", action="store_true", help="Print the hot-path counters for each font and for the whole batch.")
+    parser.add_option("-a", dest="aggregatePath", help="Write the reports for all fonts to this single file instead of one report per font. The format is chosen by the extension: .html, .json or .ndjson.")
+    parser.add_option("-j", dest="jobs", type="int", help="Number of fonts to validate in parallel. A progress line is shown when this is more than 1. The default is 1.")
+    parser.add_option("--triage", dest="triage", action="store_true", help="Only read the header and the table directory and print a one line summary for each font. No reports are written.")
+    parser.set_defaults(excludeTests=[], reportCounters=False, triage=False, jobs=1)
     (options, args) = parser.parse_args()
     outputDirectory = options.outputDirectory
     options.outputFormat = "html"
@@ -2727,16 +3901,105 @@ def main():
     if outputDirectory is not None and not os.path.exists(outputDirectory):
         print("Directory does not exist:", outputDirectory)
         sys.exit()
+    if options.jobs < 1:
+        print("The number of jobs must be at least 1.")
+        sys.exit()
+    options.aggregateFormat = None
+    if options.aggregatePath is not None:
+        options.aggregateFormat = getAggregateFormat(options.aggregatePath)
+        if options.aggregateFormat is None:
+            print("Unknown aggregate report format:", options.aggregatePath)
+            sys.exit()
+    batchCounters = ValidationCounters()
+    fontPaths = []
     for fontPath in args:
-        if not os.path.exists(fontPath):
+        if fontPath == "-":
+            # read the WOFF from stdin
+            print("Testing: stdin...")
+            fontCounters = ValidationCounters()
+            stream = getattr(sys.stdin, "buffer", sys.stdin)
+            result = validateStream(stream, options, fileName="stdin", counters=fontCounters)
+            batchCounters.add(fontCounters)
+            outputPath = writeReport(result.report, os.path.join(os.getcwd(), "stdin"), options)
+            print("Wrote report to: %s" % outputPath)
+            if options.reportCounters:
+                print("Counters: %s" % fontCounters.getText())
+        elif not os.path.exists(fontPath):
             print("File does not exist:", fontPath)
             sys.exit()
+        elif options.triage:
+            f = open(fontPath, "rb")
+            try:
+                result = triageStream(f, os.path.getsize(fontPath), options)
+            finally:
+                f.close()
+            print(getTriageText(fontPath, result))
         else:
-            print("Testing: %s..." % fontPath)
             if hasattr(fontPath, "decode"):
                 fontPath = fontPath.decode("utf-8")
-            outputPath, report = validateFont(fontPath, options)
-            print("Wrote report to: %s" % outputPath)
+            fontPaths.append(fontPath)
+    if fontPaths:
+        summary = BatchSummary()
+        jobs = [(fontPath, options) for fontPath in fontPaths]
+        if options.jobs == 1:
+            pool = None
+            progress = None
+            results = (_validateFontJob(job) for job in jobs)
+        else:
+            import multiprocessing
+            pool = multiprocessing.Pool(options.jobs)
+            byteCounts = dict([(fontPath, os.path.getsize(fontPath)) for fontPath in fontPaths])
+            progress = BatchProgress(len(fontPaths), sum(byteCounts.values()))
+            if options.aggregateFormat is None:
+                results = pool.imap_unordered(_validateFontJob, jobs)
+            else:
+                # keep the aggregated report in the order of the arguments
+                results = pool.imap(_validateFontJob, jobs)
+        aggregateWriter = None
+        if options.aggregateFormat is not None:
+            aggregatePath = findUniqueFileName(os.path.abspath(options.aggregatePath))
+            aggregateWriter = aggregateWriterClasses[options.aggregateFormat](aggregatePath)
+        # the progress line is not interrupted, so the
+        # counters of each font are printed at the end
+        fontCounterLines = []
+        try:
+            for fontPath, output, groups, fontCounters, error in results:
+                summary.add(fontPath, groups)
+                batchCounters.add(fontCounters)
+                if aggregateWriter is not None:
+                    aggregateWriter.addFont(fontPath, output, groups, error)
+                if progress is not None:
+                    progress.update(byteCounts[fontPath])
+                    if options.reportCounters:
+                        fontCounterLines.append("Counters for %s: %s" % (fontPath, fontCounters.getText()))
+                elif error is not None:
+                    print("Could not validate: %s" % fontPath)
+                    print(error)
+                else:
+                    print("Testing: %s..." % fontPath)
+                    if aggregateWriter is None:
+                        print("Wrote report to: %s" % output)
+                    if options.reportCounters:
+                        print("Counters: %s" % fontCounters.getText())
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            # finish the aggregated report with the fonts that
+            # were validated, even if the batch was interrupted
+            if aggregateWriter is not None:
+                aggregateWriter.close(summary)
+        if aggregateWriter is not None:
+            print("Wrote report to: %s" % aggregateWriter.path)
+        if progress is not None:
+            progress.finish()
+            for failedPath in summary.errorPaths:
+                print("Could not validate: %s" % failedPath)
+            for line in fontCounterLines:
+                print(line)
+        print(summary.getText())
+    if options.reportCounters:
+        print("Batch counters: %s" % batchCounters.getText())
 
 
 if __name__ == "__main__":
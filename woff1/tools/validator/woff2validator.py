@@ -0,0 +1,961 @@
+#! /usr/bin/env python
+
+"""
+A module for validating the file structure of WOFF2 files. This
+uses the reporters of the WOFF validator, so the reports look the
+same for both formats. *validateWOFF2Bytes* is the main public
+function. The Brotli compressed data is only checked when the
+brotli module is available.
+
+The validate and triage functions of the WOFF validator pass WOFF2
+data to this module, so the command line tool checks WOFF2 files
+in all of its modes.
+"""
+
+# import
+
+from __future__ import division, print_function
+import struct
+from xml.parsers.expat import ExpatError
+from validator import structUnpack, structCalcSize, calcPaddingLength,\
+    getMetadataTreeForDisplay, _makeReporter, _validate, _runTestGroups,\
+    _count, _parseXML, _testMetadataTextEncoding, _testMetadataTree,\
+    TriageResult, _StreamData
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class WOFF2ParseError(ValueError): pass
+
+
+# ------------------
+# Support: Unpacking
+# ------------------
+
+woff2HeaderFormat = """
+    signature:           4s
+    flavor:              4s
+    length:              L
+    numTables:           H
+    reserved:            H
+    totalSfntSize:       L
+    totalCompressedSize: L
+    majorVersion:        H
+    minorVersion:        H
+    metaOffset:          L
+    metaLength:          L
+    metaOrigLength:      L
+    privOffset:          L
+    privLength:          L
+"""
+woff2HeaderSize = structCalcSize(woff2HeaderFormat)
+
+# The tags that can be referenced by index in the flags of a
+# table directory entry. Index 63 means that the tag follows.
+knownTableTags = [
+    "cmap", "head", "hhea", "hmtx", "maxp", "name", "OS/2", "post",
+    "cvt ", "fpgm", "glyf", "loca", "prep", "CFF ", "VORG", "EBDT",
+    "EBLC", "gasp", "hdmx", "kern", "LTSH", "PCLT", "VDMX", "vhea",
+    "vmtx", "BASE", "GDEF", "GPOS", "GSUB", "EBSC", "JSTF", "MATH",
+    "CBDT", "CBLC", "COLR", "CPAL", "SVG ", "sbix", "acnt", "avar",
+    "bdat", "bloc", "bsln", "cvar", "fdsc", "feat", "fmtx", "fvar",
+    "gvar", "hsty", "just", "lcar", "mort", "morx", "opbd", "prop",
+    "trak", "Zapf", "Silf", "Glat", "Gloc", "Feat", "Sill"
+]
+arbitraryTagIndex = 63
+
+knownFlavors = ("OTTO", "\000\001\000\000", "true", "ttcf")
+collectionVersions = (0x00010000, 0x00020000)
+
+def unpackWOFF2Header(data):
+    header = structUnpack(woff2HeaderFormat, data)[0]
+    header["signature"] = header["signature"].decode("latin-1")
+    header["flavor"] = header["flavor"].decode("latin-1")
+    return header
+
+def _readByte(data, offset, what):
+    byte = data[offset:offset + 1]
+    if not byte:
+        raise WOFF2ParseError("The %s is not complete." % what)
+    return ord(byte), offset + 1
+
+def readUIntBase128(data, offset, what="UIntBase128 value"):
+    """
+    Read a UIntBase128 value from *data* at *offset*. This
+    returns the value and the offset after the value.
+    """
+    value = 0
+    for index in range(5):
+        byte, offset = _readByte(data, offset, what)
+        # leading zeros are not allowed
+        if index == 0 and byte == 0x80:
+            raise WOFF2ParseError("The %s has leading zeros." % what)
+        # the value must fit in 32 bits
+        if value & 0xFE000000:
+            raise WOFF2ParseError("The %s is too large." % what)
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, offset
+    raise WOFF2ParseError("The %s is longer than five bytes." % what)
+
+def read255UInt16(data, offset, what="255UInt16 value"):
+    """
+    Read a 255UInt16 value from *data* at *offset*. This
+    returns the value and the offset after the value.
+    """
+    code, offset = _readByte(data, offset, what)
+    if code == 253:
+        valueData = data[offset:offset + 2]
+        if len(valueData) < 2:
+            raise WOFF2ParseError("The %s is not complete." % what)
+        return struct.unpack(">H", valueData)[0], offset + 2
+    elif code == 255:
+        value, offset = _readByte(data, offset, what)
+        return value + 253, offset
+    elif code == 254:
+        value, offset = _readByte(data, offset, what)
+        return value + (253 * 2), offset
+    return code, offset
+
+def isTransformed(tag, transformVersion):
+    """
+    For glyf and loca, version 3 is the null transform.
+    For all other tables, version 0 is the null transform.
+    """
+    if tag in ("glyf", "loca"):
+        return transformVersion != 3
+    return transformVersion != 0
+
+def unpackWOFF2Directory(data):
+    """
+    Unpack the table directory. This returns a list of entries
+    and the offset after the directory. A *WOFF2ParseError* is
+    raised if the directory is not properly structured.
+    """
+    header = unpackWOFF2Header(data)
+    offset = woff2HeaderSize
+    directory = []
+    for index in range(header["numTables"]):
+        what = "table directory entry %d" % index
+        flags, offset = _readByte(data, offset, what)
+        tagIndex = flags & 0x3F
+        transformVersion = flags >> 6
+        if tagIndex == arbitraryTagIndex:
+            tag = data[offset:offset + 4]
+            if len(tag) < 4:
+                raise WOFF2ParseError("The tag in %s is not complete." % what)
+            tag = tag.decode("latin-1")
+            offset += 4
+        else:
+            tag = knownTableTags[tagIndex]
+        origLength, offset = readUIntBase128(data, offset, "origLength in %s" % what)
+        transformLength = None
+        if isTransformed(tag, transformVersion):
+            transformLength, offset = readUIntBase128(data, offset, "transformLength in %s" % what)
+        directory.append(dict(
+            tag=tag,
+            tagIndex=tagIndex,
+            transformVersion=transformVersion,
+            origLength=origLength,
+            transformLength=transformLength
+        ))
+    return directory, offset
+
+def unpackCollectionDirectory(data):
+    """
+    Unpack the collection directory that follows the table
+    directory. This returns the collection directory and the
+    offset after it. A *WOFF2ParseError* is raised if the
+    directory is not properly structured.
+    """
+    directory, offset = unpackWOFF2Directory(data)
+    versionData = data[offset:offset + 4]
+    if len(versionData) < 4:
+        raise WOFF2ParseError("The collection header is not complete.")
+    version = struct.unpack(">L", versionData)[0]
+    offset += 4
+    numFonts, offset = read255UInt16(data, offset, "numFonts in the collection header")
+    fonts = []
+    for fontIndex in range(numFonts):
+        what = "collection font entry %d" % fontIndex
+        numTables, offset = read255UInt16(data, offset, "numTables in %s" % what)
+        flavor = data[offset:offset + 4]
+        if len(flavor) < 4:
+            raise WOFF2ParseError("The flavor in %s is not complete." % what)
+        offset += 4
+        indices = []
+        for index in range(numTables):
+            tableIndex, offset = read255UInt16(data, offset, "index in %s" % what)
+            indices.append(tableIndex)
+        fonts.append(dict(flavor=flavor.decode("latin-1"), indices=indices))
+    return dict(version=version, fonts=fonts), offset
+
+def getCompressedDataOffset(data):
+    """
+    Get the offset of the compressed data block, which
+    directly follows the table and collection directories.
+    """
+    header = unpackWOFF2Header(data)
+    if header["flavor"] == "ttcf":
+        return unpackCollectionDirectory(data)[1]
+    return unpackWOFF2Directory(data)[1]
+
+def _getBlocks(data):
+    """
+    Get the (name, offset, length) of the data blocks
+    in the order that they must appear in the file.
+    """
+    header = unpackWOFF2Header(data)
+    blocks = [("compressed data", getCompressedDataOffset(data), header["totalCompressedSize"])]
+    if header["metaOffset"] or header["metaLength"]:
+        blocks.append(("metadata", header["metaOffset"], header["metaLength"]))
+    if header["privOffset"] or header["privLength"]:
+        blocks.append(("private data", header["privOffset"], header["privLength"]))
+    return blocks
+
+def _brotliDecompress(data):
+    data = brotli.decompress(data)
+    _count("bytesInflated", len(data))
+    return data
+
+# -------------
+# Tests: Header
+# -------------
+
+def testHeader(data, reporter):
+    """
+    Test the WOFF2 header.
+    """
+    functions = [
+        _testHeaderStructure,
+        _testHeaderSignature,
+        _testHeaderFlavor,
+        _testHeaderLength,
+        _testHeaderReserved,
+        _testHeaderNumTables
+    ]
+    nonStoppingError = False
+    for function in functions:
+        stoppingError, nsError = function(data, reporter)
+        if nsError:
+            nonStoppingError = True
+        if stoppingError:
+            return True, nonStoppingError
+    return False, nonStoppingError
+
+def _testHeaderStructure(data, reporter):
+    """
+    Tests:
+    - Header must be the proper structure.
+    """
+    if len(data) < woff2HeaderSize:
+        reporter.logError(message="The header is not properly structured.")
+        return True, False
+    reporter.logPass(message="The header structure is correct.")
+    return False, False
+
+def _testHeaderSignature(data, reporter):
+    """
+    Tests:
+    - The signature must be "wOF2".
+    """
+    signature = unpackWOFF2Header(data)["signature"]
+    if signature != "wOF2":
+        reporter.logError(message="Invalid signature: %s." % signature)
+        return True, False
+    reporter.logPass(message="The signature is correct.")
+    return False, False
+
+def _testHeaderFlavor(data, reporter):
+    """
+    Tests:
+    - The flavor should be OTTO, 0x00010000, true or ttcf. Warn if another value is found.
+    - If the flavor is OTTO, the CFF table must be present.
+    - If the flavor is not OTTO or ttcf, the CFF must not be present.
+    - If the directory cannot be unpacked, the flavor can not be validated. Issue a warning.
+    """
+    flavor = unpackWOFF2Header(data)["flavor"]
+    if flavor not in knownFlavors:
+        reporter.logWarning(message="Unknown flavor: %s." % repr(flavor))
+        return False, False
+    if flavor == "ttcf":
+        reporter.logPass(message="The flavor is a correct value.")
+        return False, False
+    try:
+        tags = [entry["tag"] for entry in unpackWOFF2Directory(data)[0]]
+    except WOFF2ParseError:
+        reporter.logWarning(message="Could not validate the flavor.")
+        return False, False
+    if "CFF " in tags and flavor != "OTTO":
+        reporter.logError(message="A \"CFF\" table is defined in the font and the flavor is not set to \"OTTO\".")
+        return False, True
+    elif "CFF " not in tags and flavor == "OTTO":
+        reporter.logError(message="The flavor is set to \"OTTO\" but no \"CFF\" table is defined.")
+        return False, True
+    reporter.logPass(message="The flavor is a correct value.")
+    return False, False
+
+def _testHeaderLength(data, reporter):
+    """
+    Tests:
+    - The length of the data must match the defined length.
+    """
+    length = unpackWOFF2Header(data)["length"]
+    if length != len(data):
+        reporter.logError(message="Defined length (%d) does not match actual length of the data (%d)." % (length, len(data)))
+        return False, True
+    reporter.logPass(message="The length defined in the header is correct.")
+    return False, False
+
+def _testHeaderReserved(data, reporter):
+    """
+    Tests:
+    - The reserved bit must be set to 0.
+    """
+    reserved = unpackWOFF2Header(data)["reserved"]
+    if reserved != 0:
+        reporter.logError(message="Invalid value in reserved field (%d)." % reserved)
+        return False, True
+    reporter.logPass(message="The value in the reserved field is correct.")
+    return False, False
+
+def _testHeaderNumTables(data, reporter):
+    """
+    Tests:
+    - The number of tables must be at least 1.
+    """
+    numTables = unpackWOFF2Header(data)["numTables"]
+    if numTables < 1:
+        reporter.logError(message="Invalid number of tables defined in header structure (%d)." % numTables)
+        return True, False
+    reporter.logPass(message="The number of tables defined in the header is valid.")
+    return False, False
+
+# ----------------------
+# Tests: Table Directory
+# ----------------------
+
+def testTableDirectory(data, reporter):
+    """
+    Test the WOFF2 table directory.
+    """
+    functions = [
+        _testTableDirectoryStructure,
+        _testTableDirectoryTags,
+        _testTableDirectoryTransforms
+    ]
+    nonStoppingError = False
+    for function in functions:
+        stoppingError, nsError = function(data, reporter)
+        if nsError:
+            nonStoppingError = True
+        if stoppingError:
+            return True, nonStoppingError
+    return False, nonStoppingError
+
+def _testTableDirectoryStructure(data, reporter):
+    """
+    Tests:
+    - The directory must be properly structured.
+    - The UIntBase128 values must not have leading zeros
+      and must fit in 32 bits.
+    """
+    try:
+        unpackWOFF2Directory(data)
+    except WOFF2ParseError as e:
+        reporter.logError(message="The table directory is not properly structured.", information=str(e))
+        return True, False
+    reporter.logPass(message="The table directory is properly structured.")
+    return False, False
+
+def _testTableDirectoryTags(data, reporter):
+    """
+    Tests:
+    - A tag must only be used once, unless the font is a collection.
+    - Known tags should be referenced by index. Warn if an arbitrary tag is a known tag.
+    """
+    header = unpackWOFF2Header(data)
+    directory = unpackWOFF2Directory(data)[0]
+    haveError = False
+    if header["flavor"] != "ttcf":
+        tags = [entry["tag"] for entry in directory]
+        for tag in sorted(set(tags)):
+            if tags.count(tag) > 1:
+                reporter.logError(message="The \"%s\" table is defined more than once." % tag)
+                haveError = True
+    for entry in directory:
+        if entry["tagIndex"] == arbitraryTagIndex and entry["tag"] in knownTableTags:
+            reporter.logWarning(message="The \"%s\" tag is written in full instead of being referenced by its index." % entry["tag"])
+    if not haveError:
+        reporter.logPass(message="The table tags are valid.")
+    return False, haveError
+
+def _testTableDirectoryTransforms(data, reporter):
+    """
+    Tests:
+    - glyf and loca must use transform version 0 or 3.
+    - hmtx must use transform version 0 or 1.
+    - All other tables must use transform version 0.
+    - glyf and loca must use the same transform version.
+    - The transformLength of a transformed loca table must be 0.
+    - hmtx can only be transformed if glyf is transformed.
+    """
+    header = unpackWOFF2Header(data)
+    directory = unpackWOFF2Directory(data)[0]
+    haveError = False
+    for entry in directory:
+        tag = entry["tag"]
+        version = entry["transformVersion"]
+        if tag in ("glyf", "loca"):
+            allowed = (0, 3)
+        elif tag == "hmtx":
+            allowed = (0, 1)
+        else:
+            allowed = (0,)
+        if version not in allowed:
+            reporter.logError(message="The \"%s\" table uses an invalid transform version (%d)." % (tag, version))
+            haveError = True
+        if tag == "loca" and isTransformed(tag, version) and entry["transformLength"] != 0:
+            reporter.logError(message="The transformLength of the transformed \"loca\" table (%d) is not 0." % entry["transformLength"])
+            haveError = True
+    # the glyf and loca pairing can only be checked
+    # directly in fonts that are not collections
+    if header["flavor"] != "ttcf":
+        versions = dict([(entry["tag"], entry["transformVersion"]) for entry in directory])
+        if ("glyf" in versions) != ("loca" in versions):
+            reporter.logError(message="The \"glyf\" and \"loca\" tables must both be present if one of them is present.")
+            haveError = True
+        elif "glyf" in versions and versions["glyf"] != versions["loca"]:
+            reporter.logError(message="The \"glyf\" and \"loca\" tables do not use the same transform version.")
+            haveError = True
+        if versions.get("hmtx") == 1 and not isTransformed("glyf", versions.get("glyf", 3)):
+            reporter.logError(message="The \"hmtx\" table is transformed but the \"glyf\" table is not.")
+            haveError = True
+    if not haveError:
+        reporter.logPass(message="The table transforms are valid.")
+    return False, haveError
+
+# ---------------------------
+# Tests: Collection Directory
+# ---------------------------
+
+def testCollectionDirectory(data, reporter):
+    """
+    Test the WOFF2 collection directory.
+    """
+    if unpackWOFF2Header(data)["flavor"] != "ttcf":
+        reporter.logNote(message="The font is not a collection.")
+        return False, False
+    functions = [
+        _testCollectionDirectoryStructure,
+        _testCollectionDirectoryVersion,
+        _testCollectionDirectoryFonts
+    ]
+    nonStoppingError = False
+    for function in functions:
+        stoppingError, nsError = function(data, reporter)
+        if nsError:
+            nonStoppingError = True
+        if stoppingError:
+            return True, nonStoppingError
+    return False, nonStoppingError
+
+def _testCollectionDirectoryStructure(data, reporter):
+    """
+    Tests:
+    - The collection directory must be properly structured.
+    - There must be at least one font.
+    """
+    try:
+        collection = unpackCollectionDirectory(data)[0]
+    except WOFF2ParseError as e:
+        reporter.logError(message="The collection directory is not properly structured.", information=str(e))
+        return True, False
+    if not collection["fonts"]:
+        reporter.logError(message="The collection does not contain any fonts.")
+        return True, False
+    reporter.logPass(message="The collection directory is properly structured.")
+    return False, False
+
+def _testCollectionDirectoryVersion(data, reporter):
+    """
+    Tests:
+    - The version must be 0x00010000 or 0x00020000.
+    """
+    version = unpackCollectionDirectory(data)[0]["version"]
+    if version not in collectionVersions:
+        reporter.logError(message="Invalid collection version (0x%08X)." % version)
+        return False, True
+    reporter.logPass(message="The collection version is valid.")
+    return False, False
+
+def _testCollectionDirectoryFonts(data, reporter):
+    """
+    Tests:
+    - The table indices must reference entries in the table directory.
+    - A font must not reference a table more than once.
+    - A font must not reference two tables with the same tag.
+    - A font must reference both glyf and loca if it references one of them.
+    - The flavor of each font should be known. Warn if another value is found.
+    - Every table should be used by at least one font. Warn if a table is not used.
+    """
+    directory = unpackWOFF2Directory(data)[0]
+    collection = unpackCollectionDirectory(data)[0]
+    haveError = False
+    usedIndices = set()
+    for fontIndex, font in enumerate(collection["fonts"]):
+        indices = font["indices"]
+        if font["flavor"] not in knownFlavors[:-1]:
+            reporter.logWarning(message="Unknown flavor for font %d: %s." % (fontIndex, repr(font["flavor"])))
+        if len(set(indices)) != len(indices):
+            reporter.logError(message="Font %d references a table more than once." % fontIndex)
+            haveError = True
+        tags = []
+        for index in indices:
+            if index >= len(directory):
+                reporter.logError(message="Font %d references a table (%d) that is not in the table directory." % (fontIndex, index))
+                haveError = True
+                continue
+            usedIndices.add(index)
+            tags.append(directory[index]["tag"])
+        if len(set(tags)) != len(tags):
+            reporter.logError(message="Font %d references more than one table with the same tag." % fontIndex)
+            haveError = True
+        if ("glyf" in tags) != ("loca" in tags):
+            reporter.logError(message="Font %d must reference both the \"glyf\" and \"loca\" tables if it references one of them." % fontIndex)
+            haveError = True
+    for index, entry in enumerate(directory):
+        if index not in usedIndices:
+            reporter.logWarning(message="The \"%s\" table at index %d is not used by any font." % (entry["tag"], index))
+    if not haveError:
+        reporter.logPass(message="The collection fonts are valid.")
+    return False, haveError
+
+# ------------------
+# Tests: Data Blocks
+# ------------------
+
+def testDataBlocks(data, reporter):
+    """
+    Test the WOFF2 data blocks.
+    """
+    functions = [
+        _testBlocksOffsetLengthZero,
+        _testBlocksBoundaries,
+        _testBlocksAlignment,
+        _testBlocksExtraneousData
+    ]
+    nonStoppingError = False
+    for function in functions:
+        stoppingError, nsError = function(data, reporter)
+        if nsError:
+            nonStoppingError = True
+        if stoppingError:
+            return True, nonStoppingError
+    return False, nonStoppingError
+
+def _testBlocksOffsetLengthZero(data, reporter):
+    """
+    Tests:
+    - The compressed data block must not be empty.
+    - The metadata and private data offsets and lengths must both be 0 or both be non-zero.
+    """
+    header = unpackWOFF2Header(data)
+    haveError = False
+    if not header["totalCompressedSize"]:
+        reporter.logError(message="The total compressed size is 0.")
+        haveError = True
+    for name, offsetKey, lengthKey in (("metadata", "metaOffset", "metaLength"), ("private data", "privOffset", "privLength")):
+        if bool(header[offsetKey]) != bool(header[lengthKey]):
+            reporter.logError(message="The %s offset (%d) and length (%d) must both be 0 or both be non-zero." % (name, header[offsetKey], header[lengthKey]))
+            haveError = True
+    if not haveError:
+        reporter.logPass(message="The block offsets and lengths are set properly.")
+    return False, haveError
+
+def _testBlocksBoundaries(data, reporter):
+    """
+    Tests:
+    - The blocks must be in the order compressed data, metadata, private data.
+    - The blocks must not overlap.
+    - The blocks must not extend past the end of the file.
+    """
+    blocks = _getBlocks(data)
+    haveError = False
+    previousEnd = 0
+    previousName = "table directory"
+    for name, offset, length in blocks:
+        if offset < previousEnd:
+            reporter.logError(message="The %s block starts before the end of the %s." % (name, previousName))
+            haveError = True
+        if offset + length > len(data):
+            reporter.logError(message="The %s block extends past the end of the file." % name)
+            haveError = True
+        previousEnd = offset + length
+        previousName = name
+    if haveError:
+        return True, False
+    reporter.logPass(message="The blocks are in the correct order and within the file.")
+    return False, False
+
+def _testBlocksAlignment(data, reporter):
+    """
+    Tests:
+    - The metadata and private data blocks must begin on four byte boundaries.
+    - The padding between the blocks must be null.
+    """
+    blocks = _getBlocks(data)
+    haveError = False
+    for index, (name, offset, length) in enumerate(blocks):
+        if index and offset % 4:
+            reporter.logError(message="The %s block does not begin on a four byte boundary." % name)
+            haveError = True
+        if index + 1 < len(blocks):
+            nextOffset = blocks[index + 1][1]
+            padding = data[offset + length:nextOffset]
+            if padding != "\0".encode() * len(padding):
+                reporter.logError(message="The padding after the %s block is not null." % name)
+                haveError = True
+    if not haveError:
+        reporter.logPass(message="The blocks are properly aligned.")
+    return False, haveError
+
+def _testBlocksExtraneousData(data, reporter):
+    """
+    Tests:
+    - There must not be data between the blocks or after the last block,
+      other than the padding needed to reach a four byte boundary.
+    """
+    blocks = _getBlocks(data)
+    haveError = False
+    for index, (name, offset, length) in enumerate(blocks):
+        end = offset + length
+        if index + 1 < len(blocks):
+            nextOffset = blocks[index + 1][1]
+        else:
+            nextOffset = len(data)
+        if nextOffset - end > calcPaddingLength(end):
+            reporter.logError(message="%d bytes of extraneous data follow the %s block." % (nextOffset - end - calcPaddingLength(end), name))
+            haveError = True
+    if not haveError:
+        reporter.logPass(message="There is no extraneous data between or after the blocks.")
+    return False, haveError
+
+# -----------------
+# Tests: Table Data
+# -----------------
+
+def testTableData(data, reporter):
+    """
+    Test the compressed table data. The data is
+    decompressed once for all of the tests.
+    """
+    if brotli is None:
+        reporter.logNote(message="The brotli module is not available, so the compressed data was not tested.")
+        return False, False
+    try:
+        tableData = _brotliDecompress(_getCompressedData(data))
+    except Exception:
+        tableData = None
+    functions = [
+        _testTableDataDecompression,
+        _testTableDataDecompressedLength
+    ]
+    nonStoppingError = False
+    for function in functions:
+        stoppingError, nsError = function(data, tableData, reporter)
+        if nsError:
+            nonStoppingError = True
+        if stoppingError:
+            return True, nonStoppingError
+    return False, nonStoppingError
+
+def _getCompressedData(data):
+    header = unpackWOFF2Header(data)
+    offset = getCompressedDataOffset(data)
+    return data[offset:offset + header["totalCompressedSize"]]
+
+def _testTableDataDecompression(data, tableData, reporter):
+    """
+    Tests:
+    - The table data must be compressed with Brotli.
+    """
+    if tableData is None:
+        reporter.logError(message="The table data can not be decompressed with Brotli.")
+        return True, False
+    reporter.logPass(message="The table data can be decompressed with Brotli.")
+    return False, False
+
+def _testTableDataDecompressedLength(data, tableData, reporter):
+    """
+    Tests:
+    - The decompressed length must match the sum of the table lengths,
+      using the transformLength for transformed tables.
+    """
+    directory = unpackWOFF2Directory(data)[0]
+    expectedLength = 0
+    for entry in directory:
+        if entry["transformLength"] is not None:
+            expectedLength += entry["transformLength"]
+        else:
+            expectedLength += entry["origLength"]
+    decompressedLength = len(tableData)
+    if decompressedLength != expectedLength:
+        reporter.logError(message="The decompressed table data length (%d) does not match the sum of the table lengths (%d)." % (decompressedLength, expectedLength))
+        return False, True
+    reporter.logPass(message="The decompressed table data length matches the sum of the table lengths.")
+    return False, False
+
+# ---------------
+# Tests: Metadata
+# ---------------
+
+def testMetadata(data, reporter):
+    """
+    Test the WOFF2 metadata. The metadata is decompressed
+    and parsed once for all of the tests.
+    """
+    header = unpackWOFF2Header(data)
+    if not header["metaOffset"] or not header["metaLength"]:
+        reporter.logNote(message="No metadata to test.")
+        return False, False
+    if brotli is None:
+        reporter.logNote(message="The brotli module is not available, so the metadata was not tested.")
+        return False, False
+    try:
+        metadata = _unpackMetadata(data)
+    except Exception:
+        metadata = None
+    tree = None
+    if metadata is not None:
+        try:
+            tree = _parseXML(metadata)
+        # ElementTree raises a ParseError, which is a SyntaxError
+        except (ExpatError, SyntaxError, LookupError):
+            pass
+    functions = [
+        _testMetadataDecompression,
+        _testMetadataDecompressedLength,
+        _testMetadataParse,
+        _testMetadataEncoding,
+        _testMetadataStructure
+    ]
+    nonStoppingError = False
+    for function in functions:
+        stoppingError, nsError = function(data, metadata, tree, reporter)
+        if nsError:
+            nonStoppingError = True
+        if stoppingError:
+            return True, nonStoppingError
+    return False, nonStoppingError
+
+def _unpackMetadata(data, decompress=True):
+    header = unpackWOFF2Header(data)
+    data = data[header["metaOffset"]:header["metaOffset"] + header["metaLength"]]
+    if decompress:
+        data = _brotliDecompress(data)
+    return data
+
+def _testMetadataDecompression(data, metadata, tree, reporter):
+    """
+    Tests:
+    - Metadata must be compressed with Brotli.
+    """
+    if metadata is None:
+        reporter.logError(message="The metadata can not be decompressed with Brotli.")
+        return True, False
+    reporter.logPass(message="The metadata can be decompressed with Brotli.")
+    return False, False
+
+def _testMetadataDecompressedLength(data, metadata, tree, reporter):
+    """
+    Tests:
+    - The length of the decompressed metadata must match the defined original length.
+    """
+    metaOrigLength = unpackWOFF2Header(data)["metaOrigLength"]
+    decompressedLength = len(metadata)
+    if metaOrigLength != decompressedLength:
+        reporter.logError(message="The decompressed metadata length (%d) does not match the original metadata length (%d) in the header." % (decompressedLength, metaOrigLength))
+        return False, True
+    reporter.logPass(message="The decompressed metadata length matches the original metadata length in the header.")
+    return False, False
+
+def _testMetadataParse(data, metadata, tree, reporter):
+    """
+    Tests:
+    - The metadata must be well-formed.
+    """
+    if tree is None:
+        reporter.logError(message="The metadata can not be parsed.")
+        return True, False
+    reporter.logPass(message="The metadata can be parsed.")
+    return False, False
+
+def _testMetadataEncoding(data, metadata, tree, reporter):
+    """
+    Tests:
+    - The metadata must be UTF-8 encoded.
+    """
+    return _testMetadataTextEncoding(metadata, reporter)
+
+def _testMetadataStructure(data, metadata, tree, reporter):
+    """
+    Test the metadata structure with the
+    specification used for WOFF 1.0.
+    """
+    return _testMetadataTree(tree, reporter)
+
+def getMetadataForDisplay(data):
+    """
+    Build the display tree of the metadata, as
+    described in the WOFF validator. This returns None
+    if there is no metadata or it can not be read.
+    """
+    header = unpackWOFF2Header(data)
+    if brotli is None or not header["metaOffset"] or not header["metaLength"]:
+        return None
+    return getMetadataTreeForDisplay(_parseXML(_unpackMetadata(data)))
+
+# --------------------
+# Support: Test Runner
+# --------------------
+
+def testWOFF2Data(data, reporter):
+    """
+    Test WOFF2 *data*. This returns a boolean indicating if a
+    read error was found and the metadata to display or None.
+    """
+    groups = [
+        ("Header", [testHeader]),
+        ("Table Directory", [testTableDirectory]),
+        ("Collection Directory", [testCollectionDirectory]),
+        ("Data Blocks", [testDataBlocks]),
+        ("Table Data", [testTableData]),
+        ("Metadata", [testMetadata])
+    ]
+    haveReadError, canDisplayMetadata = _runTestGroups(data, groups, reporter)
+    metadata = None
+    if not haveReadError and canDisplayMetadata:
+        metadata = getMetadataForDisplay(data)
+    return haveReadError, metadata
+
+# ---------------
+# Support: Triage
+# ---------------
+
+# The tests that only need the header, the directories
+# and the length of the file. The alignment test is
+# left out because it reads the padding between blocks.
+triageTestGroups = [
+    ("Header", [testHeader]),
+    ("Table Directory", [testTableDirectory]),
+    ("Collection Directory", [testCollectionDirectory]),
+    ("Data Blocks", [
+        _testBlocksOffsetLengthZero,
+        _testBlocksBoundaries,
+        _testBlocksExtraneousData
+    ])
+]
+
+# the largest table directory entry: the flags, a tag
+# and two UIntBase128 values of at most five bytes.
+maxDirectoryEntrySize = 1 + 4 + 5 + 5
+
+def readWOFF2TriagePrefix(reader, prefix):
+    """
+    Read the directories of the WOFF2 in the *_StreamReader*
+    *reader* after *prefix*, the data that has already been
+    read. The size of the directories is only known once they
+    have been unpacked, so the data is read in growing steps
+    until they can be unpacked or the stream ends.
+    """
+    prefix += reader.read(woff2HeaderSize - len(prefix))
+    if len(prefix) < woff2HeaderSize:
+        return prefix
+    size = woff2HeaderSize + unpackWOFF2Header(prefix)["numTables"] * maxDirectoryEntrySize
+    while True:
+        data = reader.read(size - len(prefix))
+        prefix += data
+        try:
+            getCompressedDataOffset(prefix)
+            return prefix
+        except (WOFF2ParseError, struct.error):
+            pass
+        if len(prefix) < size:
+            return prefix
+        size *= 2
+
+def triageWOFF2Bytes(prefix, fileLength, config=None):
+    """
+    Triage a WOFF2 using only *prefix*, the first bytes of the
+    file, and *fileLength*, the real size of the file. The prefix
+    must contain the header and the table and collection
+    directories. This returns a *TriageResult* like the triage
+    functions of the WOFF validator.
+    """
+    reporter = _makeReporter(config)
+    result = TriageResult(reporter, fileLength)
+    if len(prefix) < woff2HeaderSize:
+        reporter.logTestTitle("Header")
+        _testHeaderStructure(prefix, reporter)
+        result.haveReadError = True
+        return result
+    header = unpackWOFF2Header(prefix)
+    # the same type as the flavor in the WOFF triage
+    result.flavor = header["flavor"].encode("latin-1")
+    result.numTables = header["numTables"]
+    result.totalSfntSize = header["totalSfntSize"]
+    result.length = header["length"]
+    data = _StreamData(prefix, fileLength)
+    try:
+        blocks = _getBlocks(data)
+    except (WOFF2ParseError, struct.error):
+        # the directories are not complete
+        if len(prefix) < fileLength:
+            raise ValueError("The triage requires the table and collection directories, but only %d bytes were given." % len(prefix))
+        blocks = []
+    kinds = {"compressed data": "tables", "metadata": "metadata", "private data": "private"}
+    result.blocks = [dict(kind=kinds[name], tag=None, offset=offset, length=length) for name, offset, length in blocks]
+    result.haveReadError = _runTestGroups(data, triageTestGroups, reporter)[0]
+    groups = reporter.testResults
+    result.headerPassed = not groups[0].haveError()
+    result.directoryPassed = len(groups) == len(triageTestGroups) and not [group for group in groups[1:] if group.haveError()]
+    return result
+
+# ---------------
+# Public Function
+# ---------------
+
+def validateWOFF2Data(data, reporter, counters=None):
+    """
+    Validate WOFF2 *data* and log the results with *reporter*.
+    This returns a *ValidationResult*. If a *counters* object
+    is given, the hot-path counters are added to it.
+    """
+    return _validate(testWOFF2Data, data, reporter, counters)
+
+def validateWOFF2Bytes(data, config=None, fileName=None, counters=None):
+    """
+    Validate WOFF2 *data* given as bytes, bytearray or memoryview
+    and return a *ValidationResult*. The arguments are the same
+    as for *validateBytes* in the WOFF validator.
+    """
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    elif isinstance(data, bytearray):
+        data = bytes(data)
+    elif not isinstance(data, bytes):
+        raise TypeError("The data must be bytes, bytearray or memoryview, not %s." % type(data).__name__)
+    reporter = _makeReporter(config)
+    if fileName is None:
+        fileName = "WOFF2 Data"
+    reporter.logTitle("Report: %s" % fileName)
+    reporter.logFileInfo("FILE", fileName)
+    return validateWOFF2Data(data, reporter, counters)
+
+
+if __name__ == "__main__":
+    import validator
+    validator.main()